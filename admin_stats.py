@@ -0,0 +1,153 @@
+"""
+Admin dashboard statistics for Food Premi
+Collection counts come from counters bumped on every write instead of
+count_documents() scans, and heavier aggregates (signups per day, orders,
+revenue) are computed by a background refresh and stored, so a dashboard
+load costs two point reads
+"""
+
+from pymongo.errors import DuplicateKeyError
+from cache import admin_cache
+from datetime import datetime, timedelta
+import os
+import threading
+import time
+
+ADMIN_STATS_INTERVAL = float(os.getenv('ADMIN_STATS_INTERVAL', '300'))
+ADMIN_SIGNUP_DAYS = int(os.getenv('ADMIN_SIGNUP_DAYS', '30'))
+# Reconcile with exact counts (collection scans) instead of collection metadata
+ADMIN_STATS_EXACT = os.getenv('ADMIN_STATS_EXACT', '0') == '1'
+
+COUNTED = ('users', 'blogs')
+
+
+def _counter_id(name):
+    return f'{name}_count'
+
+
+def bump(db, name, amount=1):
+    """Adjust the maintained count for a collection after a write
+
+    Best effort: the write it follows has already succeeded, so a failure is
+    only logged and the next reconcile() repairs the count.
+    """
+    admin_cache.invalidate()
+    if db is None:
+        return False
+    try:
+        # No upsert: a missing counter is seeded from the real count by reconcile()
+        db.counters.update_one({'_id': _counter_id(name)}, {'$inc': {'seq': amount}})
+    except Exception as e:
+        print(f"Counter {name} not bumped, left for the next reconcile: {e}")
+        return False
+    return True
+
+
+def reconcile(db, exact=ADMIN_STATS_EXACT):
+    """Reset the counters to the real collection sizes; return them"""
+    counts = {}
+    now = datetime.utcnow()
+    for name in COUNTED:
+        collection = db[name]
+        counts[name] = collection.count_documents({}) if exact else collection.estimated_document_count()
+        db.counters.update_one(
+            {'_id': _counter_id(name)}, {'$set': {'seq': counts[name], 'reconciled_at': now}}, upsert=True
+        )
+    return counts
+
+
+def compute_aggregates(db, days=ADMIN_SIGNUP_DAYS):
+    """Order/revenue totals and signups per day over the last `days` days"""
+    totals = next(db.users.aggregate([{'$group': {
+        '_id': None,
+        'order_count': {'$sum': '$order_count'},
+        'total_spent': {'$sum': '$total_spent'},
+        'active_users': {'$sum': {'$cond': ['$is_active', 1, 0]}}
+    }}]), {})
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    signups = db.users.aggregate([
+        {'$match': {'created_at': {'$gte': today - timedelta(days=days - 1)}}},
+        {'$group': {'_id': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$created_at'}},
+                    'count': {'$sum': 1}}},
+        {'$sort': {'_id': 1}}
+    ])
+    return {
+        'order_count': totals.get('order_count', 0),
+        'total_spent': round(totals.get('total_spent', 0.0), 2),
+        'active_users': totals.get('active_users', 0),
+        'signups_per_day': [{'date': day['_id'], 'count': day['count']} for day in signups]
+    }
+
+
+class AdminStats:
+    """Scheduled refresh of counters and aggregates, shared through MongoDB"""
+
+    def __init__(self, interval=ADMIN_STATS_INTERVAL):
+        self.interval = interval
+        self._thread = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def _claim(self, db):
+        """True if this process should refresh now (one worker per interval)"""
+        now = datetime.utcnow()
+        try:
+            db.admin_stats.update_one(
+                {'_id': 'summary', '$or': [{'refresh_after': {'$lte': now}},
+                                           {'refresh_after': {'$exists': False}}]},
+                {'$set': {'refresh_after': now + timedelta(seconds=self.interval)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The summary exists and another worker refreshed it recently
+            return False
+        return True
+
+    def refresh(self, db, force=False):
+        """Reconcile the counters and recompute the aggregates if due"""
+        if not force and not self._claim(db):
+            return False
+        started = time.perf_counter()
+        reconcile(db)
+        aggregates = compute_aggregates(db)
+        aggregates['computed_at'] = datetime.utcnow()
+        aggregates['refresh_after'] = aggregates['computed_at'] + timedelta(seconds=self.interval)
+        aggregates['compute_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        db.admin_stats.update_one({'_id': 'summary'}, {'$set': aggregates}, upsert=True)
+        self.refreshes += 1
+        admin_cache.invalidate()
+        return True
+
+    def _run(self, get_db):
+        while True:
+            time.sleep(self.interval)
+            try:
+                db = get_db()
+                if db is not None:
+                    self.refresh(db)
+            except Exception as e:
+                print(f"Admin stats refresh failed: {e}")
+
+    def ensure_scheduler(self, get_db):
+        """Start the background refresh thread in this process if it is not running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, args=(get_db,), name='admin-stats', daemon=True
+                )
+                self._thread.start()
+
+    def summary(self, db):
+        """Counts and aggregates for the dashboard"""
+        counters = {doc['_id']: doc['seq'] for doc in
+                    db.counters.find({'_id': {'$in': [_counter_id(name) for name in COUNTED]}})}
+        stored = db.admin_stats.find_one({'_id': 'summary'}, {'_id': 0, 'refresh_after': 0})
+        if len(counters) < len(COUNTED) or not stored or 'computed_at' not in stored:
+            # First load on a new deployment: compute once inline
+            self.refresh(db, force=True)
+            return self.summary(db)
+        counts = {name: counters[_counter_id(name)] for name in COUNTED}
+        return {'counts': counts, 'stats': stored}
+
+
+admin_stats = AdminStats()
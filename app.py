@@ -1,9 +1,33 @@
 from flask import Flask, jsonify, request, session
 from flask_cors import CORS
-from database import get_db
+from database import get_db, db_connection
 from auth import user_auth
+from hashing import HasherBusy, password_hasher
+from cache import admin_cache, asset_cache, menu_cache, blog_cache, profile_cache
+from http_cache import asset_response, cached_json_response, cached_payload
+from json_provider import FastJSONProvider
+from pagination import (
+    InvalidPageRequest, decode_cursor, fetch_page, keyset_query, parse_fields, parse_limit
+)
+from streaming import stream_cursor, wants_stream
+from blog_dates import migrate_created_at, parse_created_at
+from menu_import import (
+    MenuImportError, format_for, import_items, import_stream, normalize_item, slugify
+)
+from menu_changes import (
+    MENU_CHANGES_PAGE_SIZE, allocate_revisions, changes_since, delete_items, read_snapshot, stamp
+)
+from menu_search import menu_search
+from admin_stats import admin_stats, bump
+from rate_limit import create_limiter, rate_limited
+from batch import BatchRunner, batch_response
+from pymongo.errors import AutoReconnect, BulkWriteError, DuplicateKeyError
+import compression
+import sessions
+import metrics
 from bson import ObjectId
-import json
+from datetime import datetime
+import csv
 import os
 
 app = Flask(__name__)
@@ -11,46 +35,121 @@ CORS(app)  # Enable CORS for all routes
 
 # Configure session
 app.secret_key = os.getenv('SECRET_KEY', 'food-premi-secret-key-change-in-production')
-app.config['SESSION_TYPE'] = 'filesystem'
+# 'cookie' (signed cookie, Flask's default), 'memory' (one process) or 'mongodb'
+app.config['SESSION_TYPE'] = os.getenv('SESSION_TYPE', 'cookie')
+sessions.init_app(app, get_db=get_db)
 
-# Custom JSON encoder to handle ObjectId
-class JSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        return super().default(obj)
+# Per-IP/per-email token buckets and a concurrency cap for the auth endpoints
+auth_limiter = create_limiter(get_db)
 
-# Configure JSON encoder for Flask
-app.json_encoder = JSONEncoder
+# Request/Mongo command instrumentation (before any MongoClient exists)
+metrics.init_app(app)
+
+# gzip/brotli by Accept-Encoding; cached payloads carry precompressed variants
+compression.init_app(app)
+
+# Optionally connect in the background instead of on the first request
+if os.getenv('DB_WARMUP', '0') == '1':
+    db_connection.warm_up()
+
+# JSON provider that handles ObjectId/datetime/Decimal (orjson when installed)
+app.json = FastJSONProvider(app, backend=os.getenv('JSON_BACKEND') or None)
+
+@app.errorhandler(AutoReconnect)
+def database_unreachable(e):
+    """Routes without their own error handling: go offline and answer 503"""
+    db_connection.record_error(e)
+    response = jsonify({'success': False, 'message': 'Database unavailable, please retry shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 # --- Blog CRUD (Mongo) ---
+BLOG_PAGE_SIZE = int(os.getenv('BLOG_PAGE_SIZE', '20'))
+BLOG_PAGE_MAX = int(os.getenv('BLOG_PAGE_MAX', '100'))
+# Fields returned by ?mode=list (the admin list view needs nothing else)
+BLOG_LIST_FIELDS = {'title': 1, 'excerpt': 1, 'image': 1, 'category': 1, 'created_at': 1}
+
+def _build_blog_page(limit=BLOG_PAGE_SIZE, cursor=None, projection=None):
+    """Build one page of the blog list, newest first"""
+    posts, next_cursor = fetch_page(
+        get_db('blogs').blogs, 'created_at', limit, cursor=cursor, projection=projection
+    )
+    return {'success': True, 'data': posts, 'next_cursor': next_cursor}
+
 @app.route('/api/blogs', methods=['GET', 'POST'])
 def blogs():
     db = get_db()
     if request.method == 'GET':
-        posts = list(db.blogs.find().sort('created_at', -1)) if db else []
-        return jsonify({'success': True, 'data': posts})
+        if db is None:
+            return jsonify({'success': True, 'data': [], 'next_cursor': None})
+        try:
+            limit = parse_limit(request.args.get('limit'), BLOG_PAGE_SIZE, BLOG_PAGE_MAX)
+            projection = parse_fields(request.args.get('fields'))
+            if request.args.get('mode') == 'list':
+                projection = dict(BLOG_LIST_FIELDS, **(projection or {}))
+            cursor = request.args.get('cursor') or None
+            if cursor:
+                decode_cursor(cursor)
+        except InvalidPageRequest as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        if wants_stream():
+            # Stream every matching post (or up to ?limit=) without buffering
+            posts = keyset_query(get_db('blogs').blogs, 'created_at', cursor, projection)
+            if request.args.get('limit'):
+                posts = posts.limit(limit)
+            return stream_cursor(posts)
+        key = f"blogs:{limit}:{sorted(projection) if projection else '*'}:{cursor or ''}"
+        return cached_json_response(
+            blog_cache, key, lambda: _build_blog_page(limit, cursor, projection)
+        )
     # admin only create
     data = request.get_json()
     if not session.get('is_admin'):
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
-    data['created_at'] = data.get('created_at') or ''
-    res = db.blogs.insert_one(data) if db else None
+    try:
+        data['created_at'] = parse_created_at(data.get('created_at')) or datetime.utcnow()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    res = db.blogs.insert_one(data) if db is not None else None
+    if res is not None:
+        bump(db, 'blogs')
+    db_connection.note_write('blogs')
+    blog_cache.invalidate()
     return jsonify({'success': True, 'id': str(res.inserted_id) if res else 'offline'})
 
-@app.route('/api/blogs/<post_id>', methods=['PUT', 'DELETE'])
+@app.route('/api/blogs/<post_id>', methods=['GET', 'PUT', 'DELETE'])
 def blog_item(post_id):
     db = get_db()
+    if request.method == 'GET':
+        if db is None or not ObjectId.is_valid(post_id):
+            return jsonify({'success': False, 'message': 'Post not found'}), 404
+        post = get_db('blogs').blogs.find_one({'_id': ObjectId(post_id)})
+        if not post:
+            return jsonify({'success': False, 'message': 'Post not found'}), 404
+        return jsonify({'success': True, 'data': post})
     if not session.get('is_admin'):
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
     if request.method == 'PUT':
         data = request.get_json()
-        if db:
+        if 'created_at' in data:
+            # Keep the stored date unless a valid new one is given (see blog_dates.py)
+            try:
+                created_at = parse_created_at(data.pop('created_at'))
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            if created_at is not None:
+                data['created_at'] = created_at
+        if db is not None and data:
             db.blogs.update_one({'_id': ObjectId(post_id)}, {'$set': data})
+            db_connection.note_write('blogs')
+            blog_cache.invalidate()
         return jsonify({'success': True})
     # DELETE
-    if db:
-        db.blogs.delete_one({'_id': ObjectId(post_id)})
+    if db is not None:
+        if db.blogs.delete_one({'_id': ObjectId(post_id)}).deleted_count:
+            bump(db, 'blogs', -1)
+        db_connection.note_write('blogs')
+        blog_cache.invalidate()
     return jsonify({'success': True})
 
 # Reviews functionality removed - using static ratings in frontend
@@ -61,21 +160,41 @@ def admin_summary():
     if not session.get('is_admin'):
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
     db = get_db()
-    counts = {
-        'users': db.users.count_documents({}) if db else 0,
-        'blogs': db.blogs.count_documents({}) if db else 0,
-        'reviews': 0  # Reviews functionality removed
-    }
-    return jsonify({'success': True, 'counts': counts})
+    if db is None:
+        return jsonify({'success': True, 'counts': {'users': 0, 'blogs': 0, 'reviews': 0}})
+    # Counters are bumped on writes and reconciled by a background refresh
+    admin_stats.ensure_scheduler(get_db)
+
+    def build():
+        summary = admin_stats.summary(db)
+        summary['counts']['reviews'] = 0  # Reviews functionality removed
+        return dict({'success': True}, **summary)
+    return cached_json_response(admin_cache, 'summary', build)
+
+# --- Batched reads (page bootstrap in one round trip) ---
+batch_runner = BatchRunner()
+
+@app.route('/api/batch', methods=['GET', 'POST'])
+def batch():
+    """Run several read endpoints concurrently and return their responses together"""
+    try:
+        return batch_response(app, batch_runner)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
 
 # --- Seed initial admin ---
 @app.route('/api/seed-admin', methods=['POST'])
+@rate_limited('seed-admin', auth_limiter)
 def seed_admin():
     db = get_db()
     body = request.get_json() or {}
     email = body.get('email', 'admin@foodpremi.com')
-    if db and not db.users.find_one({'email': email}):
+    if db is not None and not db.users.find_one({'email': email}):
         db.users.insert_one({'email': email, 'name': 'Admin', 'password': '', 'role': 'admin'})
+        bump(db, 'users')
     return jsonify({'success': True})
 
 @app.route('/')
@@ -85,7 +204,11 @@ def home():
         "status": "Active",
         "endpoints": {
             "menu": "/api/menu",
+            "grouped_menu": "/api/menu/grouped",
+            "menu_changes": "/api/menu/changes?since=<revision>",
+            "menu_search": "/api/menu/search?q=<text>",
             "categories": "/api/categories",
+            "batch": "/api/batch?requests=auth-status,menu",
             "health": "/health"
         }
     })
@@ -101,41 +224,57 @@ def health_check():
             return jsonify({
                 "status": "healthy",
                 "database": "connected",
-                "timestamp": "2025-01-16"
+                "password_hashing": password_hasher.stats(),
+                "timestamp": datetime.utcnow()
             })
         else:
             return jsonify({
                 "status": "healthy",
                 "database": "offline_mode",
                 "message": "Running without database connection",
-                "timestamp": "2025-01-16"
+                "circuit_breaker": db_connection.breaker.stats(),
+                "password_hashing": password_hasher.stats(),
+                "timestamp": datetime.utcnow()
             })
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "status": "unhealthy",
             "database": "disconnected",
             "error": str(e)
         }), 500
 
+def _build_menu(category=None):
+    """Build the menu payload, optionally restricted to one category
+
+    revision is the settled revision, read from the primary before the items,
+    so polling /api/menu/changes from it can repeat a change but not miss
+    one. The items still come from the 'menu' read preference; read_snapshot
+    makes a lagging secondary catch up to the revision first.
+    """
+    if category is None:
+        revision, items = read_snapshot(get_db(), get_db('menu'))
+        return {"success": True, "revision": revision, "count": len(items), "data": items}
+    revision, items = read_snapshot(get_db(), get_db('menu'), {"category": category.lower()})
+    return {"success": True, "category": category, "revision": revision, "count": len(items), "data": items}
+
+def _build_categories():
+    """Build the category list payload"""
+    return {
+        "success": True,
+        "categories": get_db('menu').menu_items.distinct("category")
+    }
+
 @app.route('/api/menu')
 def get_menu():
     """Get all menu items"""
     try:
         db = get_db()
         if db is not None:
-            menu_collection = db.menu_items
-            # Get all menu items and convert ObjectIds to strings
-            items = []
-            for item in menu_collection.find():
-                if '_id' in item:
-                    item['_id'] = str(item['_id'])
-                items.append(item)
-            
-            return jsonify({
-                "success": True,
-                "count": len(items),
-                "data": items
-            })
+            if wants_stream():
+                # Large catalogs: encode documents as the cursor yields them
+                return stream_cursor(get_db('menu').menu_items.find())
+            return cached_json_response(menu_cache, 'menu', _build_menu)
         else:
             # Return sample data when offline
             sample_items = [
@@ -161,28 +300,126 @@ def get_menu():
                 "message": "Running in offline mode with sample data"
             })
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+def _build_grouped_menu(with_prices=False):
+    """Build the available menu grouped by category with one aggregation"""
+    group = {'_id': '$category', 'items': {'$push': '$$ROOT'}, 'count': {'$sum': 1}}
+    if with_prices:
+        group['min_price'] = {'$min': {'$min': '$prices.price'}}
+        group['max_price'] = {'$max': {'$max': '$prices.price'}}
+    pipeline = [
+        {'$match': {'is_available': {'$ne': False}}},
+        {'$sort': {'category': 1, 'name': 1}},
+        {'$group': group},
+        {'$sort': {'_id': 1}}
+    ]
+    groups = []
+    for doc in get_db('menu').menu_items.aggregate(pipeline):
+        entry = {"category": doc['_id'], "count": doc['count'], "items": doc['items']}
+        if with_prices:
+            entry["price_range"] = {"min": doc.get('min_price'), "max": doc.get('max_price')}
+        groups.append(entry)
+    return {"success": True, "count": len(groups), "data": groups}
+
+@app.route('/api/menu/grouped')
+def get_grouped_menu():
+    """Get all available menu items grouped by category"""
+    try:
+        if get_db() is None:
+            return jsonify({
+                "success": True,
+                "count": 0,
+                "data": [],
+                "message": "Running in offline mode"
+            })
+        with_prices = request.args.get('prices') in ('1', 'true')
+        return cached_json_response(
+            menu_cache,
+            f'menu-grouped:{int(with_prices)}',
+            lambda: _build_grouped_menu(with_prices)
+        )
+    except Exception as e:
+        db_connection.record_error(e)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/menu/changes')
+def get_menu_changes():
+    """Menu items changed or removed since ?since=<revision>"""
+    try:
+        since = int(request.args.get('since', 0))
+        limit = parse_limit(request.args.get('limit'), MENU_CHANGES_PAGE_SIZE, MENU_CHANGES_PAGE_SIZE)
+    except (ValueError, InvalidPageRequest) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    try:
+        # Primary only: a lagging secondary could hand out a revision ahead of its data
+        db = get_db()
+        if db is None:
+            return jsonify({"success": True, "reset": False, "revision": since,
+                            "changed": [], "removed": [], "has_more": False})
+        return jsonify(dict({"success": True}, **changes_since(db, since, limit)))
+    except Exception as e:
+        db_connection.record_error(e)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+MENU_SEARCH_LIMIT = int(os.getenv('MENU_SEARCH_LIMIT', '20'))
+
+@app.route('/api/menu/search')
+def search_menu():
+    """Search menu items by name, badges, category and description (?q=)"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = parse_limit(request.args.get('limit'), MENU_SEARCH_LIMIT, 100)
+    except InvalidPageRequest as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    try:
+        db = get_db()
+        if db is None:
+            return jsonify({"success": True, "query": query, "count": 0, "data": [],
+                            "message": "Search unavailable in offline mode"})
+        # Changes from the primary; a full rebuild reads the items like /api/menu
+        menu_search.refresh(db, get_db('menu'))
+        items = menu_search.search(query, limit)
+        return jsonify({"success": True, "query": query, "count": len(items), "data": items})
+    except Exception as e:
+        db_connection.record_error(e)
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+def _known_categories():
+    """Set of categories that have menu items, cached alongside the menu"""
+    return menu_cache.get_or_load(
+        'category-set', lambda: frozenset(get_db('menu').menu_items.distinct("category"))
+    )
+
 @app.route('/api/menu/<category>')
 def get_menu_by_category(category):
     """Get menu items by category"""
     try:
-        db = get_db()
-        menu_collection = db.menu_items
-        
-        # Get items by category
-        items = list(menu_collection.find({"category": category.lower()}))
-        
-        return jsonify({
-            "success": True,
-            "category": category,
-            "count": len(items),
-            "data": items
-        })
+        category = category.lower()
+        if category not in _known_categories():
+            # Unknown categories are not cached, so arbitrary paths cannot evict hot entries
+            return jsonify(_build_menu(category))
+        # Get items by category (served pre-encoded from the cache when warm)
+        return cached_json_response(
+            menu_cache,
+            f'menu:{category}',
+            lambda: _build_menu(category)
+        )
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "error": str(e)
@@ -192,22 +429,72 @@ def get_menu_by_category(category):
 def get_categories():
     """Get all available categories"""
     try:
-        db = get_db()
-        menu_collection = db.menu_items
-        
-        # Get distinct categories
-        categories = menu_collection.distinct("category")
-        
-        return jsonify({
-            "success": True,
-            "categories": categories
-        })
+        # Get distinct categories (served pre-encoded from the cache when warm)
+        return cached_json_response(menu_cache, 'categories', _build_categories)
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+def _component_metrics():
+    """Gauges for caches, password hashing, auth limits and the database circuit breaker"""
+    caches = {'menu': menu_cache.stats(), 'blogs': blog_cache.stats(), 'assets': asset_cache.stats(),
+              'profiles': profile_cache.stats()}
+    hashing = password_hasher.stats()
+    breaker = db_connection.breaker.stats()
+    limiter = auth_limiter.stats()
+    lines = []
+    for field in ('hits', 'misses', 'evictions', 'entries'):
+        lines += metrics.gauge_lines(
+            f'cache_{field}', f'In-process cache {field}',
+            [({'cache': name}, stats[field]) for name, stats in caches.items()]
+        )
+    lines += metrics.gauge_lines('password_hash_count', 'Password hashes computed', [({}, hashing['count'])])
+    lines += metrics.gauge_lines('password_hash_rejected', 'Password hashes rejected at capacity', [({}, hashing['rejected'])])
+    lines += metrics.gauge_lines(
+        'password_hash_latency_ms', 'Recent password hash latency',
+        [({'quantile': q}, hashing[f'p{q}_ms']) for q in ('50', '95', '99')]
+    )
+    lines += metrics.gauge_lines('auth_rate_limited', 'Auth requests answered 429', [({}, limiter['rate_limited'])])
+    lines += metrics.gauge_lines('auth_rejected_busy', 'Auth requests answered 503 at capacity', [({}, limiter['rejected_busy'])])
+    lines += metrics.gauge_lines(
+        'db_circuit_open', 'Database circuit breaker open (1) or closed (0)',
+        [({}, 0 if breaker['state'] == 'closed' else 1)]
+    )
+    return lines
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics"""
+    return app.response_class(
+        metrics.render_metrics([_component_metrics]),
+        mimetype='text/plain; version=0.0.4'
+    )
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+@app.route('/assets/<path:filename>')
+def assets(filename):
+    """Serve CSS/JS from assets/, precompressed and ETagged"""
+    return asset_response(asset_cache, ASSETS_DIR, filename)
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Expose in-process cache hit/miss counters"""
+    return jsonify({
+        "success": True,
+        "menu_cache": menu_cache.stats(),
+        "blog_cache": blog_cache.stats(),
+        "asset_cache": asset_cache.stats(),
+        "profile_cache": profile_cache.stats(),
+        "sessions": app.session_interface.store.stats()
+        if isinstance(app.session_interface, sessions.ServerSessionInterface) else {"backend": "cookie"},
+        "menu_search": menu_search.stats(),
+        "batch": batch_runner.stats()
+    })
+
 @app.route('/api/menu', methods=['POST'])
 def add_menu_item():
     """Add a new menu item"""
@@ -217,9 +504,21 @@ def add_menu_item():
         
         # Get data from request
         data = request.get_json()
+        if data.get('name'):
+            data['slug'] = slugify(data['name'])
+        stamp(data, allocate_revisions(db))
         
-        # Insert the new item
-        result = menu_collection.insert_one(data)
+        # Insert the new item (slug is unique, see indexes.py)
+        try:
+            result = menu_collection.insert_one(data)
+        except DuplicateKeyError:
+            return jsonify({
+                "success": False,
+                "error": "A menu item with this name already exists"
+            }), 409
+        db_connection.note_write('menu')
+        menu_cache.invalidate()
+        menu_search.mark_stale()
         
         return jsonify({
             "success": True,
@@ -227,11 +526,41 @@ def add_menu_item():
             "id": str(result.inserted_id)
         }), 201
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@app.route('/api/menu/<item_id>', methods=['PUT', 'DELETE'])
+def menu_item(item_id):
+    """Update or delete one menu item (admin only)"""
+    if not session.get('is_admin'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    db = get_db()
+    if db is None or not ObjectId.is_valid(item_id):
+        return jsonify({'success': False, 'message': 'Menu item not found'}), 404
+    if request.method == 'PUT':
+        data = {k: v for k, v in (request.get_json() or {}).items()
+                if k not in ('_id', 'revision', 'updated_at')}
+        if data.get('name'):
+            data['slug'] = slugify(data['name'])
+        try:
+            result = db.menu_items.update_one(
+                {'_id': ObjectId(item_id)}, {'$set': stamp(data, allocate_revisions(db))}
+            )
+        except DuplicateKeyError:
+            return jsonify({'success': False, 'message': 'A menu item with this name already exists'}), 409
+        found = result.matched_count
+    else:
+        found = delete_items(db, {'_id': ObjectId(item_id)})
+    if not found:
+        return jsonify({'success': False, 'message': 'Menu item not found'}), 404
+    db_connection.note_write('menu')
+    menu_cache.invalidate()
+    menu_search.mark_stale()
+    return jsonify({'success': True})
+
 @app.route('/api/seed-menu', methods=['POST'])
 def seed_menu_data():
     """Seed the database with sample menu data"""
@@ -239,9 +568,6 @@ def seed_menu_data():
         db = get_db()
         menu_collection = db.menu_items
         
-        # Clear existing data
-        menu_collection.delete_many({})
-        
         # Sample menu data based on your website
         sample_data = [
             {
@@ -283,22 +609,80 @@ def seed_menu_data():
             }
         ]
         
-        # Insert sample data
-        result = menu_collection.insert_many(sample_data)
+        # Upsert sample data and drop everything else, without an empty-menu window
+        report = import_items(
+            menu_collection, (normalize_item(item) for item in sample_data), prune=True
+        )
+        db_connection.note_write('menu')
+        menu_cache.invalidate()
+        menu_search.mark_stale()
         
         return jsonify({
             "success": True,
-            "message": f"Successfully seeded {len(result.inserted_ids)} menu items",
-            "inserted_ids": [str(id) for id in result.inserted_ids]
+            "message": f"Successfully seeded {len(sample_data)} menu items",
+            "inserted_ids": report.pop("inserted_ids"),
+            "report": report
         })
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@app.route('/api/admin/menu/import', methods=['POST'])
+def import_menu():
+    """Bulk upsert menu items from an uploaded txt/CSV/JSON file or a JSON body"""
+    if not session.get('is_admin'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    db = get_db()
+    if db is None:
+        return jsonify({'success': False, 'message': 'Import unavailable in offline mode'}), 503
+    try:
+        options = {
+            'prune': request.args.get('prune') in ('1', 'true'),
+            'dry_run': request.args.get('dry_run') in ('1', 'true'),
+            'batch_size': max(1, min(int(request.args.get('batch_size', 500)), 5000))
+        }
+        upload = request.files.get('file')
+        if upload is not None:
+            # Parsed and upserted batch by batch as the upload is read
+            fmt = request.args.get('format') or format_for(upload.filename or '')
+            report = import_stream(db.menu_items, upload.stream, fmt, **options)
+        else:
+            body = request.get_json(silent=True)
+            records = body.get('items') if isinstance(body, dict) else body
+            if not isinstance(records, list):
+                return jsonify({'success': False, 'message': 'Expected a file or a list of items'}), 400
+            report = import_items(db.menu_items, (normalize_item(r) for r in records), **options)
+    except (MenuImportError, ValueError, KeyError, csv.Error) as e:
+        return jsonify({'success': False, 'message': f"Invalid import: {str(e)}"}), 400
+    except BulkWriteError as e:
+        # Batches already written stay; re-running the import finishes the job
+        db_connection.note_write('menu')
+        menu_cache.invalidate()
+        menu_search.mark_stale()
+        return jsonify({'success': False, 'message': "Import conflicted with a concurrent write, please retry",
+                        'errors': [error.get('errmsg') for error in e.details.get('writeErrors', [])[:10]]}), 409
+    if not options['dry_run'] and (report['inserted'] or report['updated'] or report['deleted']):
+        db_connection.note_write('menu')
+        menu_cache.invalidate()
+        menu_search.mark_stale()
+    report.pop('inserted_ids')
+    return jsonify({'success': True, 'report': report})
+
 # Authentication Routes
+def _server_busy():
+    """503 response telling the client to retry shortly"""
+    response = jsonify({
+        "success": False,
+        "message": "Server busy, please retry shortly"
+    })
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @app.route('/api/register', methods=['POST'])
+@rate_limited('register', auth_limiter)
 def register():
     """User registration endpoint"""
     try:
@@ -306,17 +690,22 @@ def register():
         result = user_auth.register_user(data)
         
         if result['success']:
+            bump(get_db(), 'users')
             return jsonify(result), 201
         else:
             return jsonify(result), 400
             
+    except HasherBusy:
+        return _server_busy()
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "message": f"Registration error: {str(e)}"
         }), 500
 
 @app.route('/api/login', methods=['POST'])
+@rate_limited('login', auth_limiter)
 def login():
     """User login endpoint"""
     try:
@@ -333,7 +722,8 @@ def login():
         result = user_auth.login_user(email, password)
         
         if result['success']:
-            # Store user info in session
+            # Store user info in a fresh session so a planted session id is never promoted
+            sessions.regenerate(session)
             session['user_id'] = result['user']['user_id']
             session['user_name'] = result['user']['name']
             session['logged_in'] = True
@@ -341,7 +731,10 @@ def login():
         else:
             return jsonify(result), 401
             
+    except HasherBusy:
+        return _server_busy()
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "message": f"Login error: {str(e)}"
@@ -362,6 +755,35 @@ def logout():
             "message": f"Logout error: {str(e)}"
         }), 500
 
+@app.route('/api/logout-all', methods=['POST'])
+def logout_all():
+    """Sign the current user out on every device"""
+    try:
+        if not session.get('logged_in'):
+            return jsonify({
+                "success": False,
+                "message": "Not logged in"
+            }), 401
+        if not isinstance(app.session_interface, sessions.ServerSessionInterface):
+            return jsonify({
+                "success": False,
+                "message": "Signing out everywhere needs SESSION_TYPE=memory or mongodb"
+            }), 501
+            
+        revoked = app.session_interface.store.revoke_user(session['user_id'])
+        session.clear()
+        return jsonify({
+            "success": True,
+            "message": "Logged out on all devices",
+            "revoked": revoked
+        }), 200
+    except Exception as e:
+        db_connection.record_error(e)
+        return jsonify({
+            "success": False,
+            "message": f"Logout error: {str(e)}"
+        }), 500
+
 @app.route('/api/profile')
 def get_profile():
     """Get current user profile"""
@@ -378,6 +800,7 @@ def get_profile():
         return jsonify(result), 200 if result['success'] else 404
         
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "message": f"Profile error: {str(e)}"
@@ -401,6 +824,7 @@ def update_profile():
         return jsonify(result), 200 if result['success'] else 400
         
     except Exception as e:
+        db_connection.record_error(e)
         return jsonify({
             "success": False,
             "message": f"Update error: {str(e)}"
@@ -442,5 +866,35 @@ def admin_login():
         return jsonify({'success': True})
     return jsonify({'success': False, 'message': 'Unauthorized'}), 401
 
+def warm_caches():
+    """Load the menu, categories, blog list and search index into this process"""
+    if get_db() is None:
+        return False
+    with app.app_context():
+        cached_payload(menu_cache, 'menu', _build_menu)
+        cached_payload(menu_cache, 'categories', _build_categories)
+        cached_payload(menu_cache, 'menu-grouped:0', _build_grouped_menu)
+        cached_payload(blog_cache, f"blogs:{BLOG_PAGE_SIZE}:*:", _build_blog_page)
+    menu_search.refresh(get_db(), get_db('menu'))
+    return True
+
+def shutdown():
+    """Release process resources before exit"""
+    user_auth.flush_pending()
+    password_hasher.shutdown()
+    batch_runner.shutdown()
+    db_connection.close_connection()
+
 if __name__ == '__main__':
+    if os.getenv('DB_ENSURE_INDEXES', '1') == '1' and get_db() is not None:
+        from indexes import ensure_indexes
+        try:
+            created = ensure_indexes(get_db())
+            print(f"Indexes ready (created: {', '.join(created) or 'none'})")
+        except Exception as e:
+            print(f"Index bootstrap failed: {str(e)}")
+        try:
+            print(f"Blog dates converted: {migrate_created_at(get_db().blogs)}")
+        except Exception as e:
+            print(f"Blog date migration failed: {str(e)}")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
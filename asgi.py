@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for Food Premi
+Serves the read-heavy routes (menu, categories, blogs, profile, auth status,
+health) from coroutines on an async MongoDB client, so a request waiting on
+Atlas holds no thread and one process can keep thousands of them in flight.
+The JSON contracts, caches and sessions are the Flask app's own. Every other
+route, and everything while the async client is offline, runs the Flask app
+in a thread pool, which also keeps password hashing off the event loop.
+
+Usage: uvicorn asgi:app --workers 4   (or: python asgi.py --port 5000)
+"""
+
+from app import app as flask_app, shutdown as flask_shutdown, BLOG_PAGE_SIZE, BLOG_PAGE_MAX, BLOG_LIST_FIELDS
+from database import CircuitBreaker, db_connection
+from auth import PROFILE_PROJECTION, profile_from_doc
+from hashing import password_hasher
+from cache import menu_cache, blog_cache, profile_cache
+from http_cache import CachedPayload
+from compression import COMPRESSIBLE, compress, negotiate
+from menu_changes import CHANGE_TIMES, settled_cutoff, settled_query
+from pagination import InvalidPageRequest, encode_cursor, keyset_filter, parse_fields, parse_limit
+from sessions import MongoSessionStore, ServerSessionInterface
+from flask.sessions import SecureCookieSessionInterface
+from itsdangerous import BadSignature
+from pymongo.errors import AutoReconnect, NotPrimaryError
+from pymongo.server_api import ServerApi
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+from bson import ObjectId
+from datetime import datetime
+import argparse
+import asyncio
+import inspect
+import io
+import metrics
+import os
+import re
+import sys
+import time
+
+try:
+    from pymongo import AsyncMongoClient  # pymongo >= 4.9
+except ImportError:
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient as AsyncMongoClient
+    except ImportError:  # Optional dependency; without it every route runs through Flask
+        AsyncMongoClient = None
+
+# Threads running Flask for the routes not served natively
+ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '16'))
+
+encode = flask_app.json.dumps_bytes
+
+
+class AsyncDatabase:
+    """Async counterpart of DatabaseConnection, sharing its URI, options and read routing"""
+
+    def __init__(self, sync=db_connection):
+        self._sync = sync
+        self.client = None
+        self.db = None
+        self._routed = {}
+        self._lock = asyncio.Lock()
+        self.breaker = CircuitBreaker(sync.breaker.base_delay, sync.breaker.max_delay)
+
+    async def get(self, workload=None):
+        """Database handle for workload, or None while offline"""
+        if self.db is None or self.breaker.state != CircuitBreaker.CLOSED:
+            if AsyncMongoClient is None or not self.breaker.allow_request():
+                return None
+            async with self._lock:
+                if self.db is None:
+                    await self._connect()
+                elif self.breaker.state != CircuitBreaker.CLOSED:
+                    await self._ping()
+            if self.db is None or self.breaker.state != CircuitBreaker.CLOSED:
+                return None
+        # Same routing as the sync client, including the primary pin after writes
+        read_preference = self._sync.read_preference_for(workload) if workload else None
+        if read_preference is None:
+            return self.db
+        routed = self._routed.get(workload)
+        if routed is None:
+            routed = self._routed[workload] = self.db.with_options(read_preference=read_preference)
+        return routed
+
+    async def _connect(self):
+        client = AsyncMongoClient(self._sync.uri, server_api=ServerApi('1'), **self._sync.client_options)
+        try:
+            await client.admin.command('ping')
+        except Exception as e:
+            print(f"Async connection failed: {str(e)}")
+            await _maybe_await(client.close())
+            print(f"Next async connection attempt in {self.breaker.record_failure():.1f}s")
+            return
+        self.client, self.db, self._routed = client, client['foodpremi'], {}
+        self.breaker.record_success()
+
+    async def _ping(self):
+        # The client survived an outage; check it before serving from it again
+        try:
+            await self.client.admin.command('ping')
+        except Exception as e:
+            print(f"Async database still unreachable: {str(e)}")
+            print(f"Next async connection attempt in {self.breaker.record_failure():.1f}s")
+            return
+        self.breaker.record_success()
+
+    def record_error(self, error):
+        """Open the circuit when a handler lost the database (see DatabaseConnection.record_error)"""
+        if isinstance(error, AutoReconnect) and not isinstance(error, NotPrimaryError) and self.db is not None:
+            self.breaker.trip()
+
+    def use_client(self, client, name='foodpremi'):
+        """Use an existing async client (e.g. a local mongod)"""
+        self.client, self.db, self._routed = client, client[name], {}
+        self.breaker.record_success()
+        return self.db
+
+    async def close(self):
+        if self.client is not None:
+            await _maybe_await(self.client.close())
+            self.client = self.db = None
+            self._routed = {}
+
+
+async def _maybe_await(result):
+    # motor's close() is synchronous, pymongo's AsyncMongoClient.close() is a coroutine
+    if inspect.isawaitable(result):
+        await result
+
+
+async_db = AsyncDatabase()
+wsgi_executor = ThreadPoolExecutor(max_workers=ASGI_WSGI_THREADS, thread_name_prefix='wsgi')
+
+
+class Request:
+    """The parts of an ASGI HTTP scope the handlers need"""
+
+    def __init__(self, scope, body):
+        self.scope = scope
+        self.method = scope['method']
+        self.path = scope['path']
+        self.body = body
+        self.headers = {}
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1')
+            value = value.decode('latin-1')
+            self.headers[name] = f"{self.headers[name]},{value}" if name in self.headers else value
+        self.args = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+        self.cookies = {}
+        for part in self.headers.get('cookie', '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name:
+                self.cookies.setdefault(name, value)
+
+
+class Fallback(Exception):
+    """Raised by a handler to let the Flask app answer the request instead"""
+
+
+def _json(data, status=200, headers=()):
+    return status, [('Content-Type', 'application/json')] + list(headers), encode(data)
+
+
+def _negotiate(request, size):
+    """compression.negotiate for this request's Accept-Encoding"""
+    return negotiate(size, request.headers.get('accept-encoding', ''))
+
+
+def _payload(request, payload):
+    """Cached payload response: precompressed variant, ETag and 304s as in http_cache"""
+    encoding = _negotiate(request, len(payload.body))
+    if encoding not in payload.variants:
+        encoding = None
+    etag = f'"{payload.etag}-{encoding}"' if encoding else f'"{payload.etag}"'
+    headers = [('ETag', etag), ('Cache-Control', 'no-cache'), ('Vary', 'Accept-Encoding')]
+    if etag in [tag.strip() for tag in request.headers.get('if-none-match', '').split(',')]:
+        return 304, headers, b''
+    if encoding:
+        headers.append(('Content-Encoding', encoding))
+    return 200, [('Content-Type', payload.mimetype)] + headers, payload.variants.get(encoding, payload.body)
+
+
+def _compressed(request, status, headers, body):
+    """What compression's after_request hook does to Flask responses"""
+    present = {name.lower(): value for name, value in headers}
+    mimetype = present.get('content-type', '').split(';', 1)[0].strip()
+    if status != 200 or 'content-encoding' in present or mimetype not in COMPRESSIBLE:
+        return status, headers, body
+    if 'vary' not in present:
+        headers.append(('Vary', 'Accept-Encoding'))
+    encoding = _negotiate(request, len(body))
+    if encoding is None:
+        return status, headers, body
+    return status, headers + [('Content-Encoding', encoding)], compress(body, encoding)
+
+
+async def _db(workload):
+    db = await async_db.get(workload)
+    if db is None:
+        # Offline: the Flask routes already know how to degrade
+        raise Fallback()
+    return db
+
+
+async def _cached(request, cache, key, build):
+    payload = await cache.get_or_load_async(key, lambda: _encoded(build))
+    return _payload(request, payload)
+
+
+async def _encoded(build):
+    return CachedPayload(encode(await build())).precompress()
+
+
+# --- Handlers (same JSON as the Flask routes of the same path) ---
+
+async def get_menu(request, category=None):
+    if request.args.get('stream'):
+        raise Fallback()
+    db = await _db('menu')
+    if category is not None:
+        category = category.lower()
+        known = await menu_cache.get_or_load_async(
+            'category-set', lambda: _category_set(db)
+        )
+
+    async def build():
+        # Revision from the primary, items from the 'menu' handle, as in app._build_menu
+        primary = await _db(None)
+        if category is None:
+            revision, items = await _read_snapshot(primary, db, {})
+            return {"success": True, "revision": revision, "count": len(items), "data": items}
+        revision, items = await _read_snapshot(primary, db, {"category": category})
+        return {"success": True, "category": category, "revision": revision, "count": len(items), "data": items}
+
+    if category is not None and category not in known:
+        # Same as the Flask route: unknown categories are answered but not cached
+        return _json(await build())
+    return await _cached(request, menu_cache, 'menu' if category is None else f'menu:{category}', build)
+
+
+async def _read_snapshot(primary, db, query):
+    """menu_changes.read_snapshot on the async client"""
+    session = async_db.client.start_session(causal_consistency=True)
+    if inspect.isawaitable(session):
+        # motor's start_session() is a coroutine, pymongo's async one is not
+        session = await session
+    async with session:
+        cutoff = settled_cutoff()
+        revisions = [0]
+        for name in CHANGE_TIMES:
+            doc = await primary[name].find_one(settled_query(name, cutoff), {'revision': 1},
+                                               sort=[('revision', -1)], session=session)
+            if doc:
+                revisions.append(doc['revision'])
+        items = await db.menu_items.find(query, session=session).to_list(None)
+    return max(revisions), items
+
+
+async def _category_set(db):
+    return frozenset(await db.menu_items.distinct("category"))
+
+
+async def get_categories(request):
+    db = await _db('menu')
+
+    async def build():
+        return {"success": True, "categories": await db.menu_items.distinct("category")}
+
+    return await _cached(request, menu_cache, 'categories', build)
+
+
+async def get_blogs(request):
+    if request.args.get('stream') or 'ndjson' in request.headers.get('accept', ''):
+        raise Fallback()
+    db = await _db('blogs')
+    try:
+        limit = parse_limit(request.args.get('limit'), BLOG_PAGE_SIZE, BLOG_PAGE_MAX)
+        projection = parse_fields(request.args.get('fields'))
+        if request.args.get('mode') == 'list':
+            projection = dict(BLOG_LIST_FIELDS, **(projection or {}))
+        cursor = request.args.get('cursor') or None
+        filters = keyset_filter('created_at', cursor)
+    except InvalidPageRequest as e:
+        return _json({'success': False, 'message': str(e)}, 400)
+
+    async def build():
+        fields = dict(projection, created_at=1) if projection is not None else None
+        posts = await db.blogs.find(filters, fields).sort(
+            [('created_at', -1), ('_id', -1)]
+        ).limit(limit + 1).to_list(None)
+        next_cursor = encode_cursor(posts[limit - 1], 'created_at') if len(posts) > limit else None
+        return {'success': True, 'data': posts[:limit], 'next_cursor': next_cursor}
+
+    key = f"blogs:{limit}:{sorted(projection) if projection else '*'}:{cursor or ''}"
+    return await _cached(request, blog_cache, key, build)
+
+
+async def get_blog(request, post_id):
+    db = await _db('blogs')
+    post = await db.blogs.find_one({'_id': ObjectId(post_id)}) if ObjectId.is_valid(post_id) else None
+    if not post:
+        return _json({'success': False, 'message': 'Post not found'}, 404)
+    return _json({'success': True, 'data': post})
+
+
+async def _session(request):
+    """Session data for the request, read the way the Flask app would"""
+    interface = flask_app.session_interface
+    value = request.cookies.get(interface.get_cookie_name(flask_app))
+    if not value:
+        return {}
+    if isinstance(interface, SecureCookieSessionInterface):
+        try:
+            return interface.get_signing_serializer(flask_app).loads(
+                value, max_age=int(flask_app.permanent_session_lifetime.total_seconds())
+            )
+        except BadSignature:
+            return {}
+    if isinstance(interface, ServerSessionInterface):
+        if isinstance(interface.store, MongoSessionStore):
+            db = await _db('auth')
+            doc = await db.sessions.find_one({'_id': value, 'expires_at': {'$gt': datetime.utcnow()}}, {'data': 1})
+            return doc['data'] if doc else {}
+        # In-process store: shared with the Flask fallback in this process
+        return interface.store.load(value) or {}
+    raise Fallback()
+
+
+async def auth_status(request):
+    session = await _session(request)
+    if session.get('logged_in'):
+        return _json({
+            "logged_in": True,
+            "user_id": session.get('user_id'),
+            "user_name": session.get('user_name'),
+            "is_admin": bool(session.get('is_admin'))
+        })
+    return _json({"logged_in": False})
+
+
+async def get_profile(request):
+    session = await _session(request)
+    if not session.get('logged_in'):
+        return _json({"success": False, "message": "Not logged in"}, 401)
+    user_id = str(session.get('user_id'))
+
+    async def load():
+        db = await _db('auth')
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, PROFILE_PROJECTION)
+        return profile_from_doc(user) if user else None
+
+    try:
+        user_info = await profile_cache.get_or_load_async(user_id, load)
+    except Fallback:
+        raise
+    except Exception as e:
+        return _json({"success": False, "message": f"Error fetching user: {str(e)}"}, 404)
+    if user_info is None:
+        return _json({"success": False, "message": "User not found"}, 404)
+    return _json({"success": True, "user": user_info})
+
+
+async def health(request):
+    db = await _db(None)
+    try:
+        await db.command('ping')
+    except Exception as e:
+        return _json({"status": "unhealthy", "database": "disconnected", "error": str(e)}, 500)
+    return _json({
+        "status": "healthy",
+        "database": "connected",
+        "password_hashing": password_hasher.stats(),
+        "timestamp": datetime.utcnow()
+    })
+
+
+# (method, path pattern, handler, Flask rule used as the metrics route label)
+ROUTES = [
+    ('GET', re.compile(r'^/api/menu$'), get_menu, '/api/menu'),
+    ('GET', re.compile(r'^/api/menu/(?!(?:grouped|changes|search)$)(?P<category>[^/]+)$'), get_menu,
+     '/api/menu/<category>'),
+    ('GET', re.compile(r'^/api/categories$'), get_categories, '/api/categories'),
+    ('GET', re.compile(r'^/api/blogs$'), get_blogs, '/api/blogs'),
+    ('GET', re.compile(r'^/api/blogs/(?P<post_id>[^/]+)$'), get_blog, '/api/blogs/<post_id>'),
+    ('GET', re.compile(r'^/api/auth-status$'), auth_status, '/api/auth-status'),
+    ('GET', re.compile(r'^/api/profile$'), get_profile, '/api/profile'),
+    ('GET', re.compile(r'^/health$'), health, '/health'),
+]
+
+
+# --- Flask fallback ---
+
+def _environ(request):
+    """WSGI environ for an ASGI request"""
+    scope = request.scope
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': request.path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(request.body),
+        # The body is already buffered, so its length is known even for chunked uploads
+        'CONTENT_LENGTH': str(len(request.body)),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in request.headers.items():
+        key = name.upper().replace('-', '_')
+        if key == 'CONTENT_LENGTH':
+            continue
+        if key != 'CONTENT_TYPE':
+            key = f'HTTP_{key}'
+        environ[key] = value
+    return environ
+
+
+def _run_wsgi(environ):
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    result = flask_app(environ, start_response)
+    try:
+        # Streamed responses are buffered here; serve ?stream=1 from gunicorn if that matters
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return started['status'], started['headers'], body
+
+
+async def _fallback(request):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(wsgi_executor, _run_wsgi, _environ(request))
+
+
+# --- ASGI application ---
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _native(request, handler, route, params):
+    """Run a handler with the Flask app's request metrics and compression; None to fall back"""
+    start = time.perf_counter()
+    metrics.REQUESTS_IN_FLIGHT.inc()
+    try:
+        try:
+            status, headers, body = await handler(request, **params)
+        except Fallback:
+            return None
+        except Exception as e:
+            async_db.record_error(e)
+            status, headers, body = _json({"success": False, "error": str(e)}, 500)
+    finally:
+        metrics.REQUESTS_IN_FLIGHT.dec()
+    # Mongo commands of async handlers are not attributed to the route
+    metrics.record_request(route, request.method, request.path, status, time.perf_counter() - start)
+    return _compressed(request, status, headers, body)
+
+
+async def _dispatch(request):
+    for method, pattern, handler, route in ROUTES:
+        match = pattern.match(request.path)
+        if match and request.method == method:
+            response = await _native(request, handler, route, match.groupdict())
+            if response is None:
+                break
+            status, headers, body = response
+            if 'origin' in request.headers:
+                # What flask-cors adds to every Flask response
+                headers.append(('Access-Control-Allow-Origin', '*'))
+            return status, headers, body
+    return await _fallback(request)
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await async_db.close()
+            wsgi_executor.shutdown(wait=True)
+            flask_shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """The ASGI application"""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    request = Request(scope, await _read_body(receive))
+    status, headers, body = await _dispatch(request)
+    headers = [(k, v) for k, v in headers if k.lower() != 'content-length']
+    headers.append(('Content-Length', str(len(body))))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(k.lower().encode('latin-1'), str(v).encode('latin-1')) for k, v in headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Food Premi under uvicorn (async mode)")
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '5000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', '1')))
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is not installed: pip install uvicorn")
+    if AsyncMongoClient is None:
+        print("No async Mongo driver (motor or pymongo>=4.9) installed; all routes will run through Flask")
+    uvicorn.run('asgi:app', host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
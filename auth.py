@@ -3,20 +3,172 @@ User Authentication Module for Food Premi
 Handles user registration, login, and session management
 """
 
-from database import get_db
-from werkzeug.security import generate_password_hash, check_password_hash
+from database import db_connection, get_db
+from hashing import HasherBusy, password_hasher
+from cache import profile_cache
+from indexes import has_unique_index
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.write_concern import WriteConcern
 from bson import ObjectId
 from datetime import datetime
+import atexit
+import os
 import re
+import threading
+
+# Fields login needs; everything else stays on the server
+LOGIN_PROJECTION = {
+    "password": 1, "name": 1, "email": 1, "phone": 1, "address": 1,
+    "order_count": 1, "total_spent": 1, "created_at": 1, "is_active": 1
+}
+
+# Fields a profile read needs; the password hash never leaves the database
+PROFILE_PROJECTION = {
+    "name": 1, "email": 1, "phone": 1, "address": 1,
+    "order_count": 1, "total_spent": 1, "created_at": 1, "last_login": 1
+}
+
+def profile_from_doc(user):
+    """Public profile fields of a user document (never the password hash)"""
+    return {
+        "user_id": str(user['_id']),
+        "name": user['name'],
+        "email": user['email'],
+        "phone": user['phone'],
+        "address": user.get('address', ''),
+        "order_count": user.get('order_count', 0),
+        "total_spent": user.get('total_spent', 0.0),
+        "created_at": user['created_at'],
+        "last_login": user.get('last_login')
+    }
+
+class LastLoginBuffer:
+    """Buffers last_login timestamps and flushes them as one unordered bulk write"""
+    
+    def __init__(self, interval=5.0, max_pending=1000):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.flushed = 0
+        
+    def record(self, user_id, timestamp):
+        """Queue a last_login update, keeping only the latest per user"""
+        with self._lock:
+            self._pending[user_id] = timestamp
+            full = len(self._pending) >= self.max_pending
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+            
+    def flush(self):
+        """Write all pending timestamps in a single bulk_write"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        db = get_db('auth')
+        if db is None:
+            # Offline: keep the updates for the next flush
+            self._requeue(pending)
+            return 0
+        try:
+            db.users.bulk_write(
+                [UpdateOne({"_id": user_id}, {"$set": {"last_login": timestamp}})
+                 for user_id, timestamp in pending.items()],
+                ordered=False
+            )
+        except Exception:
+            # Not written (or not known to be): requeue, newer logins win
+            self._requeue(pending)
+            raise
+        # Only now is the stored last_login current; a profile cached before
+        # this point would keep the old one
+        for user_id in pending:
+            profile_cache.invalidate(str(user_id))
+        self.flushed += len(pending)
+        return len(pending)
+        
+    def _requeue(self, pending):
+        """Put unwritten timestamps back unless a newer one was recorded meanwhile"""
+        with self._lock:
+            for user_id, timestamp in pending.items():
+                self._pending.setdefault(user_id, timestamp)
+        
+    def _ensure_thread(self):
+        """Start the flush thread in this process if it is not running"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='last-login-flush', daemon=True
+            )
+            self._thread.start()
+            
+    def _run(self):
+        """Flush loop; wakes early when the buffer fills up"""
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"last_login flush failed: {str(e)}")
 
 class UserAuth:
     def __init__(self):
-        self.db = get_db()
-        if self.db is not None:
-            self.users_collection = self.db.users
-        else:
-            self.users_collection = None
-            print("Warning: Authentication running in offline mode")
+        # Resolved lazily so importing this module never touches the network
+        self._db = None
+        self._users_collection = None
+        # Whether the email_unique index exists (see register_user)
+        self._email_unique = None
+        
+        # How last_login is written on login:
+        #   combined       - stamped by the lookup itself (find_one_and_update,
+        #                    one round-trip, the default); undone if the
+        #                    password turns out to be wrong
+        #   sync           - acknowledged update after the lookup (second round-trip)
+        #   unacknowledged - fire-and-forget update (w=0, no wait, may be lost)
+        #   write_behind   - buffered and flushed periodically in bulk
+        self.last_login_mode = os.getenv('LAST_LOGIN_MODE', 'combined')
+        self.last_login_buffer = LastLoginBuffer(
+            interval=float(os.getenv('LAST_LOGIN_FLUSH_INTERVAL', '5')),
+            max_pending=int(os.getenv('LAST_LOGIN_MAX_PENDING', '1000'))
+        )
+        
+    @property
+    def users_collection(self):
+        """Users collection, or None while the database is offline"""
+        db = get_db('auth')
+        if db is None:
+            return None
+        if db is not self._db:
+            # First use, or the connection was re-established
+            self._db = db
+            self._users_collection = db.users
+            self._email_unique = None
+        return self._users_collection
+        
+    def email_is_unique(self, users):
+        """True once the email_unique index is known to exist on users
+        
+        It is created by server.py, `python app.py` and indexes.py, but not
+        by asgi.py, `flask run` or with DB_ENSURE_INDEXES=0. Checked once per
+        connection.
+        """
+        if self._email_unique is None:
+            self._email_unique = has_unique_index(users, 'email')
+            if not self._email_unique:
+                print("Warning: users.email_unique index missing, run indexes.py; "
+                      "registration falls back to a racy pre-check")
+        return self._email_unique
         
     def validate_email(self, email):
         """Validate email format"""
@@ -31,15 +183,17 @@ class UserAuth:
         
     def user_exists(self, email):
         """Check if user already exists"""
-        if self.users_collection is None:
+        users = self.users_collection
+        if users is None:
             return False  # In offline mode, assume user doesn't exist
-        return self.users_collection.find_one({"email": email}) is not None
+        return users.find_one({"email": email}) is not None
         
     def register_user(self, user_data):
         """Register a new user"""
         try:
             # Check if database is available
-            if self.users_collection is None:
+            users = self.users_collection
+            if users is None:
                 return {"success": False, "message": "Registration unavailable in offline mode"}
             
             # Validate required fields
@@ -56,16 +210,12 @@ class UserAuth:
             if not self.validate_phone(user_data['phone']):
                 return {"success": False, "message": "Invalid phone number format"}
                 
-            # Check if user already exists
-            if self.user_exists(user_data['email']):
-                return {"success": False, "message": "User already exists with this email"}
-                
             # Validate password strength
             if len(user_data['password']) < 6:
                 return {"success": False, "message": "Password must be at least 6 characters long"}
                 
-            # Hash password
-            hashed_password = generate_password_hash(user_data['password'])
+            # Hash password (in the bounded hashing pool)
+            hashed_password = password_hasher.hash(user_data['password'])
             
             # Create user document
             user_doc = {
@@ -81,8 +231,15 @@ class UserAuth:
                 "total_spent": 0.0
             }
             
-            # Insert user into database
-            result = self.users_collection.insert_one(user_doc)
+            # Without the unique index nothing else stops a duplicate account
+            if not self.email_is_unique(users) and users.find_one({"email": user_doc['email']}, {"_id": 1}):
+                return {"success": False, "message": "User already exists with this email"}
+            
+            # Insert user into database; the unique email index rejects duplicates
+            try:
+                result = users.insert_one(user_doc)
+            except DuplicateKeyError:
+                return {"success": False, "message": "User already exists with this email"}
             
             return {
                 "success": True, 
@@ -90,35 +247,54 @@ class UserAuth:
                 "user_id": str(result.inserted_id)
             }
             
+        except HasherBusy:
+            raise
         except Exception as e:
+            db_connection.record_error(e)
             return {"success": False, "message": f"Registration failed: {str(e)}"}
             
     def login_user(self, email, password):
         """Authenticate user login"""
         try:
             # Check if database is available
-            if self.users_collection is None:
+            users = self.users_collection
+            if users is None:
                 return {"success": False, "message": "Login unavailable in offline mode"}
             
-            # Find user by email
-            user = self.users_collection.find_one({"email": email.lower().strip()})
+            # Find user by email, stamping last_login in combined mode (the only
+            # round-trip the caller waits on). BSON dates keep milliseconds, so
+            # truncate for undo_login_stamp to match the stored value
+            now = datetime.utcnow()
+            now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+            user = self.find_for_login(users, email.lower().strip(), now)
             
             if not user:
                 return {"success": False, "message": "Invalid email or password"}
                 
             # Check if account is active
             if not user.get('is_active', True):
+                self.undo_login_stamp(users, user, now)
                 return {"success": False, "message": "Account is deactivated"}
                 
-            # Verify password
-            if not check_password_hash(user['password'], password):
+            # Verify password (in the bounded hashing pool)
+            try:
+                verified = password_hasher.verify(user['password'], password)
+            except Exception:
+                self.undo_login_stamp(users, user, now)
+                raise
+            if not verified:
+                self.undo_login_stamp(users, user, now)
                 return {"success": False, "message": "Invalid email or password"}
                 
-            # Update last login
-            self.users_collection.update_one(
-                {"_id": user['_id']},
-                {"$set": {"last_login": datetime.utcnow()}}
-            )
+            # Upgrade hashes made with an outdated method or cost
+            if password_hasher.needs_rehash(user['password']):
+                users.update_one(
+                    {"_id": user['_id']},
+                    {"$set": {"password": password_hasher.hash(password)}}
+                )
+                
+            # Update last login (the combined lookup already did)
+            self.record_login(users, user['_id'], now)
             
             # Return user info (excluding password)
             user_info = {
@@ -138,43 +314,84 @@ class UserAuth:
                 "user": user_info
             }
             
+        except HasherBusy:
+            raise
         except Exception as e:
+            db_connection.record_error(e)
             return {"success": False, "message": f"Login failed: {str(e)}"}
             
+    def find_for_login(self, users, email, timestamp):
+        """Look up a user for login; in combined mode, stamp last_login in the same round-trip"""
+        if self.last_login_mode != 'combined':
+            return users.find_one({"email": email}, LOGIN_PROJECTION)
+        # The document from before the update, so undo_login_stamp can restore it
+        return users.find_one_and_update(
+            {"email": email},
+            {"$set": {"last_login": timestamp}},
+            projection=dict(LOGIN_PROJECTION, last_login=1),
+            return_document=ReturnDocument.BEFORE
+        )
+        
+    def undo_login_stamp(self, users, user, timestamp):
+        """Restore last_login after a combined lookup whose login failed"""
+        if self.last_login_mode != 'combined':
+            return
+        # Unless a successful login stamped it again meanwhile
+        users.update_one(
+            {"_id": user['_id'], "last_login": timestamp},
+            {"$set": {"last_login": user.get('last_login')}}
+        )
+        
+    def record_login(self, users, user_id, timestamp):
+        """Write last_login according to the configured mode"""
+        if self.last_login_mode == 'write_behind':
+            # The flush drops the cached profile once the write is done
+            self.last_login_buffer.record(user_id, timestamp)
+            return
+        if self.last_login_mode == 'unacknowledged':
+            users = users.with_options(write_concern=WriteConcern(w=0))
+        if self.last_login_mode != 'combined':
+            users.update_one({"_id": user_id}, {"$set": {"last_login": timestamp}})
+        # Drop the cached profile the write made stale
+        profile_cache.invalidate(str(user_id))
+        
+    def flush_pending(self):
+        """Flush buffered last_login updates (called on shutdown)"""
+        try:
+            self.last_login_buffer.flush()
+        except Exception as e:
+            print(f"last_login flush failed: {str(e)}")
+            
     def get_user_by_id(self, user_id):
         """Get user information by ID"""
         try:
             # Check if database is available
-            if self.users_collection is None:
+            users = self.users_collection
+            if users is None:
                 return {"success": False, "message": "User data unavailable in offline mode"}
             
-            user = self.users_collection.find_one({"_id": ObjectId(user_id)})
-            if not user:
+            def load():
+                user = users.find_one({"_id": ObjectId(user_id)}, PROFILE_PROJECTION)
+                return profile_from_doc(user) if user else None
+            
+            # Served from the per-process profile cache when warm
+            user_info = profile_cache.get_or_load(str(user_id), load)
+            if user_info is None:
                 return {"success": False, "message": "User not found"}
-                
-            # Return user info (excluding password)
-            user_info = {
-                "user_id": str(user['_id']),
-                "name": user['name'],
-                "email": user['email'],
-                "phone": user['phone'],
-                "address": user.get('address', ''),
-                "order_count": user.get('order_count', 0),
-                "total_spent": user.get('total_spent', 0.0),
-                "created_at": user['created_at'],
-                "last_login": user.get('last_login')
-            }
             
-            return {"success": True, "user": user_info}
+            # Copy so callers cannot modify the cached entry
+            return {"success": True, "user": dict(user_info)}
             
         except Exception as e:
+            db_connection.record_error(e)
             return {"success": False, "message": f"Error fetching user: {str(e)}"}
             
     def update_user_profile(self, user_id, update_data):
         """Update user profile information"""
         try:
             # Check if database is available
-            if self.users_collection is None:
+            users = self.users_collection
+            if users is None:
                 return {"success": False, "message": "Profile update unavailable in offline mode"}
             
             # Remove sensitive fields that shouldn't be updated directly
@@ -187,10 +404,11 @@ class UserAuth:
                 return {"success": False, "message": "Invalid phone number format"}
                 
             # Update user document
-            result = self.users_collection.update_one(
+            result = users.update_one(
                 {"_id": ObjectId(user_id)},
                 {"$set": update_data}
             )
+            profile_cache.invalidate(str(user_id))
             
             if result.modified_count > 0:
                 return {"success": True, "message": "Profile updated successfully"}
@@ -198,7 +416,11 @@ class UserAuth:
                 return {"success": False, "message": "No changes made"}
                 
         except Exception as e:
+            db_connection.record_error(e)
             return {"success": False, "message": f"Update failed: {str(e)}"}
 
 # Global auth instance
-user_auth = UserAuth()
\ No newline at end of file
+user_auth = UserAuth()
+
+# Flush buffered writes when the process exits
+atexit.register(user_auth.flush_pending)
\ No newline at end of file
@@ -0,0 +1,153 @@
+"""
+Batched reads for Food Premi
+/api/batch runs several read endpoints in one HTTP request, so a page can
+bootstrap (auth status, menu, summary, ...) in a single round trip. The
+sub-requests are dispatched through the app's own routes, concurrently on a
+small thread pool, so their Mongo queries overlap; each keeps its route's
+JSON, status code and caching. Sub-response bodies are spliced into the
+combined response as already-encoded bytes
+"""
+
+from flask import jsonify, request, session
+from flask.ctx import RequestContext
+from werkzeug.test import EnvironBuilder
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlencode
+import json
+import os
+import re
+
+# Sub-requests allowed per batch, and threads running them (shared by all batches)
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '10'))
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '8'))
+
+# Readable names -> GET routes; only these can be batched
+BATCH_ROUTES = {
+    'auth-status': '/api/auth-status',
+    'profile': '/api/profile',
+    'menu': '/api/menu',
+    'menu-grouped': '/api/menu/grouped',
+    'categories': '/api/categories',
+    'blogs': '/api/blogs',
+    'summary': '/api/admin/summary',
+}
+
+# What params.category may be; anything else could reach another /api/menu/... route
+CATEGORY_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$', re.IGNORECASE)
+MENU_SUBROUTES = {'grouped', 'changes', 'search'}
+
+# Parent headers not forwarded: sub-responses must be full, uncompressed JSON
+SKIPPED_HEADERS = {
+    'accept-encoding', 'if-none-match', 'if-modified-since', 'range',
+    'content-type', 'content-length', 'accept'
+}
+
+
+class InvalidBatchRequest(ValueError):
+    """Raised for a malformed or oversized batch"""
+
+
+def parse_batch(specs):
+    """Validate sub-request specs; return [(key, path, query string)]
+
+    A spec is a route name ('menu') or an object
+    {"name": "blogs", "params": {"mode": "list"}, "key": "posts"}; key names
+    the result and defaults to name. params.category selects /api/menu/<category>.
+    """
+    if not isinstance(specs, list) or not specs:
+        raise InvalidBatchRequest("requests must be a non-empty list")
+    if len(specs) > BATCH_MAX_REQUESTS:
+        raise InvalidBatchRequest(f"At most {BATCH_MAX_REQUESTS} requests per batch")
+    parsed, keys = [], set()
+    for spec in specs:
+        if isinstance(spec, str):
+            spec = {'name': spec}
+        if not isinstance(spec, dict) or spec.get('name') not in BATCH_ROUTES:
+            raise InvalidBatchRequest(f"Unknown request: {spec!r}; expected one of {sorted(BATCH_ROUTES)}")
+        params = dict(spec.get('params') or {})
+        if 'stream' in params:
+            raise InvalidBatchRequest("Streaming responses cannot be batched")
+        key = str(spec.get('key') or spec['name'])
+        if key in keys:
+            raise InvalidBatchRequest(f"Duplicate key: {key}; set a distinct 'key' per request")
+        keys.add(key)
+        path = BATCH_ROUTES[spec['name']]
+        category = params.pop('category', None)
+        if category and spec['name'] == 'menu':
+            category = str(category)
+            if not CATEGORY_PATTERN.match(category) or category.lower() in MENU_SUBROUTES:
+                raise InvalidBatchRequest(f"Invalid category: {category!r}")
+            path = f"{path}/{quote(category, safe='')}"
+        parsed.append((key, path, urlencode(params)))
+    return parsed
+
+
+def _dispatch(app, path, query_string, headers, environ_base, shared_session):
+    """Run one GET through the app's routes; return (status, JSON bytes)"""
+    builder = EnvironBuilder(path=path, query_string=query_string, headers=headers, environ_base=environ_base)
+    ctx = RequestContext(app, builder.get_environ(), session=shared_session)
+    ctx.push()
+    error = None
+    try:
+        response = app.full_dispatch_request()
+        body = response.get_data()
+        if response.mimetype != 'application/json':
+            return 500, app.json.dumps_bytes({"success": False, "error": "Non-JSON response"})
+        return response.status_code, body
+    except Exception as e:
+        error = e
+        return 500, app.json.dumps_bytes({"success": False, "error": str(e)})
+    finally:
+        ctx.pop(error)
+
+
+class BatchRunner:
+    """Runs the sub-requests of a batch on a shared thread pool"""
+
+    def __init__(self, workers=BATCH_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+        self.batches = 0
+        self.requests = 0
+
+    def run(self, app, specs):
+        """Combined response body (bytes) for validated specs"""
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in SKIPPED_HEADERS]
+        environ_base = {'REMOTE_ADDR': request.remote_addr or ''}
+        # Load the session once here; sub-requests read the same object
+        shared_session = session._get_current_object()
+        shared_session.get('logged_in')
+        futures = [
+            (key, self._pool.submit(_dispatch, app, path, query, headers, environ_base, shared_session))
+            for key, path, query in specs
+        ]
+        parts = []
+        for key, future in futures:
+            status, body = future.result()
+            parts.append(json.dumps(key).encode() + b':{"status":' + str(status).encode() + b',"body":' + body + b'}')
+        self.batches += 1
+        self.requests += len(specs)
+        return b'{"success":true,"responses":{' + b','.join(parts) + b'}}'
+
+    def stats(self):
+        return {'batches': self.batches, 'requests': self.requests}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+def batch_response(app, runner):
+    """Flask response for the current /api/batch request"""
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        specs = body.get('requests') if isinstance(body, dict) else None
+    else:
+        # GET /api/batch?requests=auth-status,summary
+        specs = [name.strip() for name in request.args.get('requests', '').split(',') if name.strip()]
+    try:
+        specs = parse_batch(specs)
+    except InvalidBatchRequest as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    response = app.response_class(runner.run(app, specs), mimetype='application/json')
+    # Per-user data: never shared or revalidated by caches
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compression benchmark for Food Premi
+For the menu, category and blog list payloads and every file under assets/,
+reports bytes on the wire with gzip/brotli and the CPU each request would
+spend compressing on the fly, which precompressed cached payloads avoid
+
+Usage: python bench_compression.py [--items 83] [--number 50]
+"""
+
+from flask import Flask
+from json_provider import FastJSONProvider
+from compression import brotli, compress
+from bench_json import build_menu
+from datetime import datetime, timedelta
+import argparse
+import os
+import timeit
+
+
+def build_payloads(app, items):
+    """JSON bodies shaped like /api/menu, /api/categories and /api/blogs"""
+    encode = FastJSONProvider(app).dumps_bytes
+    menu = build_menu(items)
+    categories = sorted({item['category'] for item in menu['data']})
+    start = datetime(2025, 1, 1)
+    blogs = [{
+        "_id": f"{i:024x}", "title": f"Healthy eating tip #{i}", "category": "nutrition",
+        "image": "https://i.pinimg.com/474x/9b/6e/25/9b6e2552f72dadab5423814c1173b458.jpg",
+        "excerpt": "Small changes that add up.", "content": "Lorem ipsum dolor sit amet. " * 40,
+        "created_at": start + timedelta(days=i)
+    } for i in range(20)]
+    return {
+        "api/menu": encode(menu),
+        "api/categories": encode({"success": True, "categories": categories}),
+        "api/blogs": encode({"success": True, "data": blogs, "next_cursor": None})
+    }
+
+
+def asset_payloads():
+    """Bytes of every file under assets/"""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+    payloads = {}
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                payloads[os.path.relpath(path, os.path.dirname(root))] = f.read()
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response compression")
+    parser.add_argument('--items', type=int, default=83, help="menu size (menu_items.txt has 83)")
+    parser.add_argument('--number', type=int, default=50, help="timing runs per payload")
+    args = parser.parse_args()
+
+    payloads = build_payloads(Flask(__name__), args.items)
+    payloads.update(asset_payloads())
+    encodings = ['gzip', 'br'] if brotli is not None else ['gzip']
+    if brotli is None:
+        print("brotli not installed, gzip only")
+
+    print(f"{'payload':<24}{'raw':>9}" + ''.join(
+        f"{enc + ' bytes':>12}{'ratio':>7}{'ms/req':>9}{'ms once':>9}" for enc in encodings))
+    print("-" * (33 + 37 * len(encodings)))
+    totals = {enc: [0, 0, 0.0] for enc in encodings}
+    raw_total = 0
+    for name, body in payloads.items():
+        raw_total += len(body)
+        row = f"{name:<24}{len(body):>9}"
+        for enc in encodings:
+            size = len(compress(body, enc))
+            # Per-request cost of compressing on the fly vs the one-off precompression
+            per_request = timeit.timeit(lambda: compress(body, enc), number=args.number) / args.number
+            once = timeit.timeit(lambda: compress(body, enc, precompress=True), number=3) / 3
+            precompressed = len(compress(body, enc, precompress=True))
+            totals[enc][0] += size
+            totals[enc][1] += precompressed
+            totals[enc][2] += per_request
+            row += f"{precompressed:>12}{precompressed / len(body):>7.2f}{per_request * 1000:>9.3f}{once * 1000:>9.3f}"
+        print(row)
+
+    print("-" * (33 + 37 * len(encodings)))
+    for enc, (size, precompressed, per_request) in totals.items():
+        print(f"{enc}: {raw_total} -> {precompressed} bytes per full page load "
+              f"({1 - precompressed / raw_total:.0%} saved); precompressing saves "
+              f"{per_request * 1000:.3f} ms CPU per load vs compressing each request "
+              f"(on-the-fly output would be {size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark for Food Premi
+Runs the Flask app against a local MongoDB stand-in (mongomock by default,
+or a local mongod via --mongo-uri), seeds it with configurable data sizes,
+drives the main endpoints at fixed concurrency levels and reports
+throughput and p50/p95/p99 latency as JSON
+
+Usage:
+    python bench_endpoints.py --menu-items 500 --users 200 --blogs 1000 \\
+        --concurrency 1,8,32 --duration 5 --output run.json
+    python bench_endpoints.py --compare baseline.json --output run.json
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from menu_import import guess_category, slugify
+from datetime import datetime, timedelta
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+
+# Every scenario drives one endpoint; login/register exercise the hash pool
+SCENARIOS = ['menu', 'menu_category', 'categories', 'login', 'register', 'blogs']
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def seed(db, menu_items, users, blogs, password_hash):
+    """Seed menu_items (scaled from menu_items.txt), users and blogs"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    with open(os.path.join(root, 'menu_items.txt')) as f:
+        names = [line.strip() for line in f if line.strip()]
+
+    for name in ('menu_items', 'users', 'blogs'):
+        db[name].delete_many({})
+
+    menu_names = [names[i % len(names)] + (f" #{i // len(names)}" if i >= len(names) else '')
+                  for i in range(menu_items)]
+    db.menu_items.insert_many([{
+        "category": guess_category(names[i % len(names)]),
+        "name": menu_names[i],
+        "slug": slugify(menu_names[i]),
+        "description": "Freshly prepared with seasonal ingredients",
+        "image": "https://i.pinimg.com/474x/6b/79/d8/6b79d80d88b53a717843b891f7415d67.jpg",
+        "prices": [{"size": "Small", "price": 60 + i % 40}, {"size": "Large", "price": 100 + i % 40}],
+        "badges": ["Popular"] if i % 3 == 0 else [],
+        "is_available": True
+    } for i in range(menu_items)])
+
+    if users:
+        # One precomputed hash keeps seeding fast; login still verifies it
+        now = datetime.utcnow()
+        db.users.insert_many([{
+            "name": f"Bench User {i}", "email": f"user{i}@bench.test", "password": password_hash,
+            "phone": "9876543210", "address": "", "created_at": now, "last_login": None,
+            "is_active": True, "order_count": 0, "total_spent": 0.0
+        } for i in range(users)])
+
+    start = datetime(2025, 1, 1)
+    if blogs:
+        db.blogs.insert_many([{
+            "title": f"Healthy eating tip #{i}", "category": "nutrition", "image": "",
+            "excerpt": "Small changes that add up.", "content": "Lorem ipsum " * 200,
+            "created_at": start + timedelta(minutes=i)
+        } for i in range(blogs)])
+
+
+def make_request(scenario, client, state):
+    """Issue one request for scenario and return its status code"""
+    if scenario == 'menu':
+        return client.get('/api/menu').status_code
+    if scenario == 'menu_category':
+        return client.get(f"/api/menu/{random.choice(state['categories'])}").status_code
+    if scenario == 'categories':
+        return client.get('/api/categories').status_code
+    if scenario == 'blogs':
+        return client.get('/api/blogs').status_code
+    if scenario == 'login':
+        email = f"user{random.randrange(state['users'])}@bench.test"
+        return client.post('/api/login', json={'email': email, 'password': BENCH_PASSWORD}).status_code
+    if scenario == 'register':
+        n = next(state['register_ids'])
+        return client.post('/api/register', json={
+            'name': 'New User', 'email': f"new{n}-{state['run_id']}@bench.test",
+            'password': BENCH_PASSWORD, 'phone': '9876543210'
+        }).status_code
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def run_scenario(app, scenario, concurrency, duration, state):
+    """Drive one scenario at a fixed concurrency for `duration` seconds"""
+    deadline = time.perf_counter() + duration
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        local_latencies, local_statuses = [], {}
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = make_request(scenario, client, state)
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Print p95/throughput deltas against a previous run; return True on regression"""
+    with open(baseline_path) as f:
+        baseline = {(r['scenario'], r['concurrency']): r for r in json.load(f)['results']}
+    regressed = False
+    print(f"{'scenario':<15}{'conc':>5}{'p95 ms':>12}{'delta':>9}{'rps':>10}{'delta':>9}", file=sys.stderr)
+    for result in results:
+        before = baseline.get((result['scenario'], result['concurrency']))
+        if before is None:
+            continue
+        p95_delta = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+        rps_delta = (result['throughput_rps'] - before['throughput_rps']) / before['throughput_rps'] \
+            if before['throughput_rps'] else 0.0
+        flag = ''
+        if p95_delta > threshold or rps_delta < -threshold:
+            regressed = True
+            flag = '  REGRESSION'
+        print(f"{result['scenario']:<15}{result['concurrency']:>5}{result['p95_ms']:>12.3f}"
+              f"{p95_delta:>+9.1%}{result['throughput_rps']:>10.1f}{rps_delta:>+9.1%}{flag}", file=sys.stderr)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Food Premi endpoints against a local Mongo stand-in")
+    parser.add_argument('--mongo-uri', help="local mongod URI (default: in-process mongomock)")
+    parser.add_argument('--menu-items', type=int, default=500)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--blogs', type=int, default=1000)
+    parser.add_argument('--concurrency', default='1,8,32', help="comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per scenario and level")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+    parser.add_argument('--compare', help="previous JSON report to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed regression ratio")
+    args = parser.parse_args()
+
+    # Every request comes from one address; measure the server, not the auth rate limits
+    for name in ('AUTH_RATE_LIMIT_IP', 'AUTH_RATE_LIMIT_EMAIL', 'AUTH_MAX_CONCURRENCY'):
+        os.environ.setdefault(name, '0')
+    random.seed(args.seed)
+    from database import db_connection
+    from indexes import ensure_indexes
+    from werkzeug.security import generate_password_hash
+    from hashing import password_hasher
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+        backend = 'mongod'
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+        backend = 'mongomock'
+    db = db_connection.use_client(client, name=os.getenv('BENCH_DB_NAME', 'foodpremi_bench'))
+    ensure_indexes(db)
+    seed(db, args.menu_items, args.users, args.blogs,
+         generate_password_hash(BENCH_PASSWORD, password_hasher.method, password_hasher.salt_length))
+
+    from app import app, shutdown
+    state = {
+        "users": max(1, args.users),
+        "categories": sorted(db.menu_items.distinct('category')) or ['meals'],
+        "register_ids": itertools.count(),
+        "run_id": int(time.time())
+    }
+
+    results = []
+    try:
+        for scenario in [s.strip() for s in args.scenarios.split(',') if s.strip()]:
+            for concurrency in [int(c) for c in args.concurrency.split(',')]:
+                result = run_scenario(app, scenario, concurrency, args.duration, state)
+                results.append(result)
+                print(f"{scenario:<15} c={concurrency:<4} {result['throughput_rps']:>9.1f} rps  "
+                      f"p50 {result['p50_ms']:.2f}ms  p95 {result['p95_ms']:.2f}ms  "
+                      f"p99 {result['p99_ms']:.2f}ms  errors {result['errors']}", file=sys.stderr)
+    finally:
+        shutdown()
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat() + 'Z',
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "backend": backend
+        },
+        "config": {
+            "menu_items": args.menu_items, "users": args.users, "blogs": args.blogs,
+            "duration": args.duration, "seed": args.seed,
+            "hash_method": password_hasher.method
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
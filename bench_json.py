@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for Food Premi JSON encoding
+Compares encode throughput of Flask's default provider against
+FastJSONProvider (orjson and stdlib backends) on a 1k-item menu
+
+Usage: python bench_json.py [--items 1000] [--repeat 5] [--number 20]
+"""
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from json_provider import FastJSONProvider, encode_default, orjson
+from bson import ObjectId
+from datetime import datetime, timedelta
+import argparse
+import os
+import timeit
+
+
+def build_menu(size):
+    """Build a menu of `size` items shaped like the menu_items collection"""
+    menu_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'menu_items.txt')
+    with open(menu_file) as f:
+        names = [line.strip() for line in f if line.strip()]
+    created = datetime(2025, 1, 16, 12, 0, 0)
+    items = []
+    for i in range(size):
+        items.append({
+            "_id": ObjectId(),
+            "category": ["sandwiches", "sprouts", "drinks", "salads", "shakes"][i % 5],
+            "name": f"{names[i % len(names)]} #{i}",
+            "description": "Freshly prepared with seasonal ingredients",
+            "image": "https://i.pinimg.com/474x/6b/79/d8/6b79d80d88b53a717843b891f7415d67.jpg",
+            "prices": [
+                {"size": "Small", "price": 60 + i % 40},
+                {"size": "Medium", "price": 80 + i % 40},
+                {"size": "Large", "price": 100 + i % 40}
+            ],
+            "badges": ["Popular"] if i % 3 == 0 else [],
+            "is_available": True,
+            "created_at": created + timedelta(minutes=i)
+        })
+    return {"success": True, "count": len(items), "data": items}
+
+
+class FlaskDefaultProvider(DefaultJSONProvider):
+    """Flask's stock provider, taught ObjectId so it can encode the menu"""
+
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('default', encode_default)
+        return super().dumps(obj, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding of the menu payload")
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    payload = build_menu(args.items)
+
+    flask_default = FlaskDefaultProvider(app)
+    fast_stdlib = FastJSONProvider(app, backend='stdlib')
+    encoders = {
+        "flask-default": lambda: flask_default.dumps(payload).encode('utf-8'),
+        "fast-stdlib": lambda: fast_stdlib.dumps_bytes(payload),
+    }
+    if orjson is not None:
+        fast_orjson = FastJSONProvider(app, backend='orjson')
+        encoders["fast-orjson"] = lambda: fast_orjson.dumps_bytes(payload)
+    else:
+        print("orjson not installed, skipping the orjson backend")
+
+    print(f"Encoding a {args.items}-item menu ({args.number} runs x {args.repeat} repeats)")
+    print("-" * 50)
+    results = {}
+    for name, encode in encoders.items():
+        size = len(encode())
+        best = min(timeit.repeat(encode, repeat=args.repeat, number=args.number)) / args.number
+        results[name] = best
+        print(f"{name:<15} {best * 1000:8.3f} ms/encode  {1 / best:9.1f} encodes/s  {size} bytes")
+
+    baseline = results["flask-default"]
+    print("-" * 50)
+    for name, best in results.items():
+        print(f"{name:<15} {baseline / best:6.2f}x vs flask-default")
+
+
+if __name__ == "__main__":
+    main()
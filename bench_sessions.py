@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Session backend benchmark for Food Premi
+Logs one client in per thread, then drives /api/auth-status with the
+cookie, memory and mongodb session backends and reports throughput and
+p50/p95 latency for each (mongodb runs against mongomock unless --mongo-uri
+points at a local mongod)
+
+Usage: python bench_sessions.py [--concurrency 1,8] [--duration 3] [--mongo-uri URI]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from bench_endpoints import percentile
+import argparse
+import os
+import time
+
+BACKENDS = ['cookie', 'memory', 'mongodb']
+
+
+def run(app, concurrency, duration):
+    """Drive /api/auth-status from logged-in clients; return (requests, seconds, latencies)"""
+    clients = []
+    for i in range(concurrency):
+        client = app.test_client()
+        email = f"session{i}@bench.test"
+        client.post('/api/register', json={
+            'name': 'Session User', 'email': email, 'password': 'bench-password', 'phone': '9876543210'
+        })
+        response = client.post('/api/login', json={'email': email, 'password': 'bench-password'})
+        assert response.status_code == 200, response.get_json()
+        clients.append(client)
+
+    deadline = time.perf_counter() + duration
+
+    def worker(client):
+        latencies = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = client.get('/api/auth-status')
+            latencies.append(time.perf_counter() - start)
+            assert response.get_json()['logged_in']
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, clients))
+    elapsed = time.perf_counter() - started
+    return sorted(latency for latencies in results for latency in latencies), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/auth-status per session backend")
+    parser.add_argument('--mongo-uri', help="local mongod URI (default: in-process mongomock)")
+    parser.add_argument('--concurrency', default='1,8', help="comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=3.0, help="seconds per backend and level")
+    parser.add_argument('--backends', default=','.join(BACKENDS))
+    args = parser.parse_args()
+
+    # Every request comes from one address; measure the server, not the auth rate limits
+    for name in ('AUTH_RATE_LIMIT_IP', 'AUTH_RATE_LIMIT_EMAIL', 'AUTH_MAX_CONCURRENCY'):
+        os.environ.setdefault(name, '0')
+    from database import db_connection, get_db
+    from indexes import ensure_indexes
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+    db = db_connection.use_client(client, name=os.getenv('BENCH_DB_NAME', 'foodpremi_bench'))
+    ensure_indexes(db)
+
+    import sessions
+    from app import app, shutdown
+    try:
+        print(f"{'backend':<10}{'conc':>5}{'rps':>10}{'p50 ms':>9}{'p95 ms':>9}")
+        for backend in [b.strip() for b in args.backends.split(',') if b.strip()]:
+            for concurrency in [int(c) for c in args.concurrency.split(',')]:
+                db.users.delete_many({})
+                db.sessions.delete_many({})
+                sessions.init_app(app, backend, get_db=get_db)
+                latencies, elapsed = run(app, concurrency, args.duration)
+                print(f"{backend:<10}{concurrency:>5}{len(latencies) / elapsed:>10.1f}"
+                      f"{percentile(latencies, 0.50) * 1000:>9.3f}{percentile(latencies, 0.95) * 1000:>9.3f}")
+    finally:
+        shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Startup check for Food Premi
+Imports app.py in a fresh interpreter with outbound connections blocked,
+and reports the import time and any network activity attempted on import
+
+Usage: python bench_startup.py [--target-ms 1500] [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Runs in the child interpreter: block sockets, then time the import
+CHILD_SCRIPT = r'''
+import json, socket, sys, time
+attempts = []
+def blocked(*args, **kwargs):
+    attempts.append(repr(args[:2]))
+    raise OSError("network disabled during import check")
+class BlockedSocket(socket.socket):
+    def __init__(self, *args, **kwargs):
+        blocked(*args)
+socket.socket = BlockedSocket
+socket.getaddrinfo = blocked
+socket.create_connection = blocked
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_ms": elapsed * 1000, "network_attempts": attempts}))
+'''
+
+
+def measure_once(root):
+    """Import app in a child process and return its measurements"""
+    env = dict(os.environ, DB_WARMUP='0')
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=root, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app import time without network access")
+    parser.add_argument('--target-ms', type=float, default=1500.0)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    runs = [measure_once(root) for _ in range(args.runs)]
+    times = sorted(run['import_ms'] for run in runs)
+    attempts = sorted({attempt for run in runs for attempt in run['network_attempts']})
+
+    report = {
+        "runs": args.runs,
+        "import_ms_min": round(times[0], 1),
+        "import_ms_median": round(times[len(times) // 2], 1),
+        "import_ms_max": round(times[-1], 1),
+        "target_ms": args.target_ms,
+        "network_attempts": attempts
+    }
+    print(json.dumps(report, indent=2))
+
+    if attempts:
+        print("FAIL: importing app attempted network access")
+        sys.exit(1)
+    if report["import_ms_median"] > args.target_ms:
+        print("FAIL: import time above target")
+        sys.exit(1)
+    print("OK: app imports without network access within target")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Blog post dates for Food Premi
+/api/blogs pages by (created_at, _id), and Mongo only compares values of the
+same type, so a post whose created_at is not a date never matches a cursor
+and drops out of paging. Dates are parsed on write, and posts written before
+that (created_at: '') are converted here
+
+Usage: python blog_dates.py [--dry-run]
+"""
+
+from pymongo import UpdateOne
+from database import db_connection
+from datetime import datetime, timezone
+import argparse
+import sys
+
+# Posts whose created_at is missing or not a BSON date
+NOT_A_DATE = {'created_at': {'$not': {'$type': 'date'}}}
+
+
+def parse_created_at(value):
+    """Parse a created_at from a request body into a naive UTC datetime
+
+    Accepts datetimes and ISO 8601 strings; returns None when empty and
+    raises ValueError for anything else.
+    """
+    if value in (None, ''):
+        return None
+    if isinstance(value, str):
+        try:
+            # fromisoformat() before 3.11 does not accept a trailing Z
+            value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f"created_at is not an ISO 8601 date: {value!r}")
+    if not isinstance(value, datetime):
+        raise ValueError("created_at must be an ISO 8601 date")
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def migrate_created_at(collection, batch_size=500, dry_run=False):
+    """Store created_at as a date on every post; return the number converted
+
+    Parseable strings keep their date, anything else falls back to the time
+    the post's ObjectId was generated.
+    """
+    converted = 0
+    batch = []
+    for post in collection.find(NOT_A_DATE, {'created_at': 1}):
+        try:
+            created_at = parse_created_at(post.get('created_at'))
+        except ValueError:
+            created_at = None
+        if created_at is None:
+            created_at = post['_id'].generation_time.replace(tzinfo=None)
+        batch.append(UpdateOne({'_id': post['_id']}, {'$set': {'created_at': created_at}}))
+        if len(batch) >= batch_size:
+            converted += _flush(collection, batch, dry_run)
+            batch = []
+    if batch:
+        converted += _flush(collection, batch, dry_run)
+    return converted
+
+
+def _flush(collection, batch, dry_run):
+    if not dry_run:
+        collection.bulk_write(batch, ordered=False)
+    return len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert blog created_at values to dates")
+    parser.add_argument('--dry-run', action='store_true', help="count the posts, change nothing")
+    args = parser.parse_args()
+
+    db = db_connection.get_database()
+    if db is None:
+        print("Database unavailable, cannot migrate blog dates")
+        sys.exit(1)
+    try:
+        converted = migrate_created_at(db.blogs, dry_run=args.dry_run)
+        print(f"{'Would convert' if args.dry_run else 'Converted'} created_at on {converted} posts")
+    finally:
+        db_connection.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+In-process cache for Food Premi
+Keeps hot, rarely-changing reads (menu, categories) in memory so page loads
+do not need a round-trip to MongoDB Atlas
+"""
+
+from collections import OrderedDict
+import os
+import threading
+import time
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL"""
+
+    def __init__(self, ttl=300, max_entries=128):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by invalidate() so loads that raced a write are discarded;
+        # single-key invalidations only bump that key's generation
+        self._generation = 0
+        self._key_generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, generation=None):
+        """Store value under key, evicting the least recently used entries"""
+        with self._lock:
+            if generation is not None and generation != self._generation_of(key):
+                # Cache (or this key) was invalidated while the value was being loaded
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        generation = self.generation(key)
+        value = loader()
+        if value is not None:
+            self.set(key, value, generation=generation)
+        return value
+
+    async def get_or_load_async(self, key, loader):
+        """get_or_load for a coroutine loader (used by asgi.py)"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        generation = self.generation(key)
+        value = await loader()
+        if value is not None:
+            self.set(key, value, generation=generation)
+        return value
+
+    def generation(self, key):
+        """Token for a load of key; set() discards the value if it has changed"""
+        with self._lock:
+            return self._generation_of(key)
+
+    def _generation_of(self, key):
+        return (self._generation, self._key_generations.get(key, 0))
+
+    def invalidate(self, key=None):
+        """Drop one key, or every entry when key is None"""
+        with self._lock:
+            if key is None:
+                self._generation += 1
+                self._key_generations.clear()
+                self._entries.clear()
+                return
+            self._entries.pop(key, None)
+            if key not in self._key_generations and len(self._key_generations) >= self.max_entries:
+                # Bound the per-key counters: a global bump stands in for all of them,
+                # discarding loads in flight but keeping the cached entries
+                self._generation += 1
+                self._key_generations.clear()
+            self._key_generations[key] = self._key_generations.get(key, 0) + 1
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Global menu cache: full catalog, per-category slices and the category list
+menu_cache = TTLCache(
+    ttl=float(os.getenv('MENU_CACHE_TTL', '300')),
+    max_entries=int(os.getenv('MENU_CACHE_MAX_ENTRIES', '128'))
+)
+
+# Global blog list cache (one entry per page/projection), invalidated on every blog write
+blog_cache = TTLCache(
+    ttl=float(os.getenv('BLOG_CACHE_TTL', '60')),
+    max_entries=int(os.getenv('BLOG_CACHE_MAX_ENTRIES', '64'))
+)
+
+# Static files under assets/, keyed by path, mtime and size so edits show up immediately
+asset_cache = TTLCache(
+    ttl=float(os.getenv('ASSET_CACHE_TTL', '3600')),
+    max_entries=int(os.getenv('ASSET_CACHE_MAX_ENTRIES', '256'))
+)
+
+# Admin dashboard summary; short TTL since other workers' writes do not invalidate it
+admin_cache = TTLCache(
+    ttl=float(os.getenv('ADMIN_SUMMARY_TTL', '30')),
+    max_entries=4
+)
+
+# Projected user profiles by user_id, invalidated on profile updates and logins
+profile_cache = TTLCache(
+    ttl=float(os.getenv('PROFILE_CACHE_TTL', '60')),
+    max_entries=int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', '10000'))
+)
@@ -0,0 +1,88 @@
+"""
+Response compression for Food Premi
+Negotiates gzip or brotli from Accept-Encoding. Cached payloads keep each
+compressed variant next to their ETag, so a body is compressed once per
+change; other responses above the size threshold are compressed on the way
+out
+"""
+
+from flask import request
+from werkzeug.http import parse_accept_header
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, gzip only when absent
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+# Per-request compression stays cheap; cached payloads can afford the best ratio
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+BROTLI_PRECOMPRESS_QUALITY = int(os.getenv('BROTLI_PRECOMPRESS_QUALITY', '11'))
+
+# Mimetypes worth compressing (images are already compressed)
+COMPRESSIBLE = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/javascript', 'text/css', 'text/html', 'text/plain', 'image/svg+xml'
+}
+
+
+def available_encodings():
+    """Encodings this process can produce, preferred first"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate(size, accept_encoding=None):
+    """Encoding to use for a body of size bytes, or None for identity
+
+    accept_encoding is an Accept-Encoding header value; by default the
+    current Flask request's is used.
+    """
+    if size < COMPRESSION_MIN_SIZE:
+        return None
+    if accept_encoding is None:
+        accepted = request.accept_encodings
+    else:
+        accepted = parse_accept_header(accept_encoding)
+    best = None
+    for encoding in available_encodings():
+        quality = accepted[encoding]
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+def compress(body, encoding, precompress=False):
+    """Compress body with encoding ('gzip' or 'br')"""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output, and so its ETag, stable across processes
+        return gzip.compress(body, compresslevel=9 if precompress else GZIP_LEVEL, mtime=0)
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_PRECOMPRESS_QUALITY if precompress else BROTLI_QUALITY)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def _compress_response(response):
+    """Compress eligible responses that were not served precompressed"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE):
+        return response
+    body = response.get_data()
+    encoding = negotiate(len(body))
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+
+def init_app(app):
+    """Compress responses after every other after_request hook has run"""
+    # after_request hooks run in reverse registration order; this one goes last
+    app.after_request_funcs.setdefault(None, []).insert(0, _compress_response)
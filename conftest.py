@@ -0,0 +1,41 @@
+"""
+Shared pytest fixtures for Food Premi
+Unit tests run against mongomock, the same local Mongo stand-in the
+benchmarks use, so they need no database server
+"""
+
+import mongomock
+import pytest
+
+# test_db.py is a manual Atlas connection check, not a unit test
+collect_ignore = ['test_db.py']
+
+
+@pytest.fixture
+def db():
+    """An empty mongomock database"""
+    return mongomock.MongoClient()['foodpremi_test']
+
+
+@pytest.fixture
+def app_db(db):
+    """db, with the app's database connection pointed at it and every cache cold"""
+    from cache import admin_cache, asset_cache, blog_cache, menu_cache, profile_cache
+    from database import db_connection
+    from menu_search import menu_search
+    db_connection.use_client(db.client, db.name)
+    for cache in (admin_cache, asset_cache, blog_cache, menu_cache, profile_cache):
+        cache.invalidate()
+    # Unbuilt, so the first search loads this database
+    menu_search._reset([], None)
+    yield db
+    db_connection.close_connection()
+
+
+@pytest.fixture
+def client(app_db):
+    """Flask test client for app.py on app_db, with fresh auth rate limits"""
+    from app import app, auth_limiter
+    from rate_limit import MemoryBucketStore
+    auth_limiter.store = MemoryBucketStore()
+    return app.test_client()
@@ -1,11 +1,155 @@
+from pymongo.errors import AutoReconnect, NotPrimaryError
 from pymongo.mongo_client import MongoClient
+from pymongo.read_preferences import (
+    Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+)
 from pymongo.server_api import ServerApi
+import importlib.util
 import os
+import random
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+class CircuitBreaker:
+    """Tracks connection failures so offline mode is entered without waiting on the network"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, base_delay=1.0, max_delay=60.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state = self.CLOSED
+        self.failures = 0
+        self.retry_at = 0.0
+        self._lock = threading.Lock()
+        
+    def allow_request(self):
+        """Return True if a connection attempt may be made now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() >= self.retry_at:
+                # Let exactly one caller probe the database
+                self.state = self.HALF_OPEN
+                return True
+            return False
+            
+    def record_success(self):
+        """Close the circuit after a successful connection"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.retry_at = 0.0
+            
+    def record_failure(self):
+        """Open the circuit and schedule the next attempt with exponential backoff"""
+        with self._lock:
+            return self._open()
+            
+    def trip(self):
+        """Open a closed circuit after a request lost the database
+        
+        Returns the backoff delay, or None if the circuit was already open, so
+        the many requests failing in one outage count as a single failure.
+        """
+        with self._lock:
+            return self._open() if self.state == self.CLOSED else None
+            
+    def _open(self):
+        self.failures += 1
+        delay = min(self.max_delay, self.base_delay * (2 ** (self.failures - 1)))
+        # Jitter keeps workers from probing Atlas in lockstep
+        delay *= random.uniform(0.8, 1.2)
+        self.state = self.OPEN
+        self.retry_at = time.monotonic() + delay
+        return delay
+            
+    def seconds_until_retry(self):
+        """Seconds left before the next attempt is allowed"""
+        with self._lock:
+            return max(0.0, self.retry_at - time.monotonic())
+            
+    def stats(self):
+        """Return the breaker state for health reporting"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "retry_in_seconds": round(max(0.0, self.retry_at - time.monotonic()), 3)
+            }
+
+# Read preference modes accepted in DB_READ_PREFERENCE_<WORKLOAD>
+READ_PREFERENCE_MODES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest
+}
+
+# Default read routing per workload: catalog reads may be served by
+# secondaries, auth always reads its own writes from the primary
+DEFAULT_READ_PREFERENCES = {
+    'menu': 'secondaryPreferred',
+    'blogs': 'secondaryPreferred',
+    'auth': 'primary'
+}
+
+# Python modules pymongo needs for each wire compressor
+COMPRESSOR_MODULES = {
+    'zstd': 'zstandard',
+    'snappy': 'snappy',
+    'zlib': 'zlib'
+}
+
+def _env_int(name):
+    """Read an optional integer setting from the environment"""
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else None
+
+def build_read_preference(mode, max_staleness=-1):
+    """Build a pymongo read preference from its mode name"""
+    if mode not in READ_PREFERENCE_MODES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    if mode == 'primary':
+        return Primary()
+    return READ_PREFERENCE_MODES[mode](max_staleness=max_staleness)
+
+def client_options_from_env():
+    """Collect MongoClient pool, timeout and compression options from the environment"""
+    connect_timeout_ms = int(os.getenv('DB_CONNECT_TIMEOUT_MS', '2000'))
+    options = {
+        'connectTimeoutMS': connect_timeout_ms,
+        'serverSelectionTimeoutMS': _env_int('DB_SERVER_SELECTION_TIMEOUT_MS') or connect_timeout_ms
+    }
+    env_options = {
+        'maxPoolSize': 'DB_MAX_POOL_SIZE',
+        'minPoolSize': 'DB_MIN_POOL_SIZE',
+        'maxIdleTimeMS': 'DB_MAX_IDLE_TIME_MS',
+        'waitQueueTimeoutMS': 'DB_WAIT_QUEUE_TIMEOUT_MS',
+        'socketTimeoutMS': 'DB_SOCKET_TIMEOUT_MS'
+    }
+    for option, env_name in env_options.items():
+        value = _env_int(env_name)
+        if value is not None:
+            options[option] = value
+    
+    # Only offer compressors whose Python module is installed
+    requested = [c.strip() for c in os.getenv('DB_COMPRESSORS', '').split(',') if c.strip()]
+    compressors = [
+        c for c in requested
+        if c in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[c])
+    ]
+    if compressors:
+        options['compressors'] = ','.join(compressors)
+    return options
+
 class DatabaseConnection:
     def __init__(self):
         # Use environment variable for password, fallback to the provided one
@@ -16,19 +160,51 @@ class DatabaseConnection:
         self.client = None
         self.db = None
         
+        # Pool sizing, timeouts (bounded so an unreachable cluster fails fast)
+        # and wire compression
+        self.client_options = client_options_from_env()
+        
+        # Per-workload read routing; maxStaleness must be at least 90 seconds
+        self.max_staleness = int(os.getenv('DB_MAX_STALENESS_SECONDS', '90'))
+        self.read_preferences = {
+            workload: build_read_preference(
+                os.getenv(f'DB_READ_PREFERENCE_{workload.upper()}', mode),
+                self.max_staleness
+            )
+            for workload, mode in DEFAULT_READ_PREFERENCES.items()
+        }
+        self._routed = {}
+        self._last_write = {}
+        
+        self.breaker = CircuitBreaker(
+            base_delay=float(os.getenv('DB_RECONNECT_BASE_DELAY', '1')),
+            max_delay=float(os.getenv('DB_RECONNECT_MAX_DELAY', '60'))
+        )
+        # Reconnect from a background thread instead of on the request path
+        self.background_probe = os.getenv('DB_RECONNECT_PROBE', '1') == '1'
+        self._connect_lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._probe_thread = None
+        
     def connect(self):
         """Establish connection to MongoDB using ServerApi"""
         try:
             print("Connecting to MongoDB Atlas...")
             # Create client with ServerApi version 1
-            self.client = MongoClient(self.uri, server_api=ServerApi('1'))
+            self.client = MongoClient(
+                self.uri,
+                server_api=ServerApi('1'),
+                **self.client_options
+            )
             
             # Test the connection with ping
             self.client.admin.command('ping')
             print("Successfully connected to MongoDB!")
             
             # Select the database
+            self._routed = {}
             self.db = self.client['foodpremi']
+            self.breaker.record_success()
             return True
             
         except Exception as e:
@@ -36,29 +212,161 @@ class DatabaseConnection:
             if self.client:
                 self.client.close()
                 self.client = None
+            delay = self.breaker.record_failure()
+            print(f"Next connection attempt in {delay:.1f}s")
             return False
     
-    def get_database(self):
-        """Get the database instance"""
+    def get_database(self, workload=None):
+        """Get the database instance, or None while in offline mode
+        
+        When a workload ('menu', 'blogs', 'auth') is given, the returned handle
+        carries that workload's read preference.
+        """
+        db = self.db
+        if db is not None and self.breaker.state == CircuitBreaker.CLOSED:
+            return self._route(db, workload) if workload else db
+        # Circuit open: fail over to offline mode without touching the network
+        if self.breaker.state != CircuitBreaker.CLOSED and self.background_probe:
+            self._start_probe()
+            return None
+        with self._connect_lock:
+            if self.db is None or self.breaker.state != CircuitBreaker.CLOSED:
+                if not self.breaker.allow_request():
+                    return None
+                if not self._reconnect():
+                    print("Warning: Running in offline mode without database")
+                    if self.background_probe:
+                        self._start_probe()
+                    return None
+        return self._route(self.db, workload) if workload else self.db
+    
+    def _reconnect(self):
+        """Connect, or re-check the existing client after a request lost it"""
         if self.db is None:
-            success = self.connect()
-            if not success:
-                print("Warning: Running in offline mode without database")
-                return None
+            return self.connect()
+        try:
+            self.client.admin.command('ping')
+        except Exception as e:
+            print(f"Database still unreachable: {str(e)}")
+            delay = self.breaker.record_failure()
+            print(f"Next connection attempt in {delay:.1f}s")
+            return False
+        print("Database reachable again")
+        self.breaker.record_success()
+        return True
+    
+    def record_error(self, error):
+        """Open the circuit if error shows the database became unreachable
+        
+        Called from request paths, so once an established connection is lost
+        requests go offline instead of each waiting out serverSelectionTimeoutMS.
+        Returns True for connectivity errors.
+        """
+        # NotPrimaryError is a failover in progress, not an outage
+        if not isinstance(error, AutoReconnect) or isinstance(error, NotPrimaryError):
+            return False
+        if self.db is not None:
+            delay = self.breaker.trip()
+            if delay is not None:
+                print(f"Database unreachable: {str(error)}; next attempt in {delay:.1f}s")
+                if self.background_probe:
+                    self._start_probe()
+        return True
+    
+    def read_preference_for(self, workload):
+        """Read preference for workload right now, or None to read from the primary"""
+        read_preference = self.read_preferences.get(workload)
+        if read_preference is None or isinstance(read_preference, Primary):
+            return None
+        # Read our own writes from the primary until secondaries catch up
+        last_write = self._last_write.get(workload)
+        if last_write is not None and time.monotonic() - last_write < self.max_staleness:
+            return None
+        return read_preference
+    
+    def _route(self, db, workload):
+        """Return db with the read preference configured for workload"""
+        read_preference = self.read_preference_for(workload)
+        if read_preference is None:
+            return db
+        routed = self._routed.get(workload)
+        if routed is None:
+            routed = db.with_options(read_preference=read_preference)
+            self._routed[workload] = routed
+        return routed
+    
+    def warm_up(self):
+        """Connect in a background thread so the first request does not pay for it"""
+        thread = threading.Thread(target=self.get_database, name='db-warmup', daemon=True)
+        thread.start()
+        return thread
+    
+    def note_write(self, workload):
+        """Record a write so the workload's reads stay on the primary for a while"""
+        self._last_write[workload] = time.monotonic()
+    
+    def use_client(self, client, name='foodpremi'):
+        """Use an existing client (e.g. a local mongod or mongomock stand-in)"""
+        self.close_connection()
+        self.client = client
+        self._routed = {}
+        self.db = client[name]
+        self.breaker.record_success()
         return self.db
     
+    def _start_probe(self):
+        """Start the background reconnect probe if it is not already running"""
+        with self._probe_lock:
+            if self._probe_thread is not None and self._probe_thread.is_alive():
+                return
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop, name='db-reconnect-probe', daemon=True
+            )
+            self._probe_thread.start()
+    
+    def _probe_loop(self):
+        """Retry the connection with backoff until the circuit closes"""
+        while self.db is None or self.breaker.state != CircuitBreaker.CLOSED:
+            time.sleep(max(0.05, self.breaker.seconds_until_retry()))
+            if not self.breaker.allow_request():
+                continue
+            with self._connect_lock:
+                if self.db is None or self.breaker.state != CircuitBreaker.CLOSED:
+                    self._reconnect()
+    
     def close_connection(self):
         """Close the database connection"""
         if self.client:
             self.client.close()
+            self.client = None
+            self.db = None
+            self._routed = {}
             print("Database connection closed")
+    
+    def reset_after_fork(self):
+        """Drop state inherited from the parent process
+        
+        MongoClient is not fork-safe: a child must open its own client rather
+        than reuse the parent's sockets and monitor threads.
+        """
+        self.client = None
+        self.db = None
+        self._routed = {}
+        self._connect_lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._probe_thread = None
+        self.breaker = CircuitBreaker(self.breaker.base_delay, self.breaker.max_delay)
 
 # Global database instance
 db_connection = DatabaseConnection()
 
-def get_db():
+# Every forked worker starts without a client and connects on its own
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=db_connection.reset_after_fork)
+
+def get_db(workload=None):
     """Get database instance for use in other modules"""
-    return db_connection.get_database()
+    return db_connection.get_database(workload)
 
 # Test connection when module is imported
 if __name__ == "__main__":
@@ -0,0 +1,182 @@
+"""
+Password hashing for Food Premi
+Runs werkzeug hashing in a bounded worker process pool so slow hashes do not
+hold the GIL or a request thread, and sheds load when the pool is saturated
+"""
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+import multiprocessing
+import os
+import threading
+import time
+
+
+class HasherBusy(Exception):
+    """Raised when too many hashes are already in flight, or one timed out"""
+
+
+def method_prefix(method):
+    """The method as werkzeug writes it into hashes, cost parameters included
+
+    'scrypt' is stored as 'scrypt:32768:8:1' and 'pbkdf2' as
+    'pbkdf2:sha256:600000', so the configured string cannot be compared
+    directly. Mirrors the defaults of werkzeug.security.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        if not args:
+            args = ['32768', '8', '1']
+        if len(args) != 3:
+            raise ValueError("'scrypt' takes 3 arguments.")
+        return ':'.join(['scrypt'] + [str(int(arg)) for arg in args])
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes 2 arguments.")
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords off the request thread"""
+
+    def __init__(self, method='scrypt:32768:8:1', salt_length=16, workers=2,
+                 max_in_flight=8, timeout=10.0):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        # Latency metrics
+        self._samples = deque(maxlen=1024)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.rejected = 0
+
+    def hash(self, password):
+        """Hash password with the configured method and cost"""
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, stored_hash, password):
+        """Check password against a stored hash"""
+        if not stored_hash:
+            return False
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """True if stored_hash was made with a different method or cost"""
+        return bool(stored_hash) and stored_hash.split('$', 1)[0] != self.method_prefix
+
+    @property
+    def method_prefix(self):
+        """The configured method as it appears in stored hashes"""
+        return method_prefix(self.method)
+
+    def _run(self, func, *args):
+        """Run func in the pool, failing fast when every slot is taken"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy("Password hashing is at capacity")
+        start = time.perf_counter()
+        try:
+            future = self._submit(func, *args) if self.workers > 0 else None
+            if future is None:
+                try:
+                    return func(*args)
+                finally:
+                    self._slots.release()
+            # The slot stays taken until the worker is done, even after a
+            # timeout, so max_in_flight bounds the queued work too
+            future.add_done_callback(lambda _: self._slots.release())
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeout:
+                raise HasherBusy("Password hashing timed out")
+            except BrokenProcessPool:
+                # A worker died; hash inline now and start a fresh pool next call
+                self._executor = None
+                return func(*args)
+        finally:
+            self._record(time.perf_counter() - start)
+
+    def _submit(self, func, *args):
+        """Submit func to the pool, or return None to run it inline if the pool is broken"""
+        try:
+            return self._pool().submit(func, *args)
+        except BrokenProcessPool:
+            self._executor = None
+            return None
+        except BaseException:
+            # Never submitted, so no done callback will free the slot
+            self._slots.release()
+            raise
+
+    def _pool(self):
+        """Return this process's executor, creating it after a fork"""
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                # Never fork a multi-threaded server process for the pool
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context(
+                    'forkserver' if 'forkserver' in methods else 'spawn'
+                )
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _record(self, seconds):
+        """Record one hash latency sample"""
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self._samples.append(seconds)
+
+    def stats(self):
+        """Return per-hash latency metrics"""
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total, rejected = self.count, self.total_seconds, self.rejected
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 3) if samples else 0.0
+
+        return {
+            "method": self.method,
+            "workers": self.workers,
+            "max_in_flight": self.max_in_flight,
+            "count": count,
+            "rejected": rejected,
+            "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99)
+        }
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+
+_workers = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+
+# Global hasher instance
+password_hasher = PasswordHasher(
+    method=os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'),
+    salt_length=int(os.getenv('PASSWORD_SALT_LENGTH', '16')),
+    workers=_workers,
+    max_in_flight=int(os.getenv('PASSWORD_HASH_MAX_IN_FLIGHT', str(max(1, _workers) * 4))),
+    timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+)
@@ -0,0 +1,82 @@
+"""
+HTTP caching helpers for Food Premi
+Keeps JSON responses and static assets as pre-encoded (and pre-compressed)
+bytes with a strong ETag so unchanged payloads are neither re-serialized,
+re-compressed nor re-sent to polling clients
+"""
+
+from flask import abort, current_app, request
+from werkzeug.security import safe_join
+from compression import COMPRESSIBLE, COMPRESSION_MIN_SIZE, available_encodings, compress, negotiate
+import hashlib
+import mimetypes
+import os
+
+ASSET_MAX_AGE = int(os.getenv('ASSET_MAX_AGE', '3600'))
+
+
+class CachedPayload:
+    """Pre-encoded response body, its content hash and compressed variants"""
+
+    __slots__ = ('body', 'etag', 'mimetype', 'variants')
+
+    def __init__(self, body, mimetype='application/json'):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.mimetype = mimetype
+        self.variants = {}
+
+    @classmethod
+    def from_data(cls, data):
+        """Encode data with the app's JSON provider"""
+        return cls(current_app.json.dumps_bytes(data))
+
+    def precompress(self):
+        """Compress the body once per supported encoding, if it is worth it"""
+        if len(self.body) >= COMPRESSION_MIN_SIZE and self.mimetype in COMPRESSIBLE:
+            for encoding in available_encodings():
+                self.variants[encoding] = compress(self.body, encoding, precompress=True)
+        return self
+
+
+def payload_response(payload, cache_control='no-cache'):
+    """Build a response for payload, answering conditional GETs with 304"""
+    encoding = negotiate(len(payload.body))
+    if encoding in payload.variants:
+        response = current_app.response_class(payload.variants[encoding], mimetype=payload.mimetype)
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{payload.etag}-{encoding}')
+    else:
+        response = current_app.response_class(payload.body, mimetype=payload.mimetype)
+        response.set_etag(payload.etag)
+    response.vary.add('Accept-Encoding')
+    # no-cache: clients may keep the body but must revalidate it before reuse
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+
+def cached_payload(cache, key, build):
+    """Return the payload for key, encoding build() into it on a miss"""
+    return cache.get_or_load(key, lambda: CachedPayload.from_data(build()).precompress())
+
+
+def cached_json_response(cache, key, build):
+    """Serve key from cache, encoding build() into a payload on a miss"""
+    return payload_response(cached_payload(cache, key, build))
+
+
+def _load_asset(path):
+    with open(path, 'rb') as f:
+        body = f.read()
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    return CachedPayload(body, mimetype=mimetype).precompress()
+
+
+def asset_response(cache, directory, filename):
+    """Serve a file under directory from cache, 404 for anything outside it"""
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    stat = os.stat(path)
+    payload = cache.get_or_load(f'{path}:{stat.st_mtime_ns}:{stat.st_size}', lambda: _load_asset(path))
+    return payload_response(payload, cache_control=f'public, max-age={ASSET_MAX_AGE}')
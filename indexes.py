@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Index management for Food Premi
+Declares the indexes the hot queries rely on, creates them idempotently and
+reports indexes that are missing, mismatched or never used
+
+Usage: python indexes.py [--check]
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from database import db_connection
+import argparse
+import sys
+
+# Indexes required by the application, per collection
+REQUIRED_INDEXES = {
+    # login_user / registration look users up by email; unique also makes
+    # registration race-free without a pre-check round-trip
+    'users': [
+        IndexModel([('email', ASCENDING)], name='email_unique', unique=True)
+    ],
+    # get_menu_by_category filters on category, distinct("category") walks it
+    'menu_items': [
+        IndexModel([('category', ASCENDING), ('is_available', ASCENDING)], name='category_available'),
+        # Natural key used by menu_import upserts; items added before slugs existed are exempt
+        IndexModel([('slug', ASCENDING)], name='slug_unique', unique=True,
+                   partialFilterExpression={'slug': {'$exists': True}}),
+        # /api/menu/changes scans items written after a client's revision
+        IndexModel([('revision', ASCENDING)], name='revision')
+    ],
+    'menu_tombstones': [
+        IndexModel([('revision', ASCENDING)], name='revision')
+    ],
+    # Server-side sessions (SESSION_TYPE=mongodb): expired ones are removed by
+    # the TTL monitor, revoke_user() deletes by user
+    'sessions': [
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_ttl', expireAfterSeconds=0),
+        IndexModel([('data.user_id', ASCENDING)], name='user_id', sparse=True)
+    ],
+    # Shared rate-limit windows (RATE_LIMIT_BACKEND=mongodb), dropped once expired
+    'rate_limits': [
+        IndexModel([('expires_at', ASCENDING)], name='expires_at_ttl', expireAfterSeconds=0)
+    ],
+    # blogs() pages newest first with a (created_at, _id) keyset cursor
+    'blogs': [
+        IndexModel([('created_at', DESCENDING), ('_id', DESCENDING)], name='created_at_id_desc')
+    ]
+}
+
+
+# Index options that change what an index enforces or keeps
+ENFORCED_OPTIONS = ('unique', 'partialFilterExpression', 'expireAfterSeconds')
+
+
+class IndexConflict(Exception):
+    """An existing index has a declared key but different enforced options"""
+
+
+def _key_of(index_info):
+    """Normalize an index key to a tuple of (field, direction) pairs"""
+    key = index_info['key']
+    pairs = key.items() if isinstance(key, dict) else key
+    return tuple((field, direction) for field, direction in pairs)
+
+
+def _options_of(index_info):
+    """The enforced options of an index, omitting unset ones"""
+    return {
+        option: index_info[option] for option in ENFORCED_OPTIONS
+        if index_info.get(option) not in (None, False)
+    }
+
+
+def _mismatches(collection_name, models, info):
+    """Describe declared indexes whose key exists with different options"""
+    existing = {_key_of(index): (name, index) for name, index in info.items()}
+    mismatched = []
+    for model in models:
+        found = existing.get(_key_of(model.document))
+        if found is not None and _options_of(found[1]) != _options_of(model.document):
+            name, index = found
+            mismatched.append(
+                f"{collection_name}.{name} has {_options_of(index)}, "
+                f"{model.document['name']} needs {_options_of(model.document)}"
+            )
+    return mismatched
+
+
+def ensure_indexes(db):
+    """Create any declared index that does not exist yet; return the names created
+
+    Raises IndexConflict, after creating the missing ones, if an existing
+    index has a declared key but not its unique, partial filter or TTL
+    options: the application would silently lose the guarantee it relies on.
+    Drop that index and run again to replace it.
+    """
+    created = []
+    conflicts = []
+    for collection_name, models in REQUIRED_INDEXES.items():
+        collection = db[collection_name]
+        info = collection.index_information()
+        existing = {_key_of(index) for index in info.values()}
+        missing = [model for model in models if _key_of(model.document) not in existing]
+        if missing:
+            created.extend(collection.create_indexes(missing))
+        conflicts.extend(_mismatches(collection_name, models, info))
+    if conflicts:
+        raise IndexConflict('; '.join(conflicts))
+    return created
+
+
+def has_unique_index(collection, field):
+    """True if collection has a unique, unfiltered index on field alone"""
+    return any(
+        _key_of(index) == ((field, ASCENDING),) and index.get('unique')
+        and not index.get('partialFilterExpression')
+        for index in collection.index_information().values()
+    )
+
+
+def index_usage(collection):
+    """Return {index name: access count} from $indexStats, or None if unsupported"""
+    try:
+        stats = collection.aggregate([{'$indexStats': {}}])
+        return {stat['name']: stat['accesses']['ops'] for stat in stats}
+    except (OperationFailure, NotImplementedError):
+        return None
+
+
+def report_indexes(db):
+    """Report declared indexes that are missing and existing indexes never used"""
+    report = {}
+    for collection_name, models in REQUIRED_INDEXES.items():
+        collection = db[collection_name]
+        info = collection.index_information()
+        existing = {_key_of(index): name for name, index in info.items()}
+        usage = index_usage(collection)
+        report[collection_name] = {
+            'missing': [model.document['name'] for model in models
+                        if _key_of(model.document) not in existing],
+            'mismatched': _mismatches(collection_name, models, info),
+            'unused': None if usage is None else sorted(
+                name for name, ops in usage.items() if ops == 0 and name != '_id_'
+            )
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and check Food Premi MongoDB indexes")
+    parser.add_argument('--check', action='store_true', help="report only, do not create indexes")
+    args = parser.parse_args()
+
+    db = db_connection.get_database()
+    if db is None:
+        print("Database unavailable, cannot manage indexes")
+        sys.exit(1)
+
+    try:
+        if not args.check:
+            try:
+                created = ensure_indexes(db)
+                print(f"Created indexes: {', '.join(created) if created else 'none (already present)'}")
+            except IndexConflict as e:
+                print(f"Index conflict: {str(e)}")
+
+        failed = False
+        for collection_name, result in report_indexes(db).items():
+            failed = failed or bool(result['missing']) or bool(result['mismatched'])
+            unused = 'unknown' if result['unused'] is None else (', '.join(result['unused']) or 'none')
+            print(f"{collection_name}: missing={', '.join(result['missing']) or 'none'} unused={unused}")
+            for mismatch in result['mismatched']:
+                print(f"  mismatched: {mismatch}")
+    finally:
+        db_connection.close_connection()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
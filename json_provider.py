@@ -0,0 +1,84 @@
+"""
+JSON provider for Food Premi
+Replaces Flask's default provider with a faster encoder that understands
+MongoDB types (ObjectId, Decimal128) as well as datetime and Decimal
+"""
+
+from flask.json.provider import DefaultJSONProvider
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from datetime import date, datetime, timezone
+from decimal import Decimal
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, fall back to the stdlib encoder
+    orjson = None
+
+
+def encode_default(obj):
+    """Convert types the encoders do not handle natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        # Naive datetimes are stored as UTC (datetime.utcnow())
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return obj.isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (Decimal, Decimal128)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider using orjson when installed, stdlib json otherwise"""
+
+    # Keep document field order; sorting costs time and buys nothing here
+    sort_keys = False
+    # Emit UTF-8 like orjson so both backends produce identical bytes
+    ensure_ascii = False
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        if backend is None:
+            backend = 'orjson' if orjson is not None else 'stdlib'
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError("orjson backend requested but orjson is not installed")
+        self.backend = backend
+
+    def dumps_bytes(self, obj):
+        """Serialize obj straight to UTF-8 bytes (used for cached payloads)"""
+        if self.backend == 'orjson':
+            # orjson serializes naive datetimes natively; OPT_NAIVE_UTC keeps
+            # the output identical to encode_default()
+            return orjson.dumps(obj, default=encode_default, option=orjson.OPT_NAIVE_UTC)
+        return self.dumps(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string"""
+        if self.backend == 'orjson' and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        # Pretty-printing (debug mode) and other options use the stdlib path
+        kwargs.setdefault('default', encode_default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if self.backend == 'stdlib' and 'indent' not in kwargs:
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response, encoding straight to bytes when possible"""
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if self.backend != 'orjson' or pretty:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+    def loads(self, s, **kwargs):
+        """Deserialize JSON from a string or bytes"""
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
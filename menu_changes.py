@@ -0,0 +1,193 @@
+"""
+Menu change feed for Food Premi
+Every menu write stamps the item with a revision taken from a shared counter
+and every deletion leaves a tombstone, so polling clients can fetch only what
+changed since the revision they last saw instead of the whole catalog.
+
+Revisions are handed out before the write commits, so a higher revision can
+become visible before a lower one. The feed and snapshot revisions therefore
+only move past changes stamped more than MENU_CHANGES_GRACE_SECONDS ago, by
+which time every lower revision is assumed to have committed. The feed must
+be read from the primary: secondaries lag by different amounts. A full menu
+read may come from a secondary through read_snapshot(), which makes it wait
+for everything its revision covers.
+
+Tombstones are kept for MENU_TOMBSTONE_RETENTION_SECONDS. Deletions prune
+older ones and record the highest pruned revision, so a client polling from
+before it is told to reset instead of silently missing a removal.
+"""
+
+from pymongo import ReturnDocument
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+import os
+
+# counters document holding the last revision handed out
+MENU_REVISION = 'menu_revision'
+# counters document holding the highest revision whose tombstone was pruned
+MENU_PRUNED_REVISION = 'menu_pruned_revision'
+
+MENU_CHANGES_PAGE_SIZE = int(os.getenv('MENU_CHANGES_PAGE_SIZE', '500'))
+
+# Longest expected gap between taking a revision and the write committing.
+# Stamps are datetime.utcnow() on whichever app host made the write, and the
+# cutoff is the reading host's clock, so this must also cover the clock skew
+# between app hosts (keep them NTP-synced; raise it if they drift further)
+MENU_CHANGES_GRACE_SECONDS = float(os.getenv('MENU_CHANGES_GRACE_SECONDS', '5'))
+
+# How long deletions stay in the feed; clients polling less often than this reset
+MENU_TOMBSTONE_RETENTION_SECONDS = int(os.getenv('MENU_TOMBSTONE_RETENTION_SECONDS', str(7 * 24 * 3600)))
+
+# Where each kind of change records when its revision was taken
+CHANGE_TIMES = {'menu_items': 'updated_at', 'menu_tombstones': 'deleted_at'}
+
+
+def allocate_revisions(db, count=1):
+    """Reserve count consecutive revisions and return the first one"""
+    counter = db.counters.find_one_and_update(
+        {'_id': MENU_REVISION},
+        {'$inc': {'seq': count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return counter['seq'] - count + 1
+
+
+def current_revision(db):
+    """Last revision handed out (0 before the first stamped write)"""
+    counter = db.counters.find_one({'_id': MENU_REVISION})
+    return counter['seq'] if counter else 0
+
+
+def _feed_bounds(db):
+    """(last revision handed out, highest pruned tombstone revision) in one read"""
+    counters = {doc['_id']: doc['seq'] for doc in
+                db.counters.find({'_id': {'$in': [MENU_REVISION, MENU_PRUNED_REVISION]}})}
+    return counters.get(MENU_REVISION, 0), counters.get(MENU_PRUNED_REVISION, 0)
+
+
+def settled_cutoff(now=None):
+    """Changes stamped at or before this time are assumed committed"""
+    return (now or datetime.utcnow()) - timedelta(seconds=MENU_CHANGES_GRACE_SECONDS)
+
+
+def settled_query(collection_name, cutoff):
+    """Stamped documents of collection_name whose revision has settled by cutoff"""
+    return {'revision': {'$exists': True}, CHANGE_TIMES[collection_name]: {'$lte': cutoff}}
+
+
+def snapshot_revision(db, now=None, session=None):
+    """Revision to report with a full menu read, taken before the read
+
+    The highest settled revision rather than the counter: polling the feed
+    from it can repeat a change but never skip one still being written.
+    """
+    cutoff = settled_cutoff(now)
+    revisions = [0]
+    for name in CHANGE_TIMES:
+        doc = db[name].find_one(settled_query(name, cutoff), {'revision': 1}, sort=[('revision', -1)],
+                                session=session)
+        if doc:
+            revisions.append(doc['revision'])
+    return max(revisions)
+
+
+def causal_session(client):
+    """A causally consistent session on client, or a no-op where sessions are unsupported (mongomock)"""
+    try:
+        return client.start_session(causal_consistency=True)
+    except NotImplementedError:
+        return nullcontext()
+
+
+def read_snapshot(db, items_db, query=None):
+    """Return (revision, menu items matching query) consistent with each other
+
+    The revision is read from the primary (db); the items from items_db,
+    typically the secondaryPreferred 'menu' handle. Both reads share a
+    causally consistent session, so a secondary serves the items only once
+    it has replicated everything the revision covers.
+    """
+    with causal_session(db.client) as session:
+        revision = snapshot_revision(db, session=session)
+        items = list(items_db.menu_items.find(query or {}, session=session))
+    return revision, items
+
+
+def stamp(fields, revision, now=None):
+    """Set revision and updated_at on a document or $set body"""
+    fields['revision'] = revision
+    fields['updated_at'] = now or datetime.utcnow()
+    return fields
+
+
+def delete_items(db, query, now=None):
+    """Delete the menu items matching query, leaving a tombstone for each"""
+    docs = list(db.menu_items.find(query, {'_id': 1, 'slug': 1}))
+    if not docs:
+        return 0
+    first = allocate_revisions(db, len(docs))
+    now = now or datetime.utcnow()
+    # Tombstones go in first: a client may see one before the item is gone, never the reverse
+    db.menu_tombstones.insert_many([
+        {'item_id': doc['_id'], 'slug': doc.get('slug'), 'revision': first + i, 'deleted_at': now}
+        for i, doc in enumerate(docs)
+    ])
+    deleted = db.menu_items.delete_many({'_id': {'$in': [doc['_id'] for doc in docs]}}).deleted_count
+    prune_tombstones(db, now)
+    return deleted
+
+
+def prune_tombstones(db, now=None):
+    """Drop tombstones older than the retention; return how many
+
+    The highest pruned revision is recorded first, so a feed reader never
+    sees a tombstone gone without knowing it has to reset.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=MENU_TOMBSTONE_RETENTION_SECONDS)
+    newest = db.menu_tombstones.find_one({'deleted_at': {'$lt': cutoff}}, {'revision': 1},
+                                         sort=[('revision', -1)])
+    if newest is None:
+        return 0
+    db.counters.update_one({'_id': MENU_PRUNED_REVISION}, {'$max': {'seq': newest['revision']}}, upsert=True)
+    return db.menu_tombstones.delete_many({'revision': {'$lte': newest['revision']}}).deleted_count
+
+
+def changes_since(db, since, limit=MENU_CHANGES_PAGE_SIZE, now=None):
+    """Items changed and items removed after revision since, oldest first
+
+    Returns at most limit entries; has_more tells the client to call again
+    with the returned revision. reset means the client must refetch
+    /api/menu: since is ahead of the server (the menu was rebuilt elsewhere),
+    or behind the tombstones still kept. since=0 holds no items, so it never
+    needs the pruned removals.
+    Entries from the first one stamped within the grace period on are held
+    back until a later call, since a lower revision may not be visible yet.
+    """
+    latest, pruned = _feed_bounds(db)
+    if since > latest or 0 < since < pruned:
+        return {'reset': True, 'revision': latest, 'changed': [], 'removed': [],
+                'has_more': False}
+
+    cutoff = settled_cutoff(now)
+    changed = list(db.menu_items.find({'revision': {'$gt': since}}).sort('revision', 1).limit(limit + 1))
+    removed = list(db.menu_tombstones.find(
+        {'revision': {'$gt': since}}, {'_id': 0, 'item_id': 1, 'slug': 1, 'revision': 1, 'deleted_at': 1}
+    ).sort('revision', 1).limit(limit + 1))
+
+    # Merge both feeds by revision, stop at the first unsettled entry and cut at limit
+    entries = sorted([(doc['revision'], 'changed', doc, doc.get('updated_at')) for doc in changed] +
+                     [(doc['revision'], 'removed', doc, doc.pop('deleted_at', None)) for doc in removed],
+                     key=lambda e: e[0])
+    settled = next((i for i, entry in enumerate(entries) if entry[3] is not None and entry[3] > cutoff),
+                   len(entries))
+    has_more = settled > limit
+    entries = entries[:min(settled, limit)]
+    return {
+        'reset': False,
+        'revision': entries[-1][0] if entries else since,
+        'changed': [doc for _, kind, doc, _ in entries if kind == 'changed'],
+        'removed': [doc for _, kind, doc, _ in entries if kind == 'removed'],
+        'has_more': has_more
+    }
+
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Bulk menu import for Food Premi
+Streams menu items from menu_items.txt, CSV or JSON, diffs them against the
+existing documents by their natural key (the item's slug) and applies only
+the changes as batched unordered bulk upserts, so the menu is never empty
+while it is being replaced. Every written item gets a fresh revision for the
+/api/menu/changes feed
+
+Usage: python menu_import.py menu_items.txt [--prune] [--batch-size 500] [--dry-run]
+"""
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from menu_changes import allocate_revisions, delete_items, stamp
+from datetime import datetime
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import time
+
+# Fields an import may set; anything else in the source is ignored
+IMPORT_FIELDS = ('category', 'name', 'description', 'image', 'prices', 'badges', 'is_available')
+
+# Category guessed from the item name when the source has none (menu_items.txt)
+CATEGORY_KEYWORDS = [
+    ('shake', 'shakes'), ('smoothie', 'shakes'), ('salad', 'salads'), ('raita', 'salads'),
+    ('sandwich', 'sandwiches'), ('toast', 'sandwiches'), ('wrap', 'sandwiches'),
+    ('momos', 'momos'), ('sprout', 'sprouts'), ('soup', 'soups'),
+    ('tea', 'drinks'), ('coffee', 'drinks'), ('juice', 'drinks'), ('lassi', 'drinks'), ('buttermilk', 'drinks')
+]
+DEFAULT_CATEGORY = 'meals'
+
+
+class MenuImportError(ValueError):
+    """Raised for unreadable or invalid import sources"""
+
+
+def slugify(name):
+    """Natural key for a menu item: its lower-cased, dash-separated name"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def guess_category(name):
+    """Guess a category from the item name"""
+    lowered = name.lower()
+    for keyword, category in CATEGORY_KEYWORDS:
+        if keyword in lowered:
+            return category
+    return DEFAULT_CATEGORY
+
+
+def _parse_bool(value):
+    """Parse CSV-style booleans"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ('0', 'false', 'no', 'n', '')
+
+
+def _parse_price(value):
+    """Parse a price, keeping whole numbers as ints like the seeded data"""
+    price = float(value)
+    return int(price) if price.is_integer() else price
+
+
+def _parse_prices(value):
+    """Accept a list of {size, price}, a number, or 'Small:60|Large:100'"""
+    if isinstance(value, list):
+        return [{"size": str(p.get('size', 'Regular')), "price": _parse_price(p['price'])} for p in value]
+    if isinstance(value, (int, float)):
+        return [{"size": "Regular", "price": _parse_price(value)}]
+    prices = []
+    for part in str(value).split('|'):
+        if not part.strip():
+            continue
+        size, _, price = part.rpartition(':')
+        prices.append({"size": size.strip() or "Regular", "price": _parse_price(price)})
+    return prices
+
+
+def normalize_item(raw):
+    """Turn one source record into the fields to write, keyed by slug"""
+    name = str(raw.get('name', '')).strip()
+    if not name:
+        raise MenuImportError("Menu item without a name")
+    item = {"name": name}
+    category = str(raw.get('category') or '').strip().lower()
+    if category:
+        item["category"] = category
+    for field in ('description', 'image'):
+        if raw.get(field) not in (None, ''):
+            item[field] = str(raw[field]).strip()
+    if raw.get('prices') not in (None, ''):
+        item["prices"] = _parse_prices(raw['prices'])
+    elif raw.get('price') not in (None, ''):
+        item["prices"] = _parse_prices(_parse_price(raw['price']))
+    badges = raw.get('badges')
+    if isinstance(badges, str):
+        badges = [b.strip() for b in badges.split('|') if b.strip()]
+    if badges is not None:
+        item["badges"] = list(badges)
+    if raw.get('is_available') not in (None, ''):
+        item["is_available"] = _parse_bool(raw['is_available'])
+    item["slug"] = slugify(name)
+    return item
+
+
+def item_defaults(item):
+    """Values for the fields an item's source left out
+
+    Only written when the item is created, or when the stored item lacks the
+    field, so re-importing never overwrites what an admin has curated.
+    """
+    defaults = {"category": guess_category(item['name']), "is_available": True}
+    return {field: value for field, value in defaults.items() if field not in item}
+
+
+def read_items(stream, fmt):
+    """Yield normalized items from a text stream in txt, csv, json or ndjson format"""
+    if fmt == 'txt':
+        for line in stream:
+            if line.strip():
+                yield normalize_item({"name": line.strip()})
+    elif fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield normalize_item(row)
+    elif fmt == 'ndjson':
+        for line in stream:
+            if line.strip():
+                yield normalize_item(json.loads(line))
+    elif fmt == 'json':
+        data = json.load(stream)
+        records = data.get('items', []) if isinstance(data, dict) else data
+        for record in records:
+            yield normalize_item(record)
+    else:
+        raise MenuImportError(f"Unsupported import format: {fmt}")
+
+
+def format_for(filename):
+    """Import format from a file extension"""
+    ext = os.path.splitext(filename)[1].lower().lstrip('.')
+    return {'txt': 'txt', 'csv': 'csv', 'json': 'json', 'ndjson': 'ndjson', 'jsonl': 'ndjson'}.get(ext, ext)
+
+
+def _batches(items, size):
+    """Group an iterable into lists of at most size items"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _bulk_upsert(collection, operations, retries=1):
+    """Apply upserts unordered; return (inserted, updated, inserted ids)
+
+    Two upserts of a new slug racing each other (a concurrent import or
+    admin add) make the loser fail on slug_unique. The item exists by then,
+    so the failed operations are retried once as plain updates of it; any
+    other write error is raised.
+    """
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        return result.upserted_count, result.modified_count, list(result.upserted_ids.values())
+    except BulkWriteError as e:
+        details = e.details
+        errors = details.get('writeErrors', [])
+        if retries <= 0 or not errors or any(error.get('code') != 11000 for error in errors):
+            raise
+        inserted, updated, inserted_ids = _bulk_upsert(
+            collection, [operations[error['index']] for error in errors], retries - 1
+        )
+        return (details.get('nUpserted', 0) + inserted, details.get('nModified', 0) + updated,
+                [upsert['_id'] for upsert in details.get('upserted', [])] + inserted_ids)
+
+
+def import_items(collection, items, batch_size=500, prune=False, dry_run=False):
+    """Upsert items by slug, writing only what changed
+
+    Fields the source does not provide are left alone on existing items;
+    new items get item_defaults() for them.
+    With prune=True, documents whose slug is not in the import are removed
+    afterwards, so the swap never leaves the menu empty.
+    """
+    started = time.perf_counter()
+    report = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "inserted_ids": []}
+    seen = set()
+    total = 0
+
+    for batch in _batches(items, batch_size):
+        # Last record wins when the source repeats a slug
+        by_slug = {item['slug']: item for item in batch}
+        seen.update(by_slug)
+        total += len(batch)
+        projection = {field: 1 for field in IMPORT_FIELDS}
+        existing = {
+            doc['slug']: doc
+            for doc in collection.find({"slug": {"$in": list(by_slug)}}, dict(projection, slug=1))
+        }
+
+        pending = []
+        new_items = 0
+        for slug, item in by_slug.items():
+            current = existing.get(slug)
+            defaults = item_defaults(item)
+            if current is None:
+                changes, on_insert = item, defaults
+            else:
+                # Only fields the source provided are diffed; defaults fill gaps
+                changes = {k: v for k, v in item.items() if current.get(k) != v}
+                changes.update({k: v for k, v in defaults.items() if k not in current})
+                on_insert = {}
+            if not changes:
+                report["unchanged"] += 1
+                continue
+            new_items += current is None
+            pending.append((slug, changes, on_insert))
+
+        if pending and not dry_run:
+            first = allocate_revisions(collection.database, len(pending))
+            now = datetime.utcnow()
+            operations = []
+            for i, (slug, changes, on_insert) in enumerate(pending):
+                update = {"$set": stamp(changes, first + i, now)}
+                if on_insert:
+                    update["$setOnInsert"] = on_insert
+                operations.append(UpdateOne({"slug": slug}, update, upsert=True))
+            inserted, updated, inserted_ids = _bulk_upsert(collection, operations)
+            report["inserted"] += inserted
+            report["updated"] += updated
+            report["inserted_ids"].extend(str(_id) for _id in inserted_ids)
+        elif pending:
+            report["inserted"] += new_items
+            report["updated"] += len(pending) - new_items
+
+    if prune and seen:
+        stale = {"$or": [{"slug": {"$nin": list(seen)}}, {"slug": {"$exists": False}}]}
+        if dry_run:
+            report["deleted"] = collection.count_documents(stale)
+        else:
+            report["deleted"] = delete_items(collection.database, stale)
+
+    elapsed = time.perf_counter() - started
+    report["total"] = total
+    report["seconds"] = round(elapsed, 3)
+    report["items_per_second"] = round(total / elapsed, 1) if elapsed else 0.0
+    return report
+
+
+def import_stream(collection, data, fmt, **options):
+    """Import from a binary file object, raw bytes or text
+
+    A file object (the admin upload) is decoded and parsed as it is read,
+    one batch at a time; only the json format needs the whole document.
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if isinstance(data, str):
+        stream = io.StringIO(data)
+    else:
+        stream = io.TextIOWrapper(data, encoding='utf-8-sig', newline='')
+    try:
+        return import_items(collection, read_items(stream, fmt), **options)
+    finally:
+        if not isinstance(stream, io.StringIO):
+            # Leave the caller's file open
+            stream.detach()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import menu items from txt, CSV or JSON")
+    parser.add_argument('path', help="menu_items.txt, .csv, .json or .ndjson file")
+    parser.add_argument('--format', help="override the format guessed from the extension")
+    parser.add_argument('--prune', action='store_true', help="remove items missing from the import")
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true', help="report changes without writing")
+    args = parser.parse_args()
+
+    from database import db_connection
+    db = db_connection.get_database()
+    if db is None:
+        raise SystemExit("Database unavailable, cannot import")
+
+    try:
+        with open(args.path, newline='', encoding='utf-8-sig') as f:
+            report = import_items(
+                db.menu_items, read_items(f, args.format or format_for(args.path)),
+                batch_size=args.batch_size, prune=args.prune, dry_run=args.dry_run
+            )
+    finally:
+        db_connection.close_connection()
+
+    report.pop("inserted_ids")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
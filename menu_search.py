@@ -0,0 +1,225 @@
+"""
+Menu search for Food Premi
+In-memory inverted index over the names, badges, categories and
+descriptions of available items, with prefix and typo-tolerant (trigram + edit distance)
+matching. It is built once per process and then kept current from the
+/api/menu/changes feed, so a query never touches MongoDB
+"""
+
+from menu_changes import changes_since, read_snapshot
+from bisect import bisect_left
+import os
+import re
+import threading
+import time
+
+MENU_SEARCH_REFRESH_SECONDS = float(os.getenv('MENU_SEARCH_REFRESH_SECONDS', '5'))
+
+# How much a hit in each field counts towards the rank
+FIELD_WEIGHTS = {'name': 3.0, 'badges': 2.0, 'category': 1.5, 'description': 1.0}
+
+# Match quality multipliers: exact token, token prefix, fuzzy match
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.5
+
+TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lower-cased alphanumeric tokens"""
+    return TOKEN.findall(str(text).lower())
+
+
+def trigrams(token):
+    """Character trigrams of a token, padded so short tokens still have some"""
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _fields_of(item):
+    """Searchable text of an item, per field"""
+    badges = item.get('badges') or []
+    return {
+        'name': item.get('name', ''),
+        'badges': ' '.join(badges) if isinstance(badges, list) else str(badges),
+        'category': item.get('category', ''),
+        'description': item.get('description', '')
+    }
+
+
+class MenuSearchIndex:
+    """Inverted index from tokens to menu items, refreshed from the change feed"""
+
+    def __init__(self, refresh_seconds=MENU_SEARCH_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.revision = None
+        self._items = {}
+        self._postings = {}      # token -> {item id: field weight}
+        self._item_tokens = {}   # item id -> tokens, to unindex on change
+        self._grams = {}         # trigram -> tokens
+        self._vocabulary = []    # sorted tokens, for prefix lookups
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.builds = 0
+        self.refreshes = 0
+
+    def _add(self, item):
+        item_id = str(item['_id'])
+        self._remove(item_id)
+        if item.get('is_available') is False:
+            # Like the grouped menu, search only offers what can be ordered
+            return
+        weights = {}
+        for field, text in _fields_of(item).items():
+            for token in tokenize(text):
+                weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                for gram in trigrams(token):
+                    self._grams.setdefault(gram, set()).add(token)
+            postings[item_id] = weight
+        self._items[item_id] = item
+        self._item_tokens[item_id] = list(weights)
+
+    def _remove(self, item_id):
+        for token in self._item_tokens.pop(item_id, ()):
+            postings = self._postings[token]
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[token]
+                for gram in trigrams(token):
+                    self._grams[gram].discard(token)
+        self._items.pop(item_id, None)
+
+    def _reset(self, items, revision):
+        self._items, self._postings, self._item_tokens, self._grams = {}, {}, {}, {}
+        for item in items:
+            self._add(item)
+        self._vocabulary = sorted(self._postings)
+        self.revision = revision
+        self.builds += 1
+
+    def rebuild(self, db, items_db=None):
+        """Load every menu item and replace the index"""
+        # Revision first: changes made while loading are re-applied, never lost
+        revision, items = read_snapshot(db, items_db if items_db is not None else db)
+        with self._lock:
+            self._reset(items, revision)
+
+    def refresh(self, db, items_db=None, force=False):
+        """Apply changes since the indexed revision (at most once per refresh_seconds)
+
+        db must read from the primary, like every change feed reader; a full
+        rebuild may load the items from items_db (see read_snapshot).
+        """
+        now = time.monotonic()
+        if not force and self.revision is not None and now - self._checked_at < self.refresh_seconds:
+            return
+        # One thread refreshes; the others keep searching the current index
+        if not self._refresh_lock.acquire(blocking=self.revision is None):
+            return
+        try:
+            if self.revision is None:
+                self.rebuild(db, items_db)
+            else:
+                while True:
+                    changes = changes_since(db, self.revision)
+                    if changes['reset']:
+                        self.rebuild(db, items_db)
+                        break
+                    if changes['changed'] or changes['removed']:
+                        with self._lock:
+                            for item in changes['changed']:
+                                self._add(item)
+                            for tombstone in changes['removed']:
+                                self._remove(str(tombstone['item_id']))
+                            self._vocabulary = sorted(self._postings)
+                            self.revision = changes['revision']
+                        self.refreshes += 1
+                    if not changes['has_more']:
+                        break
+            self._checked_at = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+
+    def mark_stale(self):
+        """Check the change feed on the next search (after a local write)"""
+        self._checked_at = 0.0
+
+    def _matches(self, term):
+        """Index tokens matching term, with their match quality"""
+        matches = {}
+        if term in self._postings:
+            matches[term] = EXACT
+        if len(term) >= 2:
+            position = bisect_left(self._vocabulary, term)
+            while position < len(self._vocabulary) and self._vocabulary[position].startswith(term):
+                matches.setdefault(self._vocabulary[position], PREFIX)
+                position += 1
+        if len(term) >= 3:
+            limit = 1 if len(term) <= 5 else 2
+            shared = {}
+            for gram in trigrams(term):
+                for token in self._grams.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            for token, count in shared.items():
+                # Cheap trigram filter before the edit distance
+                if token in matches or count < len(term) + 1 - 3 * limit:
+                    continue
+                distance = edit_distance(term, token, limit)
+                if distance <= limit:
+                    matches[token] = FUZZY * (1 - distance / (len(term) + 1))
+        return matches
+
+    def search(self, query, limit=20):
+        """Items matching query, best first: most query terms matched, then score"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        scores = {}
+        with self._lock:
+            for term in terms:
+                best = {}
+                for token, quality in self._matches(term).items():
+                    for item_id, weight in self._postings[token].items():
+                        best[item_id] = max(best.get(item_id, 0.0), quality * weight)
+                for item_id, score in best.items():
+                    matched, total = scores.get(item_id, (0, 0.0))
+                    scores[item_id] = (matched + 1, total + score)
+            ranked = sorted(scores.items(), key=lambda entry: (
+                -entry[1][0], -entry[1][1], self._items[entry[0]].get('name', '')
+            ))
+            return [
+                dict(self._items[item_id], score=round(total, 3))
+                for item_id, (matched, total) in ranked[:limit]
+            ]
+
+    def stats(self):
+        """Size and freshness, for /api/cache/stats"""
+        return {
+            'items': len(self._items),
+            'tokens': len(self._postings),
+            'revision': self.revision,
+            'builds': self.builds,
+            'refreshes': self.refreshes
+        }
+
+
+menu_search = MenuSearchIndex()
@@ -0,0 +1,214 @@
+"""
+Metrics for Food Premi
+Request middleware and a pymongo CommandListener that attribute latency and
+Mongo round-trips to the route that caused them, exposed in Prometheus text
+format at /metrics
+"""
+
+from flask import g, request
+from pymongo import monitoring
+import os
+import threading
+import time
+
+# Latency buckets in seconds (Prometheus-style cumulative histogram)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '0'))
+
+# Per-thread context: the route currently being served and its Mongo commands
+_context = threading.local()
+
+
+def _label_text(labels):
+    """Render a label dict as {a="x",b="y"}"""
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{escaped}"')
+    return '{' + ','.join(parts) + '}'
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Add amount to the series for labels"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        """Render as Prometheus text lines"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f'{self.name}{_label_text(key)} {value}')
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    def dec(self, amount=1, **labels):
+        """Subtract amount from the series for labels"""
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        """Set the series for labels to value"""
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def render(self):
+        """Render as Prometheus text lines"""
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+
+class Histogram:
+    """Cumulative latency histogram with labels"""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation for labels"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """Render as Prometheus text lines"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, observations) in self._values.items():
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{_label_text(key + (("le", bound),))} {count}')
+                lines.append(f'{self.name}_bucket{_label_text(key + (("le", "+Inf"),))} {observations}')
+                lines.append(f'{self.name}_sum{_label_text(key)} {total}')
+                lines.append(f'{self.name}_count{_label_text(key)} {observations}')
+        return lines
+
+
+# Request metrics
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request latency by route')
+REQUESTS_TOTAL = Counter('http_requests_total', 'Requests by route, method and status')
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests currently being served')
+
+# Mongo command metrics, attributed to the route that issued them
+MONGO_COMMANDS_TOTAL = Counter('mongo_commands_total', 'Mongo commands by route and command')
+MONGO_COMMAND_FAILURES = Counter('mongo_command_failures_total', 'Failed Mongo commands by route and command')
+MONGO_COMMAND_LATENCY = Histogram('mongo_command_duration_seconds', 'Mongo command latency by route and command')
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Records every Mongo command against the route being served"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _record(self, event, failed):
+        # Synchronous pymongo publishes events on the thread that ran the command
+        route = getattr(_context, 'route', None) or 'background'
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMANDS_TOTAL.inc(route=route, command=event.command_name)
+        MONGO_COMMAND_LATENCY.observe(seconds, route=route, command=event.command_name)
+        if failed:
+            MONGO_COMMAND_FAILURES.inc(route=route, command=event.command_name)
+        commands = getattr(_context, 'commands', None)
+        if commands is not None:
+            commands.append((event.command_name, round(seconds * 1000, 3)))
+
+
+def _route_label():
+    """Route template for labels; unmatched URLs share one label"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    _context.route = _route_label()
+    _context.commands = []
+    REQUESTS_IN_FLIGHT.inc()
+
+
+def record_request(route, method, path, status, elapsed, commands=None):
+    """Record one served request (asgi.py calls this for the routes it serves itself)"""
+    REQUEST_LATENCY.observe(elapsed, route=route, method=method)
+    REQUESTS_TOTAL.inc(route=route, method=method, status=status)
+    if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+        commands = commands or []
+        print(f"Slow request: {method} {path} {elapsed * 1000:.1f}ms "
+              f"status={status} mongo_commands={len(commands)} {commands}")
+
+
+def _after_request(response):
+    start = g.get('metrics_start')
+    if start is not None:
+        record_request(_route_label(), request.method, request.path, response.status_code,
+                       time.perf_counter() - start, getattr(_context, 'commands', None))
+    return response
+
+
+def _teardown_request(exc):
+    if g.get('metrics_start') is not None:
+        REQUESTS_IN_FLIGHT.dec()
+    _context.route = None
+    _context.commands = None
+
+
+def gauge_lines(name, help_text, samples):
+    """Render point-in-time values [(labels dict, value), ...] as a gauge"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+    for labels, value in samples:
+        lines.append(f'{name}{_label_text(tuple(sorted(labels.items())))} {value}')
+    return lines
+
+
+def render_metrics(extra_collectors=()):
+    """Render all metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in (REQUEST_LATENCY, REQUESTS_TOTAL, REQUESTS_IN_FLIGHT,
+                   MONGO_COMMANDS_TOTAL, MONGO_COMMAND_FAILURES, MONGO_COMMAND_LATENCY):
+        lines.extend(metric.render())
+    for collect in extra_collectors:
+        lines.extend(collect())
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Install the request hooks and the Mongo command listener
+
+    Must run before the first MongoClient is created: pymongo only attaches
+    globally registered listeners to clients created afterwards.
+    """
+    monitoring.register(CommandMetricsListener())
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
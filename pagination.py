@@ -0,0 +1,96 @@
+"""
+Keyset pagination helpers for Food Premi
+Pages through a collection sorted by (field desc, _id desc) using an opaque
+cursor instead of skip/offset, so every page costs the same
+"""
+
+from bson import ObjectId, json_util
+from datetime import datetime
+import base64
+import re
+
+# Field names accepted in ?fields= projections
+FIELD_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,63}$')
+
+# Types a cursor's sort value may have; every paged field is a date (see blog_dates.py)
+SORT_VALUE_TYPES = (datetime,)
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for malformed cursor, limit or fields parameters"""
+
+
+def encode_cursor(doc, field):
+    """Encode the sort position of doc as an opaque URL-safe cursor"""
+    raw = json_util.dumps([doc.get(field), doc['_id']])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back into (sort value, _id)
+
+    Cursors come from clients, so anything that does not decode to a date
+    and an ObjectId (operator dicts, regexes, malformed Extended JSON) is
+    rejected rather than passed into the query.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, doc_id = json_util.loads(base64.urlsafe_b64decode(padded).decode('utf-8'))
+    except Exception:
+        # binascii, JSON, Extended JSON (InvalidId, bad $date) and unpacking errors alike
+        raise InvalidPageRequest("Invalid cursor")
+    if not isinstance(value, SORT_VALUE_TYPES) or not isinstance(doc_id, ObjectId):
+        raise InvalidPageRequest("Invalid cursor")
+    return value, doc_id
+
+
+def keyset_filter(field, cursor):
+    """Query matching documents after cursor in (field desc, _id desc) order"""
+    if not cursor:
+        return {}
+    value, doc_id = decode_cursor(cursor)
+    return {'$or': [
+        {field: {'$lt': value}},
+        {field: value, '_id': {'$lt': doc_id}}
+    ]}
+
+
+def parse_limit(raw, default, maximum):
+    """Parse ?limit=, capped at maximum"""
+    if raw in (None, ''):
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise InvalidPageRequest("limit must be an integer")
+    if limit < 1:
+        raise InvalidPageRequest("limit must be positive")
+    return min(limit, maximum)
+
+
+def parse_fields(raw, max_fields=20):
+    """Parse ?fields=a,b,c into a projection dict (None means all fields)"""
+    if not raw:
+        return None
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    if len(names) > max_fields or not all(FIELD_NAME.match(name) for name in names):
+        raise InvalidPageRequest("Invalid fields parameter")
+    return {name: 1 for name in names}
+
+
+def keyset_query(collection, field, cursor=None, projection=None, query=None):
+    """Return a pymongo cursor over documents after cursor, newest first"""
+    filters = keyset_filter(field, cursor)
+    if query:
+        filters = {'$and': [query, filters]} if filters else query
+    if projection is not None:
+        # The sort key must come back to build the next cursor
+        projection = dict(projection, **{field: 1})
+    return collection.find(filters, projection).sort([(field, -1), ('_id', -1)])
+
+
+def fetch_page(collection, field, limit, cursor=None, projection=None, query=None):
+    """Return (documents, next_cursor) for one page"""
+    docs = list(keyset_query(collection, field, cursor, projection, query).limit(limit + 1))
+    next_cursor = encode_cursor(docs[limit - 1], field) if len(docs) > limit else None
+    return docs[:limit], next_cursor
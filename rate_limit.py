@@ -0,0 +1,182 @@
+"""
+Rate limiting and admission control for Food Premi
+Token buckets keyed by client IP and by email, plus a cap on how many
+expensive auth requests run at once. Rejections are answered immediately
+(429 or 503 with Retry-After), so a client hammering /api/login cannot tie
+up the workers that serve cheap endpoints like /api/menu
+"""
+
+from flask import jsonify, request
+from pymongo import ReturnDocument
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import functools
+import math
+import os
+import threading
+import time
+
+
+def parse_rate(spec):
+    """'10/60' -> (10 requests, per 60 seconds); empty or '0' disables the rule"""
+    if not spec or spec.strip() == '0':
+        return None
+    count, _, seconds = spec.partition('/')
+    return int(count), float(seconds or 1)
+
+
+# Requests per window, per client IP and per email address in the body
+AUTH_RATE_LIMIT_IP = parse_rate(os.getenv('AUTH_RATE_LIMIT_IP', '30/60'))
+AUTH_RATE_LIMIT_EMAIL = parse_rate(os.getenv('AUTH_RATE_LIMIT_EMAIL', '10/60'))
+# Auth requests allowed to run at once in this process; the rest get a 503
+AUTH_MAX_CONCURRENCY = int(os.getenv('AUTH_MAX_CONCURRENCY', '4'))
+# 'memory' (per process) or 'mongodb' (shared by every worker)
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+# Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+RATE_LIMIT_TRUST_PROXY = os.getenv('RATE_LIMIT_TRUST_PROXY', '0') == '1'
+
+
+class MemoryBucketStore:
+    """Token buckets in an LRU-bounded dict"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, limit, period):
+        """Take one token; return 0 if allowed, else seconds until one is available"""
+        rate = limit / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit, now))
+            tokens = min(limit, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                retry_after = 0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / rate
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+class MongoBucketStore:
+    """Fixed-window counters in the rate_limits collection, shared by all workers
+
+    One atomic find_one_and_update per check; a TTL index on expires_at
+    removes finished windows. Falls back to the local store while the
+    database is unavailable.
+    """
+
+    def __init__(self, get_db, fallback=None):
+        self._get_db = get_db
+        self.fallback = fallback or MemoryBucketStore()
+
+    def take(self, key, limit, period):
+        db = self._get_db('auth')
+        if db is None:
+            return self.fallback.take(key, limit, period)
+        now = time.time()
+        window = int(now // period)
+        window_end = (window + 1) * period
+        try:
+            counter = db.rate_limits.find_one_and_update(
+                {'_id': f'{key}:{window}'},
+                {'$inc': {'count': 1},
+                 '$setOnInsert': {'expires_at': datetime.utcfromtimestamp(window_end) + timedelta(seconds=60)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            print(f"Shared rate limit unavailable, using local buckets: {e}")
+            return self.fallback.take(key, limit, period)
+        return 0 if counter['count'] <= limit else window_end - now
+
+
+class AuthLimiter:
+    """Per-IP and per-email buckets plus a non-blocking concurrency cap"""
+
+    def __init__(self, store, ip_rate=AUTH_RATE_LIMIT_IP, email_rate=AUTH_RATE_LIMIT_EMAIL,
+                 max_concurrency=AUTH_MAX_CONCURRENCY):
+        self.store = store
+        self.ip_rate = ip_rate
+        self.email_rate = email_rate
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self.limited = 0
+        self.rejected = 0
+
+    def check(self, route, ip, email=None):
+        """Seconds the client must wait, or 0 if the request may proceed"""
+        retry_after = 0
+        if self.ip_rate and ip:
+            retry_after = self.store.take(f'{route}:ip:{ip}', *self.ip_rate)
+        if self.email_rate and email:
+            retry_after = max(retry_after, self.store.take(f'{route}:email:{email}', *self.email_rate))
+        if retry_after:
+            self.limited += 1
+        return retry_after
+
+    def admit(self):
+        """Claim a concurrency slot without waiting; False when all are taken"""
+        if self._slots is None:
+            return True
+        if self._slots.acquire(blocking=False):
+            return True
+        self.rejected += 1
+        return False
+
+    def release(self):
+        if self._slots is not None:
+            self._slots.release()
+
+    def stats(self):
+        return {'rate_limited': self.limited, 'rejected_busy': self.rejected,
+                'max_concurrency': self.max_concurrency}
+
+
+def client_ip():
+    """Client address used as the per-IP bucket key"""
+    if RATE_LIMIT_TRUST_PROXY and request.access_route:
+        # The proxy appends the address it saw; earlier entries are client-supplied
+        return request.access_route[-1]
+    return request.remote_addr
+
+
+def _rejection(status, message, retry_after):
+    response = jsonify({"success": False, "message": message})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, status
+
+
+def rate_limited(route, limiter):
+    """Decorate an auth view with the per-client buckets and the concurrency cap"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            body = request.get_json(silent=True)
+            email = body.get('email') if isinstance(body, dict) else None
+            email = email.lower().strip() if isinstance(email, str) else None
+            retry_after = limiter.check(route, client_ip(), email)
+            if retry_after:
+                return _rejection(429, "Too many attempts, please retry later", retry_after)
+            if not limiter.admit():
+                return _rejection(503, "Server busy, please retry shortly", 1)
+            try:
+                return view(*args, **kwargs)
+            finally:
+                limiter.release()
+        return wrapper
+    return decorator
+
+
+def create_limiter(get_db, backend=RATE_LIMIT_BACKEND):
+    """Limiter using the configured bucket store"""
+    if backend == 'mongodb':
+        return AuthLimiter(MongoBucketStore(get_db))
+    if backend == 'memory':
+        return AuthLimiter(MemoryBucketStore())
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
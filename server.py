@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Production server for Food Premi
+Runs the Flask app under gunicorn's pre-fork model so every core gets its
+own worker process. Each worker opens its own MongoClient after the fork,
+warms its caches, and closes the client on shutdown.
+
+Usage: python server.py [--bind 0.0.0.0:5000] [--workers N] [--threads N]
+"""
+
+import argparse
+import multiprocessing
+import os
+
+try:
+    from gunicorn.app.base import BaseApplication
+except ImportError:  # Optional dependency, only needed for production serving
+    BaseApplication = None
+
+
+def default_options():
+    """Server options from the environment"""
+    return {
+        'bind': os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}"),
+        'workers': int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count()))),
+        'threads': int(os.getenv('WEB_THREADS', '4')),
+        'worker_class': 'gthread',
+        'timeout': int(os.getenv('WEB_TIMEOUT', '30')),
+        'graceful_timeout': int(os.getenv('WEB_GRACEFUL_TIMEOUT', '20')),
+        'keepalive': int(os.getenv('WEB_KEEPALIVE', '5')),
+        'max_requests': int(os.getenv('WEB_MAX_REQUESTS', '0')),
+        'max_requests_jitter': int(os.getenv('WEB_MAX_REQUESTS_JITTER', '0')),
+        # Import the app once in the master; nothing connects at import time
+        'preload_app': True,
+        'when_ready': when_ready,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+        'accesslog': os.getenv('WEB_ACCESS_LOG') or None,
+        'errorlog': '-'
+    }
+
+
+def when_ready(server):
+    """Create missing indexes and convert legacy blog dates once in the master before workers start"""
+    if os.getenv('DB_ENSURE_INDEXES', '1') != '1':
+        return
+    from database import db_connection
+    from indexes import ensure_indexes
+    from blog_dates import migrate_created_at
+    # A single attempt: the master must not start a reconnect probe
+    if not db_connection.connect():
+        server.log.warning("Database offline, skipping index bootstrap")
+        return
+    try:
+        created = ensure_indexes(db_connection.db)
+        server.log.info("Indexes ready (created: %s)", ', '.join(created) or 'none')
+    except Exception as e:
+        server.log.error("Index bootstrap failed: %s", e)
+    try:
+        # Keyset paging skips posts whose created_at is not a date
+        server.log.info("Blog dates converted: %d", migrate_created_at(db_connection.db.blogs))
+    except Exception as e:
+        server.log.error("Blog date migration failed: %s", e)
+    finally:
+        # Workers open their own clients after the fork
+        db_connection.close_connection()
+
+
+def post_fork(server, worker):
+    """Connect and warm this worker's caches right after the fork"""
+    from app import warm_caches
+    # database.py drops the parent's client in an at-fork hook already
+    if warm_caches():
+        server.log.info("Worker %s: caches warmed", worker.pid)
+    else:
+        server.log.warning("Worker %s: database offline, caches left cold", worker.pid)
+
+
+def worker_exit(server, worker):
+    """Release the worker's database client on shutdown"""
+    from app import shutdown
+    shutdown()
+
+
+if BaseApplication is not None:
+    class FoodPremiServer(BaseApplication):
+        """gunicorn application wrapping the Flask app"""
+
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+
+def main():
+    options = default_options()
+    parser = argparse.ArgumentParser(description="Run Food Premi under a pre-fork server")
+    parser.add_argument('--bind', default=options['bind'])
+    parser.add_argument('--workers', type=int, default=options['workers'])
+    parser.add_argument('--threads', type=int, default=options['threads'])
+    args = parser.parse_args()
+
+    if BaseApplication is None:
+        raise SystemExit("gunicorn is required for the production server: pip install gunicorn")
+
+    options.update(bind=args.bind, workers=args.workers, threads=args.threads)
+    print(f"Starting Food Premi on {args.bind} with {args.workers} workers x {args.threads} threads")
+    FoodPremiServer(options).run()
+
+
+if __name__ == "__main__":
+    main()
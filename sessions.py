@@ -0,0 +1,242 @@
+"""
+Server-side sessions for Food Premi
+Replaces Flask's signed-cookie sessions with a short random session id in
+the cookie and the data on the server, so sessions can be revoked. Two
+stores: in-process (single node, expired entries swept periodically) and
+MongoDB (multi-node, expired documents removed by a TTL index). Session data
+is loaded on first access and kept for the rest of the request, so a request
+costs at most one store lookup, and none if it never touches the session
+"""
+
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from datetime import datetime, timedelta
+import os
+import re
+import secrets
+import threading
+import time
+
+SESSION_TTL = int(os.getenv('SESSION_TTL', str(7 * 24 * 3600)))
+SESSION_SWEEP_INTERVAL = float(os.getenv('SESSION_SWEEP_INTERVAL', '60'))
+
+# 16 random bytes, URL-safe base64: 22 characters
+SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{22}$')
+
+
+class MemorySessionStore:
+    """Sessions in a dict, for single-process deployments"""
+
+    def __init__(self, sweep_interval=SESSION_SWEEP_INTERVAL):
+        self.sweep_interval = sweep_interval
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.loads = 0
+
+    def _sweep(self, now):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        for sid in [sid for sid, (expires_at, _) in self._sessions.items() if expires_at <= now]:
+            del self._sessions[sid]
+
+    def load(self, sid):
+        """Session data for sid, or None if unknown or expired"""
+        now = time.monotonic()
+        with self._lock:
+            self.loads += 1
+            self._sweep(now)
+            entry = self._sessions.get(sid)
+            if entry is None or entry[0] <= now:
+                return None
+            return dict(entry[1])
+
+    def save(self, sid, data, ttl):
+        with self._lock:
+            self._sessions[sid] = (time.monotonic() + ttl, dict(data))
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+    def revoke_user(self, user_id):
+        """Delete every session of user_id; return how many there were"""
+        with self._lock:
+            sids = [sid for sid, (_, data) in self._sessions.items() if data.get('user_id') == user_id]
+            for sid in sids:
+                del self._sessions[sid]
+        return len(sids)
+
+    def stats(self):
+        return {'backend': 'memory', 'sessions': len(self._sessions), 'loads': self.loads}
+
+
+class MongoSessionStore:
+    """Sessions in the sessions collection; the expires_at TTL index removes stale ones"""
+
+    def __init__(self, get_db):
+        self._get_db = get_db
+        self.loads = 0
+
+    def _collection(self):
+        # Primary reads: a session saved by one request must be visible to the next
+        db = self._get_db('auth')
+        return db.sessions if db is not None else None
+
+    def load(self, sid):
+        sessions = self._collection()
+        if sessions is None:
+            return None
+        self.loads += 1
+        # The TTL monitor runs about once a minute, so check expiry here too
+        doc = sessions.find_one({'_id': sid, 'expires_at': {'$gt': datetime.utcnow()}}, {'data': 1})
+        return doc['data'] if doc else None
+
+    def save(self, sid, data, ttl):
+        sessions = self._collection()
+        if sessions is None:
+            print("Session not saved: database unavailable")
+            return
+        sessions.update_one(
+            {'_id': sid},
+            {'$set': {'data': dict(data), 'expires_at': datetime.utcnow() + timedelta(seconds=ttl)}},
+            upsert=True
+        )
+
+    def delete(self, sid):
+        sessions = self._collection()
+        if sessions is not None:
+            sessions.delete_one({'_id': sid})
+
+    def revoke_user(self, user_id):
+        """Delete every session of user_id; return how many there were"""
+        sessions = self._collection()
+        if sessions is None:
+            return 0
+        return sessions.delete_many({'data.user_id': user_id}).deleted_count
+
+    def stats(self):
+        return {'backend': 'mongodb', 'loads': self.loads}
+
+
+class ServerSession(SessionMixin):
+    """Session whose data is fetched from the store on first access"""
+
+    def __init__(self, store, sid=None):
+        self.store = store
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False
+        self.replaced_sid = None
+        self._data = {} if sid is None else None
+
+    @property
+    def data(self):
+        self.accessed = True
+        if self._data is None:
+            self._data = self.store.load(self.sid)
+            if self._data is None:
+                # Unknown or expired id: start over with a fresh one
+                self._data, self.sid, self.new = {}, None, True
+        return self._data
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def clear(self):
+        if self.data:
+            self.data.clear()
+            self.modified = True
+
+    def regenerate(self):
+        """Drop the data and move to a fresh id; the old one is deleted on save"""
+        self.data.clear()
+        if not self.new:
+            self.replaced_sid = self.sid
+        self.sid, self.new, self.modified = None, True, True
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface backed by a MemorySessionStore or MongoSessionStore"""
+
+    def __init__(self, store, ttl=SESSION_TTL):
+        self.store = store
+        self.ttl = ttl
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not SESSION_ID.match(sid):
+            sid = None
+        return ServerSession(self.store, sid)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+        if not session.loaded or not session.modified:
+            return
+        if session.replaced_sid is not None:
+            self.store.delete(session.replaced_sid)
+        if not session:
+            # Cleared (logout): revoke server-side and drop the cookie
+            if not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(16)
+        self.store.save(session.sid, session, self.ttl)
+        response.set_cookie(
+            name, session.sid,
+            max_age=self.ttl if session.permanent else None,
+            httponly=self.get_cookie_httponly(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            domain=domain, path=path
+        )
+
+
+def regenerate(session):
+    """Start a fresh session before logging a user in, against session fixation
+
+    Server-side sessions also get a new id; a signed cookie is rewritten anyway.
+    """
+    if isinstance(session, ServerSession):
+        session.regenerate()
+    else:
+        session.clear()
+
+
+def init_app(app, backend=None, get_db=None):
+    """Install server-side sessions; backend is 'memory', 'mongodb' or 'cookie'"""
+    backend = backend or app.config.get('SESSION_TYPE', 'cookie')
+    if backend == 'memory':
+        app.session_interface = ServerSessionInterface(MemorySessionStore())
+    elif backend == 'mongodb':
+        app.session_interface = ServerSessionInterface(MongoSessionStore(get_db))
+    elif backend == 'cookie':
+        app.session_interface = SecureCookieSessionInterface()
+    else:
+        raise ValueError(f"Unknown SESSION_TYPE: {backend}")
+    return app.session_interface
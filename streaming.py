@@ -0,0 +1,75 @@
+"""
+Streaming JSON responses for Food Premi
+Encodes documents straight from a pymongo cursor into a chunked response, so
+memory per request stays bounded and the first bytes go out before the
+cursor is exhausted
+"""
+
+from flask import current_app, request, stream_with_context
+import os
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', '100'))
+STREAM_BATCH_MAX = int(os.getenv('STREAM_BATCH_MAX', '1000'))
+
+
+def wants_stream():
+    """True if the client asked for a streamed response"""
+    return request.args.get('stream') in ('1', 'true') or wants_ndjson()
+
+
+def wants_ndjson():
+    """True if the Accept header prefers NDJSON over a JSON array"""
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_batch_size():
+    """Batch size from ?batch_size=, clamped to a sane range"""
+    try:
+        size = int(request.args.get('batch_size', STREAM_BATCH_SIZE))
+    except ValueError:
+        size = STREAM_BATCH_SIZE
+    return max(1, min(size, STREAM_BATCH_MAX))
+
+
+def stream_cursor(cursor, batch_size=None, envelope=None):
+    """Stream cursor as NDJSON or as {"success": true, ..., "data": [...], "count": N}
+
+    Documents are encoded as they arrive and flushed once per cursor batch.
+    envelope holds extra top-level fields for the JSON array form.
+    """
+    batch_size = batch_size or stream_batch_size()
+    cursor = cursor.batch_size(batch_size)
+    encode = current_app.json.dumps_bytes
+    ndjson = wants_ndjson()
+
+    def generate():
+        count = 0
+        chunk = []
+        if not ndjson:
+            head = dict({"success": True}, **(envelope or {}))
+            # Open the envelope: '{"success":true,...' then '"data":['
+            yield encode(head)[:-1] + b',"data":['
+        try:
+            for doc in cursor:
+                if ndjson:
+                    chunk.append(encode(doc) + b'\n')
+                else:
+                    chunk.append((b',' if count else b'') + encode(doc))
+                count += 1
+                if len(chunk) >= batch_size:
+                    yield b''.join(chunk)
+                    chunk = []
+            if chunk:
+                yield b''.join(chunk)
+        finally:
+            cursor.close()
+        if not ndjson:
+            yield b'],"count":' + str(count).encode('ascii') + b'}'
+
+    mimetype = NDJSON_MIMETYPE if ndjson else 'application/json'
+    response = current_app.response_class(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
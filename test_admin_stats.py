@@ -0,0 +1,65 @@
+"""Tests for the admin summary counters"""
+
+from admin_stats import AdminStats, bump, reconcile
+from mongomock.collection import Collection
+from pymongo.errors import AutoReconnect
+from unittest import mock
+from datetime import datetime
+
+
+def _counts(db):
+    return {doc['_id']: doc['seq'] for doc in db.counters.find()}
+
+
+def test_reconcile_seeds_and_repairs_counters(db):
+    db.users.insert_many([{'email': f'u{i}@example.com'} for i in range(3)])
+    db.blogs.insert_one({'title': 'hello'})
+    assert reconcile(db, exact=True) == {'users': 3, 'blogs': 1}
+    bump(db, 'users', 5)
+    assert _counts(db)['users_count'] == 8
+    assert reconcile(db) == {'users': 3, 'blogs': 1}
+    assert _counts(db) == {'users_count': 3, 'blogs_count': 1}
+
+
+def test_bump_without_a_counter_waits_for_reconcile(db):
+    assert bump(db, 'blogs')
+    assert _counts(db) == {}
+
+
+def test_bump_is_best_effort(db):
+    assert not bump(None, 'users')
+    reconcile(db)
+    with mock.patch.object(Collection, 'update_one', side_effect=AutoReconnect('connection reset')):
+        assert not bump(db, 'users')
+
+
+def test_summary_computes_once_then_reads_stored_values(db):
+    db.users.insert_one({'email': 'a@example.com', 'created_at': datetime.utcnow(), 'is_active': True,
+                         'order_count': 2, 'total_spent': 150.5})
+    stats = AdminStats(interval=3600)
+    summary = stats.summary(db)
+    assert summary['counts'] == {'users': 1, 'blogs': 0}
+    assert summary['stats']['order_count'] == 2 and summary['stats']['total_spent'] == 150.5
+    assert stats.summary(db)['counts'] == {'users': 1, 'blogs': 0} and stats.refreshes == 1
+    # Another worker refreshed within the interval
+    assert not stats.refresh(db)
+
+
+def test_failed_counter_bump_does_not_fail_registration(client, app_db):
+    user = {'name': 'Asha', 'email': 'asha@example.com', 'password': 'secret1', 'phone': '9876543210'}
+    with mock.patch('app.bump', wraps=bump) as app_bump, \
+            mock.patch('admin_stats._counter_id', side_effect=AutoReconnect('connection reset')):
+        response = client.post('/api/register', json=user)
+    assert response.status_code == 201 and app_bump.called
+    assert app_db.users.count_documents({}) == 1
+
+
+def test_blog_writes_succeed_when_the_counter_fails(client, app_db):
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+    with mock.patch('admin_stats._counter_id', side_effect=AutoReconnect('connection reset')):
+        created = client.post('/api/blogs', json={'title': 'hello'})
+        assert created.status_code == 200 and created.get_json()['success']
+        post_id = created.get_json()['id']
+        assert client.delete(f'/api/blogs/{post_id}').get_json()['success']
+    assert app_db.blogs.count_documents({}) == 0
@@ -0,0 +1,139 @@
+"""Tests for registration and login"""
+
+from auth import LastLoginBuffer, UserAuth
+from hashing import HasherBusy, password_hasher
+from indexes import ensure_indexes
+from mongomock.collection import Collection
+from pymongo.errors import AutoReconnect
+from unittest import mock
+from werkzeug.security import generate_password_hash
+import pytest
+
+USER = {'name': 'Asha', 'email': 'Asha@Example.com', 'password': 'secret1', 'phone': '9876543210'}
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    """Hash inline with a cheap cost; the pool and scrypt only slow the tests down"""
+    monkeypatch.setattr(password_hasher, 'workers', 0)
+    monkeypatch.setattr(password_hasher, 'method', 'pbkdf2:sha256:1000')
+
+
+@pytest.fixture
+def auth(app_db):
+    return UserAuth()
+
+
+@pytest.mark.parametrize('indexed', [True, False])
+def test_duplicate_email_is_rejected(auth, app_db, indexed):
+    if indexed:
+        ensure_indexes(app_db)
+    assert auth.register_user(dict(USER))['success']
+    result = auth.register_user(dict(USER, email='ASHA@example.com'))
+    assert not result['success'] and 'already exists' in result['message']
+    assert app_db.users.count_documents({}) == 1
+    assert auth.email_is_unique(app_db.users) is indexed
+
+
+def _registered(auth):
+    return auth.register_user(dict(USER))['user_id']
+
+
+def _last_login(app_db):
+    return app_db.users.find_one()['last_login']
+
+
+def test_combined_login_stamps_last_login_in_the_lookup(auth, app_db):
+    user_id = _registered(auth)
+    assert auth.last_login_mode == 'combined'
+    with mock.patch.object(Collection, 'update_one', wraps=app_db.users.update_one) as update_one:
+        assert auth.login_user('asha@example.com', 'secret1')['success']
+    update_one.assert_not_called()
+    assert _last_login(app_db) is not None
+    assert auth.get_user_by_id(user_id)['user']['last_login'] == _last_login(app_db)
+
+
+def test_failed_login_restores_last_login(auth, app_db):
+    _registered(auth)
+    auth.login_user('asha@example.com', 'secret1')
+    stamped = _last_login(app_db)
+    assert not auth.login_user('asha@example.com', 'wrong-password')['success']
+    assert _last_login(app_db) == stamped
+    app_db.users.update_one({}, {'$set': {'is_active': False}})
+    assert not auth.login_user('asha@example.com', 'secret1')['success']
+    assert _last_login(app_db) == stamped
+
+
+def test_sync_login(auth, app_db):
+    _registered(auth)
+    auth.last_login_mode = 'sync'
+    assert auth.login_user('asha@example.com', 'secret1')['success']
+    assert _last_login(app_db) is not None
+    assert not auth.login_user('asha@example.com', 'wrong-password')['success']
+
+
+def test_write_behind_flush_requeues_failures(auth, app_db):
+    _registered(auth)
+    auth.last_login_mode = 'write_behind'
+    auth.last_login_buffer = LastLoginBuffer(interval=3600)
+    assert auth.login_user('asha@example.com', 'secret1')['success']
+    assert _last_login(app_db) is None
+
+    with mock.patch.object(Collection, 'bulk_write', side_effect=AutoReconnect('connection reset')):
+        with pytest.raises(AutoReconnect):
+            auth.last_login_buffer.flush()
+    assert _last_login(app_db) is None
+    assert auth.last_login_buffer.flush() == 1
+    assert _last_login(app_db) is not None
+    assert auth.last_login_buffer.flush() == 0
+
+
+def test_write_behind_profile_is_refreshed_after_the_flush(auth, app_db):
+    user_id = _registered(auth)
+    auth.last_login_mode = 'write_behind'
+    auth.last_login_buffer = LastLoginBuffer(interval=3600)
+    auth.login_user('asha@example.com', 'secret1')
+    # Read (and cache) the profile before the flush lands
+    assert auth.get_user_by_id(user_id)['user']['last_login'] is None
+    auth.flush_pending()
+    assert auth.get_user_by_id(user_id)['user']['last_login'] == _last_login(app_db)
+
+
+@pytest.mark.parametrize('mode', ['combined', 'sync'])
+def test_login_refreshes_a_cached_profile(auth, app_db, mode):
+    user_id = _registered(auth)
+    auth.last_login_mode = mode
+    assert auth.get_user_by_id(user_id)['user']['last_login'] is None
+    assert auth.login_user('asha@example.com', 'secret1')['success']
+    assert auth.get_user_by_id(user_id)['user']['last_login'] == _last_login(app_db)
+
+
+def test_profile_update_refreshes_a_cached_profile(auth, app_db):
+    user_id = _registered(auth)
+    assert auth.get_user_by_id(user_id)['user']['phone'] == USER['phone']
+    assert auth.update_user_profile(user_id, {'phone': '9123456780'})['success']
+    assert auth.get_user_by_id(user_id)['user']['phone'] == '9123456780'
+
+
+def test_newer_logins_win_over_requeued_ones():
+    buffer = LastLoginBuffer(interval=3600)
+    buffer._pending = {'u1': 2}
+    buffer._requeue({'u1': 1, 'u2': 1})
+    assert buffer._pending == {'u1': 2, 'u2': 1}
+
+
+def test_login_upgrades_outdated_hashes(auth, app_db):
+    _registered(auth)
+    legacy = generate_password_hash('secret1', 'pbkdf2:sha256:500')
+    app_db.users.update_one({}, {'$set': {'password': legacy}})
+    assert auth.login_user('asha@example.com', 'secret1')['success']
+    upgraded = app_db.users.find_one()['password']
+    assert upgraded.startswith('pbkdf2:sha256:1000$')
+    assert password_hasher.verify(upgraded, 'secret1')
+
+
+def test_busy_hasher_answers_503(client, monkeypatch):
+    monkeypatch.setattr(password_hasher, 'verify', mock.Mock(side_effect=HasherBusy("timed out")))
+    client.post('/api/register', json=USER)
+    response = client.post('/api/login', json={'email': USER['email'], 'password': 'secret1'})
+    assert response.status_code == 503 and response.headers['Retry-After'] == '1'
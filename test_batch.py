@@ -0,0 +1,51 @@
+"""Tests for /api/batch"""
+
+from batch import BATCH_MAX_REQUESTS, InvalidBatchRequest, parse_batch
+import pytest
+
+
+@pytest.mark.parametrize('specs', [
+    None, [], 'menu', ['menu'] * (BATCH_MAX_REQUESTS + 1), ['nope'], [{'params': {}}],
+    [{'name': 'blogs', 'params': {'stream': '1'}}], ['menu', {'name': 'blogs', 'key': 'menu'}],
+])
+def test_malformed_batches_are_rejected(specs):
+    with pytest.raises(InvalidBatchRequest):
+        parse_batch(specs)
+
+
+def test_specs_map_to_routes():
+    parsed = parse_batch(['auth-status', {'name': 'blogs', 'params': {'mode': 'list', 'limit': 5}, 'key': 'posts'}])
+    assert parsed == [('auth-status', '/api/auth-status', ''), ('posts', '/api/blogs', 'mode=list&limit=5')]
+
+
+@pytest.mark.parametrize('category', ['drinks', 'Main_Course', 'rice-bowls'])
+def test_menu_categories_select_the_category_route(category):
+    assert parse_batch([{'name': 'menu', 'params': {'category': category}}]) == [('menu', f'/api/menu/{category}', '')]
+
+
+@pytest.mark.parametrize('category', ['grouped', 'Changes', 'search', '../admin/summary', 'a/b', 'drinks?x=1', 'x' * 65, '-'])
+def test_categories_outside_the_allowlist_are_rejected(category):
+    with pytest.raises(InvalidBatchRequest):
+        parse_batch([{'name': 'menu', 'params': {'category': category}}])
+
+
+def test_batch_runs_the_sub_requests(client):
+    assert client.post('/api/menu', json={'name': 'Green Tea', 'category': 'drinks'}).status_code == 201
+    response = client.post('/api/batch', json={'requests': [
+        'auth-status', 'categories', {'name': 'menu', 'params': {'category': 'drinks'}, 'key': 'drinks'}, 'summary'
+    ]})
+    assert response.status_code == 200 and response.headers['Cache-Control'] == 'private, no-store'
+    responses = response.get_json()['responses']
+    assert responses['auth-status'] == {'status': 200, 'body': {'logged_in': False}}
+    assert responses['categories']['body']['categories'] == ['drinks']
+    assert responses['drinks']['status'] == 200 and responses['drinks']['body']['count'] == 1
+    # Sub-requests keep their route's status codes
+    assert responses['summary']['status'] == 401
+
+
+def test_get_batch_and_invalid_batches(client):
+    response = client.get('/api/batch?requests=auth-status, categories')
+    assert set(response.get_json()['responses']) == {'auth-status', 'categories'}
+    assert client.get('/api/batch').status_code == 400
+    invalid = client.post('/api/batch', json={'requests': [{'name': 'menu', 'params': {'category': 'search'}}]})
+    assert invalid.status_code == 400 and 'Invalid category' in invalid.get_json()['message']
@@ -0,0 +1,41 @@
+"""Tests for blog created_at parsing and migration"""
+
+from blog_dates import migrate_created_at, parse_created_at
+from pagination import fetch_page
+from datetime import datetime
+import pytest
+
+
+def test_parse_created_at():
+    assert parse_created_at('') is None
+    assert parse_created_at('2024-01-02T03:04:05Z') == datetime(2024, 1, 2, 3, 4, 5)
+    assert parse_created_at('2024-01-02T08:34:05+05:30') == datetime(2024, 1, 2, 3, 4, 5)
+    assert parse_created_at(datetime(2024, 1, 2)) == datetime(2024, 1, 2)
+    with pytest.raises(ValueError):
+        parse_created_at('yesterday')
+    with pytest.raises(ValueError):
+        parse_created_at(42)
+
+
+def test_legacy_posts_page_after_migration(db):
+    db.blogs.insert_many([{'title': f'old {i}', 'created_at': ''} for i in range(5)])
+    db.blogs.insert_many([{'title': f'new {i}', 'created_at': datetime.utcnow()} for i in range(5)])
+    db.blogs.insert_one({'title': 'dated', 'created_at': '2020-06-01T00:00:00Z'})
+
+    assert migrate_created_at(db.blogs, batch_size=2) == 6
+    assert migrate_created_at(db.blogs) == 0
+    assert db.blogs.find_one({'title': 'dated'})['created_at'] == datetime(2020, 6, 1)
+
+    seen, cursor = 0, None
+    while True:
+        docs, cursor = fetch_page(db.blogs, 'created_at', 3, cursor=cursor)
+        seen += len(docs)
+        if cursor is None:
+            break
+    assert seen == 11
+
+
+def test_dry_run_changes_nothing(db):
+    db.blogs.insert_one({'title': 'old', 'created_at': ''})
+    assert migrate_created_at(db.blogs, dry_run=True) == 1
+    assert db.blogs.find_one()['created_at'] == ''
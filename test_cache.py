@@ -0,0 +1,59 @@
+"""Tests for the TTL cache"""
+
+from cache import TTLCache
+from unittest import mock
+
+
+def test_entries_expire_and_evict():
+    cache = TTLCache(ttl=10, max_entries=2)
+    with mock.patch('cache.time.monotonic', return_value=0.0):
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+        cache.set('c', 3)
+        assert cache.get('b') is None and cache.evictions == 1
+    with mock.patch('cache.time.monotonic', return_value=11.0):
+        assert cache.get('a') is None
+
+
+def test_invalidating_everything_discards_every_racing_load():
+    cache = TTLCache()
+    generation = cache.generation('drinks')
+    cache.invalidate()
+    cache.set('drinks', 'stale', generation=generation)
+    assert cache.get('drinks') is None
+
+
+def test_get_or_load_skips_none():
+    cache = TTLCache()
+    loader = mock.Mock(side_effect=[None, 'menu'])
+    assert cache.get_or_load('menu', loader) is None
+    assert cache.get_or_load('menu', loader) == 'menu'
+    assert cache.get_or_load('menu', loader) == 'menu'
+    assert loader.call_count == 2
+
+
+def test_menu_writes_invalidate_cached_reads(client):
+    assert client.get('/api/menu').get_json()['count'] == 0
+    assert client.post('/api/menu', json={'name': 'Green Tea', 'category': 'drinks'}).status_code == 201
+    assert client.get('/api/menu').get_json()['count'] == 1
+    assert client.get('/api/categories').get_json()['categories'] == ['drinks']
+
+
+def test_invalidating_a_key_discards_only_its_racing_load():
+    cache = TTLCache()
+    menu, drinks = cache.generation('menu'), cache.generation('drinks')
+    cache.invalidate('menu')
+    cache.set('menu', 'stale', generation=menu)
+    cache.set('drinks', 'fresh', generation=drinks)
+    assert cache.get('menu') is None
+    assert cache.get('drinks') == 'fresh'
+
+
+def test_per_key_generations_are_bounded():
+    cache = TTLCache(max_entries=2)
+    cache.set('kept', 1)
+    for key in ('a', 'b', 'c'):
+        cache.invalidate(key)
+    assert len(cache._key_generations) <= 2
+    assert cache.get('kept') == 1
@@ -0,0 +1,79 @@
+"""Tests for response compression"""
+
+from compression import COMPRESSION_MIN_SIZE, brotli, compress, negotiate
+import gzip
+import json
+import pytest
+
+LARGE = COMPRESSION_MIN_SIZE * 4
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip', 'gzip'),
+    ('gzip;q=0', None),
+    ('identity', None),
+    ('', None),
+    ('*', 'br' if brotli else 'gzip'),
+    ('gzip;q=0.5, br;q=1.0', 'br' if brotli else 'gzip'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+])
+def test_negotiate(header, expected):
+    assert negotiate(LARGE, header) == expected
+
+
+def test_small_bodies_are_not_compressed():
+    assert negotiate(COMPRESSION_MIN_SIZE - 1, 'gzip') is None
+
+
+def test_gzip_output_is_stable():
+    body = b'{"data": []}' * 200
+    assert compress(body, 'gzip') == compress(body, 'gzip')
+    assert gzip.decompress(compress(body, 'gzip', precompress=True)) == body
+    with pytest.raises(ValueError):
+        compress(body, 'zstd')
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli not installed")
+def test_brotli():
+    body = b'{"data": []}' * 200
+    assert brotli.decompress(compress(body, 'br')) == body
+
+
+def _seed(db, count=40):
+    db.menu_items.insert_many([
+        {'name': f'Item {i}', 'category': 'drinks', 'description': 'A long description ' * 5}
+        for i in range(count)
+    ])
+
+
+def test_cached_payload_is_served_precompressed(client, app_db):
+    _seed(app_db)
+    plain = client.get('/api/menu')
+    zipped = client.get('/api/menu', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in plain.headers
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert zipped.headers['ETag'] == plain.headers['ETag'][:-1] + '-gzip"'
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+    assert json.loads(gzip.decompress(zipped.data)) == plain.get_json()
+
+    again = client.get('/api/menu', headers={'Accept-Encoding': 'gzip', 'If-None-Match': zipped.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_other_responses_are_compressed_on_the_way_out(client, app_db):
+    _seed(app_db, 200)
+    response = client.get('/api/menu/search?q=item&limit=100', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data))['count'] == 100
+
+
+def test_small_and_error_responses_stay_plain(client):
+    assert 'Content-Encoding' not in client.get('/api/auth-status', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/api/blogs/nope', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_assets_are_precompressed_and_confined(client):
+    response = client.get('/assets/css/styles.css', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200 and response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'].startswith('public, max-age=')
+    assert client.get('/assets/../app.py').status_code == 404
@@ -0,0 +1,70 @@
+"""Tests for the circuit breaker and offline failover"""
+
+from database import CircuitBreaker, DatabaseConnection
+from pymongo.errors import AutoReconnect, NotPrimaryError, OperationFailure
+from unittest import mock
+import pytest
+
+
+@pytest.fixture
+def connection(db):
+    """A DatabaseConnection on a stand-in client whose ping can be made to fail"""
+    client = mock.MagicMock()
+    client.__getitem__.return_value = db
+    conn = DatabaseConnection()
+    conn.background_probe = False
+    conn.breaker = CircuitBreaker(base_delay=60, max_delay=60)
+    conn.use_client(client)
+    return conn
+
+
+def test_breaker_backs_off_exponentially():
+    breaker = CircuitBreaker(base_delay=1, max_delay=5)
+    delays = [breaker.record_failure() for _ in range(5)]
+    assert delays[0] == pytest.approx(1, rel=0.2)
+    assert delays[2] == pytest.approx(4, rel=0.2)
+    assert delays[4] == pytest.approx(5, rel=0.2)
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+
+
+def test_breaker_half_opens_for_one_caller():
+    breaker = CircuitBreaker(base_delay=1)
+    breaker.record_failure()
+    breaker.retry_at = 0.0
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN and not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_trip_counts_one_failure_per_outage():
+    breaker = CircuitBreaker()
+    assert breaker.trip() is not None
+    assert breaker.trip() is None
+    assert breaker.failures == 1
+
+
+def test_lost_connection_goes_offline(connection):
+    assert connection.get_database() is not None
+    assert not connection.record_error(OperationFailure('bad query'))
+    assert not connection.record_error(NotPrimaryError('stepping down'))
+    assert connection.get_database() is not None
+
+    assert connection.record_error(AutoReconnect('connection reset'))
+    assert connection.breaker.state == CircuitBreaker.OPEN
+    assert connection.get_database('menu') is None
+    connection.client.admin.command.assert_not_called()
+
+
+def test_recovers_after_backoff(connection):
+    connection.record_error(AutoReconnect('connection reset'))
+    connection.client.admin.command.side_effect = AutoReconnect('still down')
+    connection.breaker.retry_at = 0.0
+    assert connection.get_database() is None
+    assert connection.breaker.failures == 2
+
+    connection.client.admin.command.side_effect = None
+    connection.breaker.retry_at = 0.0
+    assert connection.get_database() is not None
+    assert connection.breaker.state == CircuitBreaker.CLOSED
+
@@ -0,0 +1,47 @@
+"""Tests for the bounded password hasher"""
+
+from hashing import HasherBusy, PasswordHasher, method_prefix
+from werkzeug.security import generate_password_hash
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+
+
+@pytest.mark.parametrize('method', [
+    'scrypt', 'scrypt:16384:8:1', 'pbkdf2', 'pbkdf2:sha512', 'pbkdf2:sha256:1000'
+])
+def test_method_prefix_matches_werkzeug(method):
+    assert method_prefix(method) == generate_password_hash('x', method, 1).split('$', 1)[0]
+
+
+@pytest.mark.parametrize('method', ['md5', 'scrypt:1', 'pbkdf2:sha256:1:2'])
+def test_invalid_methods(method):
+    with pytest.raises(ValueError):
+        method_prefix(method)
+
+
+def test_needs_rehash():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=0)
+    current = hasher.hash('secret')
+    assert hasher.verify(current, 'secret') and not hasher.verify(current, 'wrong')
+    assert not hasher.needs_rehash(current)
+    assert hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:500'))
+    assert hasher.needs_rehash(generate_password_hash('secret', 'scrypt:16384:8:1'))
+    assert not hasher.needs_rehash('')
+
+
+def test_timed_out_hash_keeps_its_slot():
+    release = threading.Event()
+    hasher = PasswordHasher(workers=1, max_in_flight=1, timeout=0.05)
+    hasher._pool = lambda executor=ThreadPoolExecutor(1): executor
+
+    with pytest.raises(HasherBusy):
+        hasher._run(release.wait)
+    # The worker is still busy with the first job, so a second is shed at once
+    with pytest.raises(HasherBusy):
+        hasher._run(len, 'x')
+    assert hasher.rejected == 1
+
+    release.set()
+    hasher._pool().submit(lambda: None).result()
+    assert hasher._run(len, 'x') == 1
@@ -0,0 +1,45 @@
+"""Tests for pre-encoded payloads, ETags and conditional GETs"""
+
+from cache import menu_cache
+
+
+def _seed(db):
+    db.menu_items.insert_many([
+        {'name': 'Green Tea', 'category': 'drinks'},
+        {'name': 'Paneer Sandwich', 'category': 'sandwiches'}
+    ])
+
+
+def test_unchanged_menu_answers_304(client, db):
+    _seed(db)
+    first = client.get('/api/menu')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+
+    again = client.get('/api/menu', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+    assert client.get('/api/menu', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_etag_changes_after_a_write(client, db):
+    _seed(db)
+    etag = client.get('/api/menu').headers['ETag']
+    client.post('/api/menu', json={'name': 'Lassi', 'category': 'drinks'})
+    response = client.get('/api/menu', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_category_cache_key_is_case_insensitive(client, db):
+    _seed(db)
+    lower = client.get('/api/menu/drinks')
+    upper = client.get('/api/menu/DRINKS', headers={'If-None-Match': lower.headers['ETag']})
+    assert upper.status_code == 304
+    assert menu_cache.get('menu:DRINKS') is None
+
+
+def test_unknown_categories_are_not_cached(client, db):
+    _seed(db)
+    response = client.get('/api/menu/no-such-category')
+    assert response.status_code == 200 and response.get_json()['count'] == 0
+    assert menu_cache.get('menu:no-such-category') is None
+    assert menu_cache.stats()['entries'] == 1  # the category set only
@@ -0,0 +1,68 @@
+"""Tests for the JSON provider"""
+
+from json_provider import FastJSONProvider, encode_default, orjson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from flask import Flask
+import pytest
+
+DOC = {
+    '_id': ObjectId('65a1b2c3d4e5f6a7b8c9d0e1'),
+    'name': 'Chai ☕',
+    'created_at': datetime(2024, 1, 2, 3, 4, 5),
+    'price': Decimal('12.50'),
+    'total': Decimal128('99.99'),
+    'served_on': date(2024, 1, 2),
+    'b': 1,
+    'a': 2
+}
+EXPECTED = ('{"_id":"65a1b2c3d4e5f6a7b8c9d0e1","name":"Chai ☕","created_at":"2024-01-02T03:04:05+00:00",'
+            '"price":"12.50","total":"99.99","served_on":"2024-01-02","b":1,"a":2}')
+
+BACKENDS = ['stdlib'] + (['orjson'] if orjson is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def app(request):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app, backend=request.param)
+    return app
+
+
+@pytest.fixture
+def provider(app):
+    return app.json
+
+
+def test_encodes_mongo_types_in_document_order(provider):
+    assert provider.dumps(DOC) == EXPECTED
+    assert provider.dumps_bytes(DOC) == EXPECTED.encode('utf-8')
+
+
+def test_aware_datetimes_keep_their_offset():
+    ist = timezone(timedelta(hours=5, minutes=30))
+    assert encode_default(datetime(2024, 1, 2, 8, 34, tzinfo=ist)) == '2024-01-02T08:34:00+05:30'
+
+
+def test_unknown_types_raise(provider):
+    with pytest.raises(TypeError):
+        provider.dumps({'value': object()})
+
+
+def test_round_trip(provider):
+    assert provider.loads(provider.dumps({'a': [1, 'x']})) == {'a': [1, 'x']}
+
+
+def test_response_body(app):
+    with app.app_context():
+        response = app.json.response({'_id': DOC['_id']})
+    assert response.mimetype == 'application/json'
+    assert response.get_json() == {'_id': '65a1b2c3d4e5f6a7b8c9d0e1'}
+
+
+def test_orjson_backend_requires_orjson(monkeypatch):
+    monkeypatch.setattr('json_provider.orjson', None)
+    with pytest.raises(RuntimeError):
+        FastJSONProvider(Flask(__name__), backend='orjson')
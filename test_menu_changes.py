@@ -0,0 +1,128 @@
+"""Tests for the menu change feed"""
+
+from menu_changes import (
+    MENU_CHANGES_GRACE_SECONDS, MENU_TOMBSTONE_RETENTION_SECONDS, allocate_revisions, changes_since,
+    delete_items, prune_tombstones, read_snapshot, snapshot_revision, stamp
+)
+from database import db_connection
+from unittest import mock
+from datetime import datetime, timedelta
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+SETTLED = NOW - timedelta(seconds=MENU_CHANGES_GRACE_SECONDS + 1)
+
+
+def _write(db, slug, at=SETTLED):
+    revision = allocate_revisions(db)
+    db.menu_items.update_one({'slug': slug}, {'$set': stamp({'name': slug}, revision, at)}, upsert=True)
+    return revision
+
+
+def _delete(db, slug, at=SETTLED):
+    delete_items(db, {'slug': slug}, now=at)
+
+
+def test_allocate_revisions_is_consecutive(db):
+    assert allocate_revisions(db) == 1
+    assert allocate_revisions(db, 3) == 2
+    assert allocate_revisions(db) == 5
+
+
+def test_changes_and_removals_merge_by_revision(db):
+    for slug in ('tea', 'lassi', 'coffee'):
+        _write(db, slug)
+    _delete(db, 'lassi')
+    _write(db, 'tea')
+
+    feed = changes_since(db, 0, now=NOW)
+    assert feed['revision'] == 5 and not feed['has_more'] and not feed['reset']
+    assert [doc['slug'] for doc in feed['changed']] == ['coffee', 'tea']
+    assert [doc['slug'] for doc in feed['removed']] == ['lassi']
+    assert 'deleted_at' not in feed['removed'][0]
+
+    assert changes_since(db, 5, now=NOW)['changed'] == []
+
+
+def test_paging_stops_at_limit(db):
+    for i in range(5):
+        _write(db, f'item-{i}')
+    _delete(db, 'item-0')
+
+    first = changes_since(db, 0, limit=4, now=NOW)
+    assert first['has_more'] and first['revision'] == 5
+    assert [doc['slug'] for doc in first['changed']] == ['item-1', 'item-2', 'item-3', 'item-4']
+    second = changes_since(db, first['revision'], limit=4, now=NOW)
+    assert not second['has_more'] and second['revision'] == 6
+    assert second['changed'] == []
+    assert [doc['slug'] for doc in second['removed']] == ['item-0']
+
+
+def test_unsettled_changes_are_held_back(db):
+    _write(db, 'tea')
+    _write(db, 'lassi', at=NOW)
+    _write(db, 'coffee')
+
+    feed = changes_since(db, 0, now=NOW)
+    assert [doc['slug'] for doc in feed['changed']] == ['tea']
+    assert feed['revision'] == 1 and not feed['has_more']
+    assert snapshot_revision(db, now=NOW) == 3
+
+    later = changes_since(db, 1, now=NOW + timedelta(seconds=MENU_CHANGES_GRACE_SECONDS + 1))
+    assert [doc['slug'] for doc in later['changed']] == ['lassi', 'coffee']
+
+
+def test_since_ahead_of_server_resets(db):
+    _write(db, 'tea')
+    feed = changes_since(db, 10, now=NOW)
+    assert feed['reset'] and feed['revision'] == 1
+
+
+def test_snapshot_revision_covers_tombstones(db):
+    assert snapshot_revision(db, now=NOW) == 0
+    _write(db, 'tea')
+    _delete(db, 'tea')
+    assert snapshot_revision(db, now=NOW) == 2
+
+
+def test_old_tombstones_are_pruned_and_old_clients_reset(db):
+    long_ago = NOW - timedelta(seconds=MENU_TOMBSTONE_RETENTION_SECONDS + 60)
+    for slug in ('tea', 'lassi', 'coffee', 'juice'):
+        _write(db, slug, at=long_ago)
+    _delete(db, 'tea', at=long_ago)      # revision 5
+    _delete(db, 'lassi')                 # revision 6, prunes revision 5
+    assert prune_tombstones(db, now=NOW) == 0
+    assert [doc['slug'] for doc in db.menu_tombstones.find()] == ['lassi']
+
+    assert changes_since(db, 4, now=NOW)['reset']
+    assert not changes_since(db, 5, now=NOW)['reset']
+    # A client without items needs no removals
+    feed = changes_since(db, 0, now=NOW)
+    assert not feed['reset'] and [doc['slug'] for doc in feed['removed']] == ['lassi']
+
+
+def test_prune_keeps_tombstones_within_the_retention(db):
+    for slug in ('tea', 'lassi'):
+        _write(db, slug)
+        _delete(db, slug)
+    assert prune_tombstones(db, now=NOW) == 0
+    later = NOW + timedelta(seconds=MENU_TOMBSTONE_RETENTION_SECONDS)
+    assert prune_tombstones(db, now=later) == 2
+    assert db.menu_tombstones.count_documents({}) == 0
+    assert changes_since(db, 3, now=later)['reset'] and not changes_since(db, 4, now=later)['reset']
+
+
+def test_snapshot_reads_items_from_the_given_handle(db):
+    _write(db, 'tea')
+    items_db = mock.MagicMock()
+    items_db.menu_items.find.return_value = [{'slug': 'from-secondary'}]
+    revision, items = read_snapshot(db, items_db, {'category': 'drinks'})
+    assert items == [{'slug': 'from-secondary'}]
+    items_db.menu_items.find.assert_called_once_with({'category': 'drinks'}, session=None)
+
+
+def test_menu_reads_use_the_menu_read_preference(client, app_db):
+    _write(app_db, 'tea')
+    with mock.patch.object(db_connection, 'get_database', wraps=db_connection.get_database) as get_database:
+        body = client.get('/api/menu').get_json()
+    assert body['count'] == 1
+    assert mock.call('menu') in get_database.call_args_list
@@ -0,0 +1,131 @@
+"""Tests for the bulk menu import"""
+
+from menu_import import MenuImportError, import_items, import_stream, normalize_item
+from mongomock.collection import Collection
+from pymongo.errors import BulkWriteError
+from unittest import mock
+import io
+import pytest
+
+
+def _import(db, text, fmt='txt', **options):
+    return import_stream(db.menu_items, text, fmt, **options)
+
+
+def test_normalize_keeps_only_provided_fields():
+    assert normalize_item({'name': ' Green Tea '}) == {'name': 'Green Tea', 'slug': 'green-tea'}
+    item = normalize_item({'name': 'Lassi', 'category': 'Drinks', 'price': '40', 'is_available': 'no',
+                           'badges': 'Cold|New'})
+    assert item == {'name': 'Lassi', 'slug': 'lassi', 'category': 'drinks', 'is_available': False,
+                    'prices': [{'size': 'Regular', 'price': 40}], 'badges': ['Cold', 'New']}
+    with pytest.raises(MenuImportError):
+        normalize_item({'name': ''})
+
+
+def test_new_items_get_defaults(db):
+    report = _import(db, "Green Tea\nPaneer Sandwich\n")
+    assert report['inserted'] == 2
+    tea = db.menu_items.find_one({'slug': 'green-tea'})
+    assert tea['category'] == 'drinks' and tea['is_available'] is True
+    assert db.menu_items.find_one({'slug': 'paneer-sandwich'})['category'] == 'sandwiches'
+
+
+def test_reimport_is_a_no_op(db):
+    _import(db, "Green Tea\n")
+    report = _import(db, "Green Tea\n")
+    assert (report['inserted'], report['updated'], report['unchanged']) == (0, 0, 1)
+
+
+def test_reimport_keeps_curated_fields(db):
+    _import(db, "Green Tea\n")
+    db.menu_items.update_one({'slug': 'green-tea'}, {'$set': {'category': 'beverages', 'is_available': False}})
+    _import(db, "Green Tea\n")
+    _import(db, "name,category,is_available\nGreen Tea,,\n", 'csv')
+    tea = db.menu_items.find_one({'slug': 'green-tea'})
+    assert tea['category'] == 'beverages' and tea['is_available'] is False
+
+
+def test_provided_fields_are_updated(db):
+    _import(db, "Green Tea\n")
+    report = _import(db, "name,category,price\nGreen Tea,drinks,25\n", 'csv')
+    assert report['updated'] == 1
+    assert db.menu_items.find_one({'slug': 'green-tea'})['prices'] == [{'size': 'Regular', 'price': 25}]
+
+
+def test_changes_are_stamped_with_revisions(db):
+    _import(db, "Green Tea\nLassi\n")
+    first = sorted(doc['revision'] for doc in db.menu_items.find())
+    _import(db, '[{"name": "Lassi", "description": "Sweet"}]', 'json')
+    assert first == [1, 2]
+    assert db.menu_items.find_one({'slug': 'lassi'})['revision'] == 3
+
+
+def test_prune_removes_missing_items_with_tombstones(db):
+    _import(db, "Green Tea\nLassi\n")
+    report = _import(db, "Green Tea\n", prune=True)
+    assert report['deleted'] == 1
+    assert [doc['slug'] for doc in db.menu_items.find()] == ['green-tea']
+    assert db.menu_tombstones.find_one()['slug'] == 'lassi'
+
+
+def test_dry_run_writes_nothing(db):
+    report = import_items(db.menu_items, [normalize_item({'name': 'Green Tea'})], dry_run=True)
+    assert report['inserted'] == 1
+    assert db.menu_items.count_documents({}) == 0
+
+
+def test_concurrent_insert_of_the_same_slug_is_retried_as_an_update(db):
+    """The other writer wins the insert; this import's upsert fails on slug_unique once"""
+    bulk_write = Collection.bulk_write
+
+    def racing_bulk_write(collection, operations, ordered=True):
+        collection.insert_one({'name': 'Green Tea', 'slug': 'green-tea', 'category': 'beverages'})
+        raise BulkWriteError({'writeErrors': [{'index': 0, 'code': 11000, 'errmsg': 'E11000 duplicate key'}],
+                              'nUpserted': 0, 'nModified': 0, 'upserted': []})
+
+    with mock.patch.object(Collection, 'bulk_write', autospec=True) as mock_write:
+        mock_write.side_effect = lambda *args, **kwargs: (
+            racing_bulk_write(*args, **kwargs) if mock_write.call_count == 1 else bulk_write(*args, **kwargs)
+        )
+        report = _import(db, "name,description\nGreen Tea,Fresh\n", 'csv')
+
+    assert (report['inserted'], report['updated']) == (0, 1)
+    assert db.menu_items.count_documents({}) == 1
+    tea = db.menu_items.find_one()
+    assert tea['description'] == 'Fresh' and tea['category'] == 'beverages'
+
+
+def test_other_write_errors_are_raised(db):
+    error = BulkWriteError({'writeErrors': [{'index': 0, 'code': 121, 'errmsg': 'validation failed'}]})
+    with mock.patch.object(Collection, 'bulk_write', side_effect=error):
+        with pytest.raises(BulkWriteError):
+            _import(db, "Green Tea\n")
+
+
+def _admin(client):
+    with client.session_transaction() as sess:
+        sess['is_admin'] = True
+
+
+def test_upload_is_imported(client, app_db):
+    _admin(client)
+    upload = (io.BytesIO('\ufeffname,price\nGreen Tea,20\nLassi,40\n'.encode('utf-8')), 'menu.csv')
+    response = client.post('/api/admin/menu/import?batch_size=1', data={'file': upload},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.get_json()['report']['inserted'] == 2
+    assert client.get('/api/menu').get_json()['count'] == 2
+
+
+@pytest.mark.parametrize('query, body', [
+    ('batch_size=abc', [{'name': 'Green Tea'}]),
+    ('', [{'name': ''}]),
+    ('', {'items': 'Green Tea'}),
+])
+def test_invalid_imports_answer_400(client, query, body):
+    _admin(client)
+    assert client.post(f'/api/admin/menu/import?{query}', json=body).status_code == 400
+
+
+def test_import_requires_admin(client):
+    assert client.post('/api/admin/menu/import', json=[{'name': 'Green Tea'}]).status_code == 401
@@ -0,0 +1,79 @@
+"""Tests for the in-memory menu search index"""
+
+from menu_changes import MENU_CHANGES_GRACE_SECONDS, allocate_revisions, delete_items, stamp
+from menu_search import MenuSearchIndex, edit_distance, tokenize
+from datetime import datetime, timedelta
+
+
+def _settled():
+    return datetime.utcnow() - timedelta(seconds=MENU_CHANGES_GRACE_SECONDS + 1)
+
+
+def _write(db, **item):
+    item = stamp(item, allocate_revisions(db), _settled())
+    db.menu_items.update_one({'slug': item['slug']}, {'$set': item}, upsert=True)
+
+
+def _names(results):
+    return [item['name'] for item in results]
+
+
+def test_tokenize_and_edit_distance():
+    assert tokenize('Paneer-Tikka  Sandwich!') == ['paneer', 'tikka', 'sandwich']
+    assert edit_distance('paner', 'paneer', 1) == 1
+    assert edit_distance('coffee', 'tea', 1) > 1
+
+
+def test_ranks_exact_prefix_and_fuzzy_matches(db):
+    _write(db, slug='paneer-sandwich', name='Paneer Sandwich', category='sandwiches')
+    _write(db, slug='veg-sandwich', name='Veg Sandwich', category='sandwiches', description='with paneer')
+    _write(db, slug='green-tea', name='Green Tea', category='drinks')
+    index = MenuSearchIndex(refresh_seconds=60)
+    index.refresh(db)
+
+    assert _names(index.search('paneer')) == ['Paneer Sandwich', 'Veg Sandwich']
+    assert _names(index.search('sandw')) == ['Paneer Sandwich', 'Veg Sandwich']
+    assert _names(index.search('paner')) == ['Paneer Sandwich', 'Veg Sandwich']
+    # Items matching more of the query rank first
+    assert _names(index.search('veg paneer')) == ['Veg Sandwich', 'Paneer Sandwich']
+    assert index.search('') == []
+
+
+def test_refresh_applies_changes_and_removals(db):
+    _write(db, slug='green-tea', name='Green Tea')
+    _write(db, slug='lassi', name='Lassi')
+    index = MenuSearchIndex(refresh_seconds=60)
+    index.refresh(db)
+
+    _write(db, slug='green-tea', name='Masala Tea')
+    delete_items(db, {'slug': 'lassi'}, now=_settled())
+
+    # Within refresh_seconds nothing is re-read until marked stale
+    index.refresh(db)
+    assert _names(index.search('lassi')) == ['Lassi']
+    index.mark_stale()
+    index.refresh(db)
+    assert index.search('lassi') == []
+    assert index.search('green') == []
+    assert _names(index.search('masala')) == ['Masala Tea']
+    assert index.stats()['builds'] == 1 and index.stats()['revision'] == 4
+
+
+def test_unavailable_items_are_not_offered(db):
+    _write(db, slug='green-tea', name='Green Tea')
+    _write(db, slug='masala-tea', name='Masala Tea', is_available=False)
+    index = MenuSearchIndex(refresh_seconds=0)
+    index.refresh(db)
+    assert _names(index.search('tea')) == ['Green Tea']
+
+    _write(db, slug='masala-tea', is_available=True)
+    _write(db, slug='green-tea', is_available=False)
+    index.refresh(db)
+    assert _names(index.search('tea')) == ['Masala Tea']
+
+
+def test_search_endpoint(client, app_db):
+    _write(app_db, slug='green-tea', name='Green Tea', category='drinks')
+    body = client.get('/api/menu/search?q=gren').get_json()
+    assert body['count'] == 1 and body['data'][0]['name'] == 'Green Tea'
+    assert client.get('/api/menu/search?q=tea&limit=x').status_code == 400
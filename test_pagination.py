@@ -0,0 +1,87 @@
+"""Tests for keyset pagination"""
+
+from pagination import (
+    InvalidPageRequest, decode_cursor, encode_cursor, fetch_page, parse_fields, parse_limit
+)
+from bson import ObjectId
+from datetime import datetime, timedelta
+import base64
+import pytest
+
+
+def _raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _all_pages(collection, limit):
+    titles, cursor = [], None
+    while True:
+        docs, cursor = fetch_page(collection, 'created_at', limit, cursor=cursor)
+        titles.extend(doc['title'] for doc in docs)
+        if cursor is None:
+            return titles
+
+
+def test_pages_cover_every_post_newest_first(db):
+    start = datetime(2024, 1, 1)
+    db.blogs.insert_many([{'title': f'post {i}', 'created_at': start + timedelta(days=i)} for i in range(7)])
+    assert _all_pages(db.blogs, 3) == [f'post {i}' for i in reversed(range(7))]
+
+
+def test_equal_dates_are_ordered_by_id(db):
+    same = datetime(2024, 1, 1)
+    db.blogs.insert_many([{'title': f'post {i}', 'created_at': same} for i in range(5)])
+    assert _all_pages(db.blogs, 2) == [f'post {i}' for i in reversed(range(5))]
+
+
+def test_last_page_has_no_cursor(db):
+    db.blogs.insert_many([{'title': f'post {i}', 'created_at': datetime(2024, 1, i + 1)} for i in range(3)])
+    docs, cursor = fetch_page(db.blogs, 'created_at', 3)
+    assert len(docs) == 3 and cursor is None
+
+
+def test_cursor_round_trip(db):
+    doc = {'_id': ObjectId(), 'created_at': datetime(2024, 5, 6, 7, 8, 9)}
+    assert decode_cursor(encode_cursor(doc, 'created_at')) == (doc['created_at'], doc['_id'])
+
+
+CRAFTED_CURSORS = [
+    'not-base64!',
+    _raw_cursor('not json'),
+    _raw_cursor('[1, {"$oid": "xyz"}]'),
+    _raw_cursor('[{"$date": "bad"}, 1]'),
+    _raw_cursor('[{"$gt": ""}, {"$oid": "65a1b2c3d4e5f6a7b8c9d0e1"}]'),
+    _raw_cursor('[{"$regex": ".*"}, {"$oid": "65a1b2c3d4e5f6a7b8c9d0e1"}]'),
+    _raw_cursor('[{"$date": "2024-01-01T00:00:00Z"}, {"$ne": null}]'),
+    _raw_cursor('[""]'),
+    _raw_cursor('{}'),
+]
+
+
+@pytest.mark.parametrize('cursor', CRAFTED_CURSORS)
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidPageRequest):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('cursor', CRAFTED_CURSORS)
+def test_invalid_cursor_answers_400(client, cursor):
+    response = client.get('/api/blogs', query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'message': 'Invalid cursor'}
+
+
+def test_parse_limit():
+    assert parse_limit(None, 20, 100) == 20
+    assert parse_limit('500', 20, 100) == 100
+    with pytest.raises(InvalidPageRequest):
+        parse_limit('0', 20, 100)
+    with pytest.raises(InvalidPageRequest):
+        parse_limit('ten', 20, 100)
+
+
+def test_parse_fields():
+    assert parse_fields('title, excerpt') == {'title': 1, 'excerpt': 1}
+    assert parse_fields('') is None
+    with pytest.raises(InvalidPageRequest):
+        parse_fields('title,$where')
@@ -0,0 +1,66 @@
+"""Tests for rate limiting and admission control"""
+
+from rate_limit import AuthLimiter, MemoryBucketStore, MongoBucketStore, parse_rate
+from unittest import mock
+import pytest
+
+
+def test_parse_rate():
+    assert parse_rate('10/60') == (10, 60.0)
+    assert parse_rate('5') == (5, 1.0)
+    assert parse_rate('') is None and parse_rate('0') is None
+
+
+def test_memory_bucket_refills():
+    store = MemoryBucketStore()
+    with mock.patch('rate_limit.time.monotonic', return_value=100.0):
+        assert store.take('k', 2, 10) == 0
+        assert store.take('k', 2, 10) == 0
+        assert store.take('k', 2, 10) == pytest.approx(5.0)
+        assert store.take('other', 2, 10) == 0
+    with mock.patch('rate_limit.time.monotonic', return_value=105.0):
+        assert store.take('k', 2, 10) == 0
+
+
+def test_memory_bucket_is_bounded():
+    store = MemoryBucketStore(max_keys=2)
+    for key in ('a', 'b', 'c'):
+        store.take(key, 1, 60)
+    assert list(store._buckets) == ['b', 'c']
+
+
+def test_mongo_buckets_share_a_window(db):
+    store = MongoBucketStore(lambda workload: db)
+    with mock.patch('rate_limit.time.time', return_value=1000.0):
+        assert store.take('k', 2, 60) == 0
+        assert store.take('k', 2, 60) == 0
+        assert store.take('k', 2, 60) == pytest.approx(20.0)
+    with mock.patch('rate_limit.time.time', return_value=1020.0):
+        assert store.take('k', 2, 60) == 0
+
+
+def test_mongo_buckets_fall_back_without_database():
+    fallback = MemoryBucketStore()
+    store = MongoBucketStore(lambda workload: None, fallback)
+    assert store.take('k', 1, 60) == 0
+    assert store.take('k', 1, 60) > 0
+    assert 'k' in fallback._buckets
+
+
+def test_limiter_checks_ip_and_email():
+    limiter = AuthLimiter(MemoryBucketStore(), ip_rate=(5, 60), email_rate=(1, 60))
+    assert limiter.check('login', '1.2.3.4', 'a@example.com') == 0
+    assert limiter.check('login', '1.2.3.4', 'a@example.com') > 0
+    assert limiter.check('login', '1.2.3.4', 'b@example.com') == 0
+    assert limiter.check('register', '1.2.3.4', 'a@example.com') == 0
+    assert limiter.limited == 1
+
+
+def test_limiter_concurrency_cap():
+    limiter = AuthLimiter(MemoryBucketStore(), max_concurrency=1)
+    assert limiter.admit()
+    assert not limiter.admit()
+    limiter.release()
+    assert limiter.admit()
+    assert limiter.stats()['rejected_busy'] == 1
+    assert AuthLimiter(MemoryBucketStore(), max_concurrency=0).admit()
@@ -0,0 +1,156 @@
+"""Tests for server-side sessions"""
+
+from sessions import MemorySessionStore, MongoSessionStore, ServerSession, ServerSessionInterface, init_app, regenerate
+from flask import Flask, session
+from hashing import password_hasher
+import pytest
+
+
+@pytest.fixture(params=['memory', 'mongodb'])
+def store(request, db):
+    if request.param == 'memory':
+        return MemorySessionStore(sweep_interval=0)
+    return MongoSessionStore(lambda workload: db)
+
+
+def test_store_round_trip(store):
+    assert store.load('missing') is None
+    store.save('a', {'user_id': 'u1', 'cart': [1]}, ttl=60)
+    store.save('b', {'user_id': 'u1'}, ttl=60)
+    store.save('c', {'user_id': 'u2'}, ttl=60)
+    assert store.load('a') == {'user_id': 'u1', 'cart': [1]}
+
+    assert store.revoke_user('u1') == 2
+    assert store.load('a') is None and store.load('c') == {'user_id': 'u2'}
+    store.delete('c')
+    assert store.load('c') is None
+
+
+def test_expired_sessions_are_not_loaded(store):
+    store.save('a', {'user_id': 'u1'}, ttl=-1)
+    assert store.load('a') is None
+
+
+def test_mongo_store_without_database():
+    store = MongoSessionStore(lambda workload: None)
+    store.save('a', {'user_id': 'u1'}, ttl=60)
+    assert store.load('a') is None
+    assert store.revoke_user('u1') == 0
+
+
+def test_session_loads_lazily_and_once():
+    store = MemorySessionStore()
+    store.save('a' * 22, {'user_id': 'u1'}, ttl=60)
+    sess = ServerSession(store, 'a' * 22)
+    assert not sess.loaded and store.loads == 0
+    assert sess['user_id'] == 'u1' and sess.get('user_id') == 'u1'
+    assert store.loads == 1 and not sess.new
+
+
+def test_unknown_session_id_starts_fresh():
+    sess = ServerSession(MemorySessionStore(), 'b' * 22)
+    assert len(sess) == 0
+    assert sess.new and sess.sid is None
+
+
+def _app(store):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    init_app(app, 'memory')
+    app.session_interface.store = store
+
+    @app.route('/login')
+    def login():
+        regenerate(session)
+        session['user_id'] = 'u1'
+        return 'ok'
+
+    @app.route('/me')
+    def me():
+        return session.get('user_id', '-')
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return 'ok'
+
+    @app.route('/ping')
+    def ping():
+        return 'pong'
+
+    return app
+
+
+def test_flask_round_trip_and_logout():
+    store = MemorySessionStore()
+    client = _app(store).test_client()
+
+    response = client.get('/login')
+    sid = response.headers['Set-Cookie'].split(';')[0].split('=', 1)[1]
+    assert store.load(sid) == {'user_id': 'u1'}
+    assert client.get('/me').text == 'u1'
+
+    loads = store.loads
+    assert 'Set-Cookie' not in client.get('/ping').headers
+    assert store.loads == loads
+
+    client.get('/logout')
+    assert store.load(sid) is None
+    assert client.get('/me').text == '-'
+
+
+def _sid(response):
+    return response.headers['Set-Cookie'].split(';')[0].split('=', 1)[1]
+
+
+def test_login_rotates_the_session_id():
+    store = MemorySessionStore()
+    client = _app(store).test_client()
+    planted = _sid(client.get('/login'))
+    # Logging in again (or after someone planted this id) moves to a fresh one
+    rotated = _sid(client.get('/login'))
+    assert rotated != planted
+    assert store.load(planted) is None and store.load(rotated) == {'user_id': 'u1'}
+    assert client.get('/me').text == 'u1'
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        init_app(Flask(__name__), 'redis')
+
+
+@pytest.fixture
+def memory_sessions(client, monkeypatch):
+    from app import app
+    monkeypatch.setattr(app, 'session_interface', ServerSessionInterface(MemorySessionStore()))
+    monkeypatch.setattr(password_hasher, 'workers', 0)
+    monkeypatch.setattr(password_hasher, 'method', 'pbkdf2:sha256:1000')
+    return app.session_interface.store
+
+
+def _login(client):
+    credentials = {'email': 'asha@example.com', 'password': 'secret1'}
+    assert client.post('/api/login', json=credentials).status_code == 200
+
+
+def test_logout_everywhere_revokes_every_session(app_db, memory_sessions):
+    from app import app
+    user = {'name': 'Asha', 'email': 'asha@example.com', 'password': 'secret1', 'phone': '9876543210'}
+    phone, laptop = app.test_client(), app.test_client()
+    assert phone.post('/api/register', json=user).status_code == 201
+    _login(phone)
+    _login(laptop)
+    assert laptop.get('/api/auth-status').get_json()['logged_in']
+
+    response = phone.post('/api/logout-all')
+    assert response.status_code == 200 and response.get_json()['revoked'] == 2
+    assert not phone.get('/api/auth-status').get_json()['logged_in']
+    assert not laptop.get('/api/auth-status').get_json()['logged_in']
+    assert phone.post('/api/logout-all').status_code == 401
+
+
+def test_logout_everywhere_needs_server_side_sessions(client):
+    with client.session_transaction() as sess:
+        sess['logged_in'] = True
+        sess['user_id'] = 'u1'
+    assert client.post('/api/logout-all').status_code == 501